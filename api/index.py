@@ -9,6 +9,10 @@ import os
 # Добавляем backend в путь
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
+# Serverless-функция живёт недолго и не делит пул с другими —
+# соединения не держим (NullPool), если не задано иначе
+os.environ.setdefault("DB_POOLER", "external")
+
 from main import app
 
 # Vercel требует переменную с именем handler или app
@@ -8,6 +8,9 @@ from .products import router as products_router
 from .orders import router as orders_router
 from .payments import router as payments_router
 from .reports import router as reports_router
+from .async_orders import router as async_orders_router
+from .async_payments import router as async_payments_router
+from .async_reports import router as async_reports_router
 
 __all__ = [
     "auth_router",
@@ -16,4 +19,7 @@ __all__ = [
     "orders_router",
     "payments_router",
     "reports_router",
+    "async_orders_router",
+    "async_payments_router",
+    "async_reports_router",
 ]
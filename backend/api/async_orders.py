@@ -0,0 +1,38 @@
+"""
+Асинхронные маршруты заказов (async_db=True).
+
+Маршруты строятся по api.orders (api.async_routes); отдельно описан
+только потоковый импорт — он и в синхронном модуле асинхронный.
+
+Списки читаются через get_async_read_db (реплики, как у синхронных
+маршрутов), а обращения общих функций к синхронным движкам — резерв
+номеров заказов, кеш отчётов в БД — уходят в пул потоков (db.blocking).
+"""
+
+from fastapi import Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import get_async_db
+from core.dependencies import CurrentUser, get_current_user_async
+from . import orders
+from .async_routes import async_router
+
+
+async def bulk_import_orders(
+    request: Request,
+    chunk_size: int = Query(
+        orders.settings.bulk_import_chunk_size, ge=1, le=10000,
+        description="Сколько заказов записывать за одну транзакцию"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async)
+):
+    """Пакетный импорт заказов из NDJSON или CSV."""
+    return await orders.import_orders(
+        orders.open_import_records(request),
+        chunk_size,
+        lambda chunk: db.run_sync(orders.import_orders_chunk, chunk)
+    )
+
+
+router = async_router(orders.router, overrides={"bulk_import_orders": bulk_import_orders})
@@ -0,0 +1,11 @@
+"""
+Асинхронные маршруты платежей (async_db=True).
+
+Маршруты строятся по api.payments (api.async_routes) — проводки
+и пересчёт задолженности остаются общими.
+"""
+
+from . import payments
+from .async_routes import async_router
+
+router = async_router(payments.router)
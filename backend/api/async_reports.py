@@ -0,0 +1,11 @@
+"""
+Асинхронные маршруты отчётов (async_db=True).
+
+Маршруты строятся по api.reports (api.async_routes): отчёты строятся
+теми же функциями build_*, кеш отчётов общий.
+"""
+
+from . import reports
+from .async_routes import async_router
+
+router = async_router(reports.router)
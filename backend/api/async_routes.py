@@ -0,0 +1,109 @@
+"""
+Асинхронные маршруты (async_db=True), построенные по синхронным.
+
+async_router повторяет маршруты синхронного роутера на AsyncSession:
+путь, параметры, схема и код ответа берутся из исходного эндпоинта,
+а зависимости get_db / get_read_db / get_current_user подменяются
+асинхронными. Сам эндпоинт выполняется через db.run_sync и не
+занимает потоки Starlette; ORM-объекты превращаются в схему ответа
+внутри run_sync, пока доступна ленивая подгрузка связей.
+
+Параметры маршрутов описываются один раз — в синхронном модуле.
+"""
+
+import inspect
+from typing import Callable, Optional
+
+from fastapi import APIRouter, Depends, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.params import Depends as DependsParam
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import get_async_db, get_db
+from core.dependencies import (
+    CurrentUser, get_async_read_db, get_current_user, get_current_user_async, get_read_db
+)
+
+# Синхронная зависимость -> асинхронная
+ASYNC_DEPENDENCIES = {
+    get_db: get_async_db,
+    get_read_db: get_async_read_db,
+    get_current_user: get_current_user_async,
+}
+
+# Зависимости, дающие сессию БД
+SESSION_DEPENDENCIES = (get_db, get_read_db)
+
+
+def async_router(router: APIRouter, overrides: Optional[dict[str, Callable]] = None) -> APIRouter:
+    """
+    Роутер с асинхронными копиями маршрутов router.
+    
+    Args:
+        router: Синхронный роутер (с префиксом и тегами)
+        overrides: Готовые async-эндпоинты по имени маршрута — для
+            маршрутов, которые уже асинхронные (например, потоковый импорт)
+    """
+    overrides = overrides or {}
+    result = APIRouter()
+    
+    for route in router.routes:
+        endpoint = overrides.get(route.name)
+        if endpoint is None:
+            if inspect.iscoroutinefunction(route.endpoint):
+                raise TypeError(f"Для асинхронного маршрута {route.name} нужен overrides")
+            endpoint = async_endpoint(route)
+        
+        result.add_api_route(
+            route.path,
+            endpoint,
+            methods=list(route.methods),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            name=route.name,
+            summary=route.summary,
+            description=route.description,
+            response_class=route.response_class,
+            responses=route.responses,
+        )
+    
+    return result
+
+
+def async_endpoint(route: APIRoute) -> Callable:
+    """Async-эндпоинт, выполняющий синхронный route.endpoint через run_sync."""
+    endpoint = route.endpoint
+    adapter = TypeAdapter(route.response_model) if route.response_model is not None else None
+    
+    session_param = None
+    parameters = []
+    for param in inspect.signature(endpoint).parameters.values():
+        dependency = param.default.dependency if isinstance(param.default, DependsParam) else None
+        if dependency in SESSION_DEPENDENCIES:
+            session_param = param.name
+            param = param.replace(default=Depends(ASYNC_DEPENDENCIES[dependency]), annotation=AsyncSession)
+        elif dependency in ASYNC_DEPENDENCIES:
+            param = param.replace(default=Depends(ASYNC_DEPENDENCIES[dependency]), annotation=CurrentUser)
+        parameters.append(param)
+    
+    def call(session, kwargs: dict):
+        if session_param is not None:
+            kwargs = {**kwargs, session_param: session}
+        result = endpoint(**kwargs)
+        if adapter is None or isinstance(result, Response):
+            return result
+        return adapter.validate_python(result, from_attributes=True)
+    
+    async def run(**kwargs):
+        if session_param is None:
+            return await run_in_threadpool(call, None, kwargs)
+        db = kwargs.pop(session_param)
+        return await db.run_sync(call, kwargs)
+    
+    run.__name__ = endpoint.__name__
+    run.__doc__ = endpoint.__doc__
+    run.__signature__ = inspect.signature(endpoint).replace(parameters=parameters)
+    return run
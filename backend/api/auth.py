@@ -4,22 +4,41 @@ API маршруты авторизации.
 """
 
 from datetime import timedelta
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from db.database import get_db
 from core.config import get_settings
-from core.security import verify_password, get_password_hash, create_access_token
-from core.dependencies import get_current_user
+from core.password_pool import password_pool
+from core.security import create_access_token
+from core.dependencies import CurrentUser, get_current_user
 from models import User
 from schemas import UserCreate, UserRead, Token
 
 router = APIRouter(prefix="/auth", tags=["Авторизация"])
 
 
+def find_user_by_email(db: Session, email: str) -> Optional[User]:
+    """Ищем пользователя по email."""
+    return db.query(User).filter(User.email == email).first()
+
+
+def save_user(db: Session, user: User) -> User:
+    """Сохраняем нового пользователя."""
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+# Эндпоинты входа и регистрации асинхронные: bcrypt выполняется в своём
+# пуле (core.password_pool), а запросы к БД — в общем пуле потоков
+
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register(
+async def register(
     user_data: UserCreate,
     db: Session = Depends(get_db)
 ):
@@ -29,7 +48,7 @@ def register(
     Проверяем, что email ещё не занят, хешируем пароль и сохраняем.
     """
     # Проверяем, нет ли уже такого email
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await run_in_threadpool(find_user_by_email, db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -39,20 +58,16 @@ def register(
     # Создаём нового пользователя
     user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await password_pool.hash(user_data.password),
         full_name=user_data.full_name,
         role="viewer"  # Новые пользователи получают базовую роль
     )
     
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    
-    return user
+    return await run_in_threadpool(save_user, db, user)
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
@@ -63,9 +78,9 @@ def login(
     Используем стандартную форму OAuth2 (username + password).
     """
     # Ищем пользователя по email (в форме OAuth2 поле называется username)
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await run_in_threadpool(find_user_by_email, db, form_data.username)
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await password_pool.verify(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный email или пароль",
@@ -89,8 +104,18 @@ def login(
 
 
 @router.get("/me", response_model=UserRead)
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
     """
     Получить данные текущего авторизованного пользователя.
+    В кеше авторизации только id и роль, профиль читаем из БД.
     """
-    return current_user
+    return db.get(User, current_user.id)
+
+
+@router.get("/password-pool-stats")
+def get_password_pool_stats(current_user: CurrentUser = Depends(get_current_user)):
+    """Метрики пула хеширования паролей в этом воркере."""
+    return password_pool.stats()
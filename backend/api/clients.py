@@ -8,51 +8,126 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 
 from db.database import get_db
-from core.dependencies import get_current_user
-from models import User, Client
-from schemas import ClientCreate, ClientUpdate, ClientRead, ClientList
+from core.cache import report_cache
+from core.dependencies import CurrentUser, get_current_user, get_read_db
+from core.export import export_response
+from core.pagination import paginate
+from core.search import CLIENT_SEARCH, search_condition, search_ranked
+from core.suggest import client_suggest
+from models import Client
+from schemas import ClientCreate, ClientUpdate, ClientRead, ClientList, ClientSuggestion
 
 router = APIRouter(prefix="/clients", tags=["Клиенты"])
 
 
+def filter_clients(query, search: Optional[str], city: Optional[str]):
+    """Фильтры списка клиентов (общие для списка и выгрузки)."""
+    # Фильтр по поиску (по поисковому индексу, см. core/search.py)
+    if search:
+        engine = query.session.get_bind()
+        query = query.filter(search_condition(engine, Client, CLIENT_SEARCH, search))
+    
+    # Фильтр по городу
+    if city:
+        query = query.filter(Client.city == city)
+    
+    return query
+
+
 @router.get("", response_model=ClientList)
 def get_clients(
     page: int = Query(1, ge=1, description="Номер страницы"),
     per_page: int = Query(20, ge=1, le=100, description="Записей на странице"),
     search: Optional[str] = Query(None, description="Поиск по имени или компании"),
     city: Optional[str] = Query(None, description="Фильтр по городу"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor)"),
+    include_total: bool = Query(True, description="Считать общее количество записей"),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Получить список клиентов с пагинацией и фильтрами.
-    """
-    query = db.query(Client)
     
-    # Фильтр по поиску
-    if search:
-        search_pattern = f"%{search}%"
-        query = query.filter(
-            (Client.name.ilike(search_pattern)) | 
-            (Client.company.ilike(search_pattern))
-        )
-    
-    # Фильтр по городу
-    if city:
-        query = query.filter(Client.city == city)
+    С параметром cursor страница выбирается по ключу (created_at, id).
+    """
+    query = filter_clients(db.query(Client), search, city)
     
-    # Считаем общее количество
-    total = query.count()
+    # Считаем общее количество (если нужно)
+    total = query.count() if include_total else None
     
     # Применяем пагинацию
-    offset = (page - 1) * per_page
-    clients = query.order_by(Client.created_at.desc()).offset(offset).limit(per_page).all()
+    clients, next_cursor = paginate(
+        query,
+        [Client.created_at, Client.id],
+        per_page=per_page,
+        page=page,
+        cursor=cursor,
+        descending=True
+    )
     
     return ClientList(
         items=clients,
         total=total,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/search", response_model=list[ClientRead])
+def search_clients(
+    q: str = Query(..., min_length=1, description="Строка поиска по имени или компании"),
+    limit: int = Query(20, ge=1, le=100, description="Сколько результатов вернуть"),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Поиск клиентов по релевантности.
+    
+    Каждое слово запроса ищется как начало слова в имени или компании,
+    без учёта регистра (в том числе кириллицы).
+    """
+    return search_ranked(db, Client, CLIENT_SEARCH, q, limit)
+
+
+@router.get("/suggest", response_model=list[ClientSuggestion])
+def suggest_clients(
+    q: str = Query(..., min_length=1, description="Начало имени или компании"),
+    limit: int = Query(10, ge=1, le=50, description="Сколько подсказок вернуть"),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Подсказки при выборе клиента, из индекса в памяти."""
+    suggestions = client_suggest.suggest(q, limit)
+    if suggestions is None:
+        return client_suggest.query_db(db, q, limit)
+    return suggestions
+
+
+@router.get("/export")
+def export_clients(
+    search: Optional[str] = Query(None, description="Поиск по имени или компании"),
+    city: Optional[str] = Query(None, description="Фильтр по городу"),
+    fmt: str = Query("csv", alias="format", description="Формат: csv или ndjson"),
+    gzip: bool = Query(False, description="Сжать выгрузку gzip"),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Потоковая выгрузка клиентов с теми же фильтрами, что и у списка."""
+    query = filter_clients(
+        db.query(
+            Client.id, Client.name, Client.company, Client.phone, Client.email,
+            Client.city, Client.address, Client.inn, Client.notes, Client.created_at
+        ),
+        search,
+        city
+    )
+    
+    return export_response(
+        query.order_by(Client.created_at.desc(), Client.id.desc()),
+        fmt,
+        "clients",
+        compress=gzip
     )
 
 
@@ -60,7 +135,7 @@ def get_clients(
 def get_client(
     client_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Получить клиента по ID."""
     client = db.query(Client).filter(Client.id == client_id).first()
@@ -78,14 +153,16 @@ def get_client(
 def create_client(
     client_data: ClientCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Создать нового клиента."""
     client = Client(**client_data.model_dump())
     
     db.add(client)
     db.commit()
+    report_cache.invalidate("clients")
     db.refresh(client)
+    client_suggest.upsert(client)
     
     return client
 
@@ -95,7 +172,7 @@ def update_client(
     client_id: int,
     client_data: ClientUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Обновить данные клиента."""
     client = db.query(Client).filter(Client.id == client_id).first()
@@ -112,7 +189,9 @@ def update_client(
         setattr(client, field, value)
     
     db.commit()
+    report_cache.invalidate("clients")
     db.refresh(client)
+    client_suggest.upsert(client)
     
     return client
 
@@ -121,7 +200,7 @@ def update_client(
 def delete_client(
     client_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Удалить клиента."""
     client = db.query(Client).filter(Client.id == client_id).first()
@@ -141,3 +220,5 @@ def delete_client(
     
     db.delete(client)
     db.commit()
+    report_cache.invalidate("clients")
+    client_suggest.remove(client_id)
@@ -3,18 +3,46 @@ API маршруты для работы с заказами.
 CRUD + расчёт суммы заказа и работа с позициями.
 """
 
-from typing import Optional
+import codecs
+import csv
+from collections import deque
 from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Optional
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload, selectinload
 
-from db.database import get_db
-from core.dependencies import get_current_user
-from models import User, Order, OrderItem, Client, Product
-from schemas import OrderCreate, OrderUpdate, OrderRead, OrderList
+from db.database import get_db, write_engine
+from core.config import get_settings
+from core.cache import report_cache
+from core.catalog import CatalogProduct, product_catalog
+from core.dependencies import CurrentUser, get_current_user, get_read_db
+from core.export import export_response
+from core.order_numbers import OrderNumberAllocator
+from core.pagination import paginate
+from core.order_status import (
+    InvalidTransition, StatusChange, check_transition, emit_status_changes, source_statuses
+)
+from core.stock import (
+    STOCK_MOVING_STATUSES, InsufficientStock, orders_quantities, release_orders,
+    reserve_orders, reserved_after, shift_order_stock
+)
+from models import Order, OrderItem, Client
+from schemas import (
+    OrderCreate, OrderUpdate, OrderRead, OrderList,
+    OrderImportRow, OrderImportReport,
+    OrderStatusBulk, OrderStatusResult, OrderStatusBulkReport, StockShortageRead
+)
 
 router = APIRouter(prefix="/orders", tags=["Заказы"])
+settings = get_settings()
+
+# Номера заказов выдаются блоками из таблицы счётчиков
+order_numbers = OrderNumberAllocator(settings.order_number_block_size)
 
 
 def generate_order_number(db: Session) -> str:
@@ -22,30 +50,66 @@ def generate_order_number(db: Session) -> str:
     Генерируем номер заказа.
     Формат: ORD-YYYYMMDD-XXXX (например, ORD-20251231-0001)
     """
-    today = datetime.utcnow().strftime("%Y%m%d")
-    prefix = f"ORD-{today}-"
+    # Новый блок резервируется отдельной транзакцией на write_engine
+    # (в async-режиме — в пуле потоков, см. db.blocking)
+    return order_numbers.next_number(write_engine)
+
+
+def calculate_order_total(lines: list[dict]) -> Decimal:
+    """Считаем общую сумму заказа по позициям."""
+    return sum((line["line_total"] for line in lines), Decimal(0))
+
+
+def load_order_products(db: Session, product_ids: set[int]) -> dict[int, CatalogProduct]:
+    """Товары заказа из каталога в памяти (которых в нём нет — из БД)."""
+    return product_catalog.lookup(db, product_ids)
+
+
+def build_order_lines(order_data: OrderCreate, products: dict[int, CatalogProduct]) -> list[dict]:
+    """
+    Позиции заказа с суммами.
     
-    # Ищем последний заказ за сегодня
-    last_order = (
-        db.query(Order)
-        .filter(Order.order_number.like(f"{prefix}%"))
-        .order_by(Order.order_number.desc())
-        .first()
-    )
+    Товар должен существовать и не быть в архиве. Если unit_price
+    не указана, берём цену товара из каталога — только в валюте заказа.
     
-    if last_order:
-        # Извлекаем номер и увеличиваем
-        last_num = int(last_order.order_number.split("-")[-1])
-        new_num = last_num + 1
-    else:
-        new_num = 1
-    
-    return f"{prefix}{new_num:04d}"
+    Raises:
+        ValueError: Текст ошибки для ответа
+    """
+    lines = []
+    for item in order_data.items:
+        product = products.get(item.product_id)
+        if product is None:
+            raise ValueError(f"Товар с ID {item.product_id} не найден")
+        if not product.is_active:
+            raise ValueError(f"Товар с ID {item.product_id} в архиве")
+        
+        unit_price = item.unit_price
+        if unit_price is None:
+            if product.currency != order_data.currency:
+                raise ValueError(
+                    f"Цена товара с ID {item.product_id} указана в {product.currency}, "
+                    f"передайте unit_price в {order_data.currency}"
+                )
+            unit_price = product.price
+        
+        lines.append({
+            "product_id": item.product_id,
+            "quantity": item.quantity,
+            "unit_price": unit_price,
+            "line_total": item.quantity * unit_price,
+        })
+    return lines
 
 
-def calculate_order_total(items: list[OrderItem]) -> Decimal:
-    """Считаем общую сумму заказа по позициям."""
-    return sum(item.line_total for item in items)
+def filter_orders(query, client_id: Optional[int], status_filter: Optional[str]):
+    """Фильтры списка заказов (общие для списка и выгрузки)."""
+    if client_id:
+        query = query.filter(Order.client_id == client_id)
+    
+    if status_filter:
+        query = query.filter(Order.status == status_filter)
+    
+    return query
 
 
 @router.get("", response_model=OrderList)
@@ -54,42 +118,537 @@ def get_orders(
     per_page: int = Query(20, ge=1, le=100),
     client_id: Optional[int] = Query(None, description="Фильтр по клиенту"),
     status_filter: Optional[str] = Query(None, alias="status", description="Фильтр по статусу"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor)"),
+    include_total: bool = Query(True, description="Считать общее количество записей"),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    """Получить список заказов с пагинацией."""
-    query = db.query(Order).options(joinedload(Order.items))
-    
-    if client_id:
-        query = query.filter(Order.client_id == client_id)
+    """
+    Получить список заказов с пагинацией.
     
-    if status_filter:
-        query = query.filter(Order.status == status_filter)
+    С параметром cursor страница выбирается по ключу (created_at, id)
+    без OFFSET, а include_total=false отключает подсчёт total.
+    """
+    # Фильтруем голую таблицу orders: без JOIN на позиции COUNT и LIMIT
+    # считают заказы, а не строки заказ×позиция
+    query = filter_orders(db.query(Order), client_id, status_filter)
     
-    total = query.count()
+    total = query.count() if include_total else None
     
-    offset = (page - 1) * per_page
-    orders = (
-        query
-        .order_by(Order.created_at.desc())
-        .offset(offset)
-        .limit(per_page)
-        .all()
+    # Позиции подгружаем вторым запросом только для заказов страницы
+    orders, next_cursor = paginate(
+        query.options(selectinload(Order.items)),
+        [Order.created_at, Order.id],
+        per_page=per_page,
+        page=page,
+        cursor=cursor,
+        descending=True
     )
     
-    # Добавляем расчётные поля
-    order_reads = []
-    for order in orders:
-        order_read = OrderRead.model_validate(order)
-        order_read.paid_amount = order.paid_amount
-        order_read.debt_amount = order.debt_amount
-        order_reads.append(order_read)
-    
     return OrderList(
-        items=order_reads,
+        items=[OrderRead.model_validate(order) for order in orders],
         total=total,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/export")
+def export_orders(
+    client_id: Optional[int] = Query(None, description="Фильтр по клиенту"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Фильтр по статусу"),
+    fmt: str = Query("csv", alias="format", description="Формат: csv или ndjson"),
+    gzip: bool = Query(False, description="Сжать выгрузку gzip"),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Потоковая выгрузка заказов с теми же фильтрами, что и у списка."""
+    query = filter_orders(
+        db.query(
+            Order.id, Order.order_number, Order.client_id, Order.status,
+            Order.order_date, Order.total_amount, Order.currency,
+            Order.delivery_address, Order.delivery_date, Order.notes,
+            Order.created_at
+        ),
+        client_id,
+        status_filter
+    )
+    
+    return export_response(
+        query.order_by(Order.created_at.desc(), Order.id.desc()),
+        fmt,
+        "orders",
+        compress=gzip
+    )
+
+
+# --- Пакетный импорт ---
+
+# Колонки CSV: одна строка — одна позиция, строки заказа идут подряд
+# с одинаковым order_ref
+CSV_ORDER_FIELDS = ("client_id", "currency", "delivery_address", "delivery_date", "notes")
+CSV_ITEM_FIELDS = ("product_id", "quantity", "unit_price")
+
+
+async def iter_body_lines(request: Request, keepends: bool = False) -> AsyncIterator[str]:
+    """
+    Читаем тело запроса потоком и отдаём его построчно.
+    
+    keepends=True оставляет перевод строки — он нужен csv.reader,
+    чтобы сохранить переносы внутри полей в кавычках.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line + "\n" if keepends else line.rstrip("\r")
+    
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield buffer if keepends else buffer.rstrip("\r")
+
+
+async def iter_ndjson_records(request: Request) -> AsyncIterator[tuple[int, str]]:
+    """NDJSON: каждая непустая строка — один OrderCreate в JSON."""
+    row = 0
+    async for line in iter_body_lines(request):
+        row += 1
+        if line.strip():
+            yield row, line
+
+
+class PendingLines:
+    """Строки для csv.reader, которые подкладываем по мере чтения тела."""
+    
+    def __init__(self):
+        self.lines: deque[str] = deque()
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def iter_csv_rows(request: Request) -> AsyncIterator[tuple[int, list[str]]]:
+    """
+    Записи CSV с номером их первой строки.
+    
+    Все строки идут через один csv.reader, поэтому поле в кавычках
+    может содержать переносы строк. Запись отдаём читателю, только когда
+    она закончилась: число кавычек в её строках чётное (экранированная
+    кавычка "" не меняет чётность).
+    """
+    pending = PendingLines()
+    reader = csv.reader(pending)
+    row = 0
+    start = None
+    quotes = 0
+    
+    async for line in iter_body_lines(request, keepends=True):
+        row += 1
+        if start is None:
+            if not line.strip():
+                continue
+            start = row
+        
+        pending.lines.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue  # Поле в кавычках продолжается на следующей строке
+        
+        yield start, next(reader)
+        start, quotes = None, 0
+    
+    # Незакрытая кавычка в конце файла — отдаём запись как есть
+    if start is not None:
+        values = next(reader, None)
+        if values is not None:
+            yield start, values
+
+
+async def iter_csv_records(request: Request) -> AsyncIterator[tuple[int, dict]]:
+    """
+    CSV: первая строка — заголовок, дальше по строке на позицию.
+    
+    Подряд идущие строки с одним order_ref собираются в один заказ,
+    поля заказа берутся из первой строки. Номер записи в отчёте —
+    номер первой строки заказа.
+    """
+    header = None
+    current_ref = None
+    current = None
+    
+    async for row, values in iter_csv_rows(request):
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        
+        record = {
+            name: value for name, value in zip(header, values)
+            if value != ""
+        }
+        ref = record.get("order_ref")
+        
+        if current is None or ref is None or ref != current_ref:
+            if current is not None:
+                yield current
+            current_ref = ref
+            current = (row, {
+                **{f: record[f] for f in CSV_ORDER_FIELDS if f in record},
+                "items": [],
+            })
+        
+        current[1]["items"].append(
+            {f: record[f] for f in CSV_ITEM_FIELDS if f in record}
+        )
+    
+    if current is not None:
+        yield current
+
+
+def parse_import_record(data) -> OrderCreate:
+    """Валидируем запись импорта схемой OrderCreate."""
+    if isinstance(data, str):
+        return OrderCreate.model_validate_json(data)
+    return OrderCreate.model_validate(data)
+
+
+def import_orders_chunk(
+    db: Session,
+    chunk: list[tuple[int, OrderCreate]]
+) -> list[OrderImportRow]:
+    """
+    Записываем пачку заказов.
+    
+    Клиенты проверяются одним запросом IN на всю пачку, товары — по
+    каталогу в памяти, заказы и позиции вставляются двумя executemany,
+    пачка коммитится одной транзакцией.
+    """
+    client_ids = {data.client_id for _, data in chunk}
+    existing_clients = {
+        client_id for (client_id,) in
+        db.query(Client.id).filter(Client.id.in_(client_ids)).all()
+    }
+    products = load_order_products(
+        db, {item.product_id for _, data in chunk for item in data.items}
+    )
+    
+    results = []
+    valid = []
+    for row, data in chunk:
+        if data.client_id not in existing_clients:
+            results.append(OrderImportRow(row=row, status="error", error="Клиент не найден"))
+            continue
+        
+        try:
+            lines = build_order_lines(data, products)
+        except ValueError as exc:
+            results.append(OrderImportRow(row=row, status="error", error=str(exc)))
+            continue
+        
+        valid.append((row, data, lines))
+    
+    if not valid:
+        return results
+    
+    numbers = order_numbers.next_numbers(write_engine, len(valid))
+    
+    order_rows = []
+    item_rows = {}
+    for (row, data, lines), number in zip(valid, numbers):
+        item_rows[number] = lines
+        total_amount = calculate_order_total(lines)
+        order_rows.append({
+            "order_number": number,
+            "client_id": data.client_id,
+            "currency": data.currency,
+            "delivery_address": data.delivery_address,
+            "delivery_date": data.delivery_date,
+            "notes": data.notes,
+            "total_amount": total_amount,
+            "debt_amount": total_amount,  # Оплат у нового заказа ещё нет
+        })
+    
+    try:
+        inserted = db.execute(
+            insert(Order).returning(Order.id, Order.order_number),
+            order_rows
+        ).all()
+        order_ids = {number: order_id for order_id, number in inserted}
+        
+        db.execute(insert(OrderItem), [
+            {**line, "order_id": order_ids[number]}
+            for number, lines in item_rows.items()
+            for line in lines
+        ])
+        db.commit()
+        report_cache.invalidate("orders")
+    except SQLAlchemyError as exc:
+        db.rollback()
+        results.extend(
+            OrderImportRow(row=row, status="error", error=f"Ошибка записи в БД: {exc.__class__.__name__}")
+            for row, _, _ in valid
+        )
+        return results
+    
+    results.extend(
+        OrderImportRow(
+            row=row,
+            status="created",
+            order_id=order_ids[number],
+            order_number=number
+        )
+        for (row, _, _), number in zip(valid, numbers)
+    )
+    return results
+
+
+def open_import_records(request: Request) -> AsyncIterator[tuple[int, object]]:
+    """
+    Выбираем разбор тела по Content-Type.
+    
+    Raises:
+        HTTPException: 415, если формат не поддерживается
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type == "text/csv":
+        return iter_csv_records(request)
+    if content_type in ("application/x-ndjson", "application/jsonl", "application/json"):
+        return iter_ndjson_records(request)
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Ожидается application/x-ndjson или text/csv"
+    )
+
+
+async def import_orders(
+    records: AsyncIterator[tuple[int, object]],
+    chunk_size: int,
+    write_chunk: Callable[[list[tuple[int, OrderCreate]]], Awaitable[list[OrderImportRow]]]
+) -> OrderImportReport:
+    """
+    Валидируем записи и пишем их пачками через write_chunk.
+    
+    write_chunk выполняет import_orders_chunk в пуле потоков
+    (синхронная сессия) или через run_sync (асинхронная).
+    """
+    results = []
+    chunk = []
+    async for row, data in records:
+        try:
+            chunk.append((row, parse_import_record(data)))
+        except ValidationError as exc:
+            error = exc.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            results.append(OrderImportRow(
+                row=row, status="error",
+                error=f"{location}: {error['msg']}" if location else error["msg"]
+            ))
+        
+        if len(chunk) >= chunk_size:
+            results.extend(await write_chunk(chunk))
+            chunk = []
+    
+    if chunk:
+        results.extend(await write_chunk(chunk))
+    
+    results.sort(key=lambda result: result.row)
+    created = sum(1 for result in results if result.status == "created")
+    
+    return OrderImportReport(
+        created=created,
+        failed=len(results) - created,
+        rows=results
+    )
+
+
+@router.post("/bulk", response_model=OrderImportReport)
+async def bulk_import_orders(
+    request: Request,
+    chunk_size: int = Query(
+        settings.bulk_import_chunk_size, ge=1, le=10000,
+        description="Сколько заказов записывать за одну транзакцию"
+    ),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Пакетный импорт заказов из NDJSON или CSV.
+    
+    Тело читается потоком и обрабатывается пачками по chunk_size.
+    Формат выбирается по Content-Type: application/x-ndjson
+    (строка = OrderCreate) или text/csv (строка = позиция, колонки
+    order_ref, client_id, currency, delivery_address, delivery_date,
+    notes, product_id, quantity, unit_price).
+    
+    Ошибочные записи не прерывают импорт — они попадают в отчёт.
+    """
+    return await import_orders(
+        open_import_records(request),
+        chunk_size,
+        lambda chunk: run_in_threadpool(import_orders_chunk, db, chunk)
+    )
+
+
+def shortages_json(shortages) -> list[dict]:
+    """Нехватки остатков для ответа API."""
+    return [
+        StockShortageRead.model_validate(shortage, from_attributes=True).model_dump(mode="json")
+        for shortage in shortages
+    ]
+
+
+@router.post("/status-bulk", response_model=OrderStatusBulkReport)
+def bulk_update_status(
+    data: OrderStatusBulk,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Сменить статус многих заказов одним запросом.
+    
+    Заказы читаются одним запросом, переходы проверяются по графу,
+    товар резервируется/возвращается пачкой, затем на каждый целевой
+    статус выполняется один UPDATE. Ошибка по заказу (нет заказа,
+    недопустимый переход, не хватает товара) не мешает остальным —
+    она попадает в отчёт.
+    """
+    results: dict[int, OrderStatusResult] = {}
+    targets: dict[int, str] = {}
+    duplicates: list[OrderStatusResult] = []
+    for item in data.items:
+        if item.order_id in targets:
+            duplicates.append(OrderStatusResult(
+                order_id=item.order_id, status="error",
+                error="Заказ указан в запросе повторно"
+            ))
+            continue
+        targets[item.order_id] = item.status
+    
+    # Текущие статусы; в PostgreSQL строки блокируются до конца транзакции
+    current = {
+        order_id: (order_status, bool(reserved))
+        for order_id, order_status, reserved in db.execute(
+            select(Order.id, Order.status, Order.stock_reserved)
+            .where(Order.id.in_(list(targets)))
+            .with_for_update()
+        )
+    }
+    
+    groups: dict[str, list[int]] = {}
+    for order_id, target in targets.items():
+        if order_id not in current:
+            results[order_id] = OrderStatusResult(
+                order_id=order_id, status="error", to_status=target,
+                error="Заказ не найден"
+            )
+            continue
+        
+        old_status = current[order_id][0]
+        try:
+            check_transition(old_status, target)
+        except InvalidTransition as exc:
+            results[order_id] = OrderStatusResult(
+                order_id=order_id, status="error", from_status=old_status,
+                to_status=target, error=str(exc)
+            )
+            continue
+        
+        if target == old_status:
+            results[order_id] = OrderStatusResult(
+                order_id=order_id, status="unchanged", from_status=old_status,
+                to_status=target
+            )
+            continue
+        
+        groups.setdefault(target, []).append(order_id)
+    
+    # Резерв товара: подтверждаемые заказы списывают остатки, отменяемые — возвращают
+    to_reserve, to_release = [], []
+    for target, order_ids in groups.items():
+        for order_id in order_ids:
+            reserved = current[order_id][1]
+            if reserved_after(target, reserved) and not reserved:
+                to_reserve.append(order_id)
+            elif reserved and not reserved_after(target, reserved):
+                to_release.append(order_id)
+    
+    quantities = orders_quantities(db, to_reserve + to_release)
+    shortages, stock = reserve_orders(db, {order_id: quantities[order_id] for order_id in to_reserve})
+    # Возврат идёт после резерва — его остатки новее
+    stock.update(release_orders(db, {order_id: quantities[order_id] for order_id in to_release}))
+    
+    for order_id, order_shortages in shortages.items():
+        results[order_id] = OrderStatusResult(
+            order_id=order_id, status="error", from_status=current[order_id][0],
+            to_status=targets[order_id], error="Недостаточно товара на складе",
+            shortages=shortages_json(order_shortages)
+        )
+    
+    # Один UPDATE на целевой статус; условие на прочитанные статус и флаг
+    # резерва защищает от смены между чтением и записью (в SQLite нет FOR UPDATE)
+    now = datetime.utcnow()
+    changes = []
+    for target, order_ids in groups.items():
+        order_ids = [order_id for order_id in order_ids if order_id not in shortages]
+        if not order_ids:
+            continue
+        
+        values = {"status": target, "updated_at": now}
+        if target in STOCK_MOVING_STATUSES:
+            # В остальные статусы флаг резерва переходит как был
+            values["stock_reserved"] = int(reserved_after(target, False))
+        
+        updated = db.execute(
+            update(Order)
+            .where(
+                tuple_(Order.id, Order.status, Order.stock_reserved).in_([
+                    (order_id, current[order_id][0], int(current[order_id][1]))
+                    for order_id in order_ids
+                ]),
+                Order.status.in_(source_statuses(target))
+            )
+            .values(**values)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        
+        if len(updated) != len(order_ids):
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Статусы части заказов изменились во время обработки, повторите запрос"
+            )
+        
+        for order_id in order_ids:
+            old_status = current[order_id][0]
+            changes.append(StatusChange(order_id, old_status, target))
+            results[order_id] = OrderStatusResult(
+                order_id=order_id, status="updated", from_status=old_status,
+                to_status=target
+            )
+    
+    db.commit()
+    product_catalog.update_stock(stock)
+    # Кеш отчётов по заказам сбрасывают подписчики смены статуса
+    emit_status_changes(changes)
+    
+    ordered = [results[order_id] for order_id in targets] + duplicates
+    updated_count = sum(1 for result in ordered if result.status == "updated")
+    unchanged_count = sum(1 for result in ordered if result.status == "unchanged")
+    
+    return OrderStatusBulkReport(
+        updated=updated_count,
+        unchanged=unchanged_count,
+        failed=len(ordered) - updated_count - unchanged_count,
+        results=ordered
     )
 
 
@@ -97,7 +656,7 @@ def get_orders(
 def get_order(
     order_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Получить заказ по ID с позициями."""
     order = (
@@ -113,18 +672,14 @@ def get_order(
             detail="Заказ не найден"
         )
     
-    order_read = OrderRead.model_validate(order)
-    order_read.paid_amount = order.paid_amount
-    order_read.debt_amount = order.debt_amount
-    
-    return order_read
+    return order
 
 
 @router.post("", response_model=OrderRead, status_code=status.HTTP_201_CREATED)
 def create_order(
     order_data: OrderCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Создать новый заказ с позициями.
@@ -138,6 +693,17 @@ def create_order(
             detail="Клиент не найден"
         )
     
+    # Проверяем товары по каталогу и считаем позиции и сумму в памяти
+    products = load_order_products(db, {item.product_id for item in order_data.items})
+    try:
+        lines = build_order_lines(order_data, products)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    total_amount = calculate_order_total(lines)
+    
     # Создаём заказ
     order = Order(
         order_number=generate_order_number(db),
@@ -146,50 +712,79 @@ def create_order(
         delivery_address=order_data.delivery_address,
         delivery_date=order_data.delivery_date,
         notes=order_data.notes,
+        total_amount=total_amount,
+        debt_amount=total_amount,  # Оплат у нового заказа ещё нет
     )
     
     db.add(order)
     db.flush()  # Получаем ID заказа
     
-    # Добавляем позиции
-    for item_data in order_data.items:
-        # Проверяем товар
-        product = db.query(Product).filter(Product.id == item_data.product_id).first()
-        if not product:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Товар с ID {item_data.product_id} не найден"
-            )
-        
-        # Рассчитываем сумму позиции
-        line_total = item_data.quantity * item_data.unit_price
-        
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=item_data.product_id,
-            quantity=item_data.quantity,
-            unit_price=item_data.unit_price,
-            line_total=line_total
-        )
-        db.add(order_item)
-    
-    db.flush()
-    
-    # Считаем общую сумму
-    order.total_amount = calculate_order_total(order.items)
+    # Вставляем все позиции одним executemany
+    for line in lines:
+        line["order_id"] = order.id
+    db.execute(insert(OrderItem), lines)
     
     db.commit()
+    report_cache.invalidate("orders")
     db.refresh(order)
     
     return order
 
 
+def change_order_status(db: Session, order: Order, new_status: str) -> dict[int, Decimal]:
+    """
+    Переводим заказ в new_status и двигаем резерв товара (до commit).
+    
+    Статус и флаг резерва меняет условный UPDATE по прочитанным
+    значениям: из параллельных запросов строку изменит только один,
+    и только он резервирует или возвращает товар. Остальные получают 409.
+    
+    Returns:
+        Новые остатки товаров, если резерв сдвинулся (для каталога)
+    """
+    reserved = bool(order.stock_reserved)
+    reserve = reserved_after(new_status, reserved)
+    
+    changed = db.execute(
+        update(Order)
+        .where(
+            Order.id == order.id,
+            Order.status == order.status,
+            Order.stock_reserved == int(reserved)
+        )
+        .values(status=new_status, stock_reserved=int(reserve), updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if changed != 1:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Статус заказа изменился во время обработки, повторите запрос"
+        )
+    
+    if reserve == reserved:
+        return {}
+    
+    # Подтверждение резервирует товар, отмена возвращает его на склад
+    try:
+        return shift_order_stock(db, order.id, reserve)
+    except InsufficientStock as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Недостаточно товара на складе",
+                "shortages": shortages_json(exc.shortages),
+            }
+        )
+
+
 @router.patch("/{order_id}", response_model=OrderRead)
 def update_order(
     order_id: int,
     order_data: OrderUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Обновить заказ (без позиций)."""
     order = db.query(Order).filter(Order.id == order_id).first()
@@ -210,10 +805,33 @@ def update_order(
             )
     
     update_data = order_data.model_dump(exclude_unset=True)
+    
+    # Статус меняется только по графу переходов
+    old_status = order.status
+    new_status = update_data.pop("status", None) or old_status
+    if new_status != old_status:
+        try:
+            check_transition(old_status, new_status)
+        except InvalidTransition as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc)
+            )
+    
     for field, value in update_data.items():
         setattr(order, field, value)
     
+    stock = {}
+    if new_status != old_status:
+        stock = change_order_status(db, order, new_status)
+    
     db.commit()
+    product_catalog.update_stock(stock)
+    if new_status != old_status:
+        # Кеш отчётов по заказам сбрасывают подписчики смены статуса
+        emit_status_changes([StatusChange(order.id, old_status, new_status)])
+    else:
+        report_cache.invalidate("orders")
     db.refresh(order)
     
     return order
@@ -223,7 +841,7 @@ def update_order(
 def delete_order(
     order_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Удалить заказ (только новые без платежей)."""
     order = (
@@ -255,3 +873,4 @@ def delete_order(
     
     db.delete(order)
     db.commit()
+    report_cache.invalidate("orders")
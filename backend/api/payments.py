@@ -3,32 +3,44 @@ API маршруты для работы с платежами.
 CRUD + автоматический пересчёт задолженности.
 """
 
+from collections import deque
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import delete, select, update
 from sqlalchemy.orm import Session
 
 from db.database import get_db
-from core.dependencies import get_current_user
-from models import User, Payment, Order
-from schemas import PaymentCreate, PaymentUpdate, PaymentRead, PaymentList
+from core.cache import report_cache
+from core.dependencies import CurrentUser, get_current_user, get_read_db
+from core.export import export_response
+from core.ledger import POSTING_COLUMNS, PaymentPosting, post_payment, post_payments, repost_payment
+from core.pagination import paginate
+from models import Payment, Order
+from schemas import (
+    PaymentCreate, PaymentUpdate, PaymentRead, PaymentList,
+    PaymentConfirmBulk, PaymentConfirmResult, PaymentConfirmReport
+)
 
 router = APIRouter(prefix="/payments", tags=["Платежи"])
 
+# Длина IN-списков при массовом подтверждении (лимиты параметров драйверов)
+CONFIRM_BATCH_SIZE = 10000
 
-@router.get("", response_model=PaymentList)
-def get_payments(
-    page: int = Query(1, ge=1),
-    per_page: int = Query(20, ge=1, le=100),
-    order_id: Optional[int] = Query(None, description="Фильтр по заказу"),
-    status_filter: Optional[str] = Query(None, alias="status", description="Фильтр по статусу"),
-    payment_type: Optional[str] = Query(None, description="Тип платежа"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+CENT = Decimal("0.01")
+
+# Статусы, из которых платёж больше не проводится
+FINAL_STATUSES = ("completed", "cancelled")
+
+
+def filter_payments(
+    query,
+    order_id: Optional[int],
+    status_filter: Optional[str],
+    payment_type: Optional[str]
 ):
-    """Получить список платежей с пагинацией."""
-    query = db.query(Payment)
-    
+    """Фильтры списка платежей (общие для списка и выгрузки)."""
     if order_id:
         query = query.filter(Payment.order_id == order_id)
     
@@ -38,22 +50,75 @@ def get_payments(
     if payment_type:
         query = query.filter(Payment.payment_type == payment_type)
     
-    total = query.count()
+    return query
+
+
+@router.get("", response_model=PaymentList)
+def get_payments(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    order_id: Optional[int] = Query(None, description="Фильтр по заказу"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Фильтр по статусу"),
+    payment_type: Optional[str] = Query(None, description="Тип платежа"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor)"),
+    include_total: bool = Query(True, description="Считать общее количество записей"),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Получить список платежей с пагинацией.
+    
+    С параметром cursor страница выбирается по ключу (created_at, id).
+    """
+    query = filter_payments(db.query(Payment), order_id, status_filter, payment_type)
+    
+    total = query.count() if include_total else None
     
-    offset = (page - 1) * per_page
-    payments = (
-        query
-        .order_by(Payment.created_at.desc())
-        .offset(offset)
-        .limit(per_page)
-        .all()
+    payments, next_cursor = paginate(
+        query,
+        [Payment.created_at, Payment.id],
+        per_page=per_page,
+        page=page,
+        cursor=cursor,
+        descending=True
     )
     
     return PaymentList(
         items=payments,
         total=total,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/export")
+def export_payments(
+    order_id: Optional[int] = Query(None, description="Фильтр по заказу"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Фильтр по статусу"),
+    payment_type: Optional[str] = Query(None, description="Тип платежа"),
+    fmt: str = Query("csv", alias="format", description="Формат: csv или ndjson"),
+    gzip: bool = Query(False, description="Сжать выгрузку gzip"),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Потоковая выгрузка платежей с теми же фильтрами, что и у списка."""
+    query = filter_payments(
+        db.query(
+            Payment.id, Payment.order_id, Payment.amount, Payment.currency,
+            Payment.payment_type, Payment.status, Payment.payment_method,
+            Payment.payment_date, Payment.notes, Payment.created_at
+        ),
+        order_id,
+        status_filter,
+        payment_type
+    )
+    
+    return export_response(
+        query.order_by(Payment.created_at.desc(), Payment.id.desc()),
+        fmt,
+        "payments",
+        compress=gzip
     )
 
 
@@ -61,7 +126,7 @@ def get_payments(
 def get_payment(
     payment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Получить платёж по ID."""
     payment = db.query(Payment).filter(Payment.id == payment_id).first()
@@ -79,7 +144,7 @@ def get_payment(
 def create_payment(
     payment_data: PaymentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Создать новый платёж.
@@ -106,18 +171,29 @@ def create_payment(
     )
     
     db.add(payment)
+    post_payment(db, PaymentPosting.of(payment))
     db.commit()
+    report_cache.invalidate("payments")
     db.refresh(payment)
     
     return payment
 
 
+def confirm_error(payment_status: str) -> Optional[str]:
+    """Почему платёж нельзя провести (None — можно)."""
+    if payment_status == "completed":
+        return "Платёж уже проведён"
+    if payment_status == "cancelled":
+        return "Нельзя провести отменённый платёж"
+    return None
+
+
 @router.patch("/{payment_id}", response_model=PaymentRead)
 def update_payment(
     payment_id: int,
     payment_data: PaymentUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Обновить платёж."""
     payment = db.query(Payment).filter(Payment.id == payment_id).first()
@@ -137,11 +213,29 @@ def update_payment(
                 detail="Нельзя изменять проведённый платёж"
             )
     
-    update_data = payment_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(payment, field, value)
+    posting_before = PaymentPosting.of(payment)
+    
+    # Сравниваем и меняем статус одним UPDATE: если платёж успели провести
+    # или отменить параллельно, строка не обновится и проводки не будет
+    row = db.execute(
+        update(Payment)
+        .where(Payment.id == payment_id, Payment.status == posting_before.status)
+        .values(**payment_data.model_dump(exclude_unset=True), updated_at=datetime.utcnow())
+        .returning(*POSTING_COLUMNS)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Платёж изменён другим запросом, повторите"
+        )
+    
+    # Отмена проведённого платежа уменьшает оплату заказа и выручку дня
+    repost_payment(db, posting_before, PaymentPosting.of(row))
     
     db.commit()
+    report_cache.invalidate("payments")
     db.refresh(payment)
     
     return payment
@@ -151,7 +245,7 @@ def update_payment(
 def confirm_payment(
     payment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Подтвердить (провести) платёж.
@@ -165,30 +259,159 @@ def confirm_payment(
             detail="Платёж не найден"
         )
     
-    if payment.status == "completed":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Платёж уже проведён"
-        )
+    error = confirm_error(payment.status)
+    if error is None:
+        # Проводим только если статус не сменился с момента чтения:
+        # из параллельных подтверждений строку обновит одно
+        row = db.execute(
+            update(Payment)
+            .where(Payment.id == payment_id, Payment.status.notin_(FINAL_STATUSES))
+            .values(status="completed")
+            .returning(*POSTING_COLUMNS)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if row is None:
+            db.rollback()
+            db.refresh(payment)
+            error = confirm_error(payment.status) or "Платёж изменён другим запросом, повторите"
     
-    if payment.status == "cancelled":
+    if error is not None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Нельзя провести отменённый платёж"
+            detail=error
         )
     
-    payment.status = "completed"
+    post_payment(db, PaymentPosting.of(row))
     db.commit()
+    report_cache.invalidate("payments")
     db.refresh(payment)
     
     return payment
 
 
+def batches(items: list, size: int = CONFIRM_BATCH_SIZE):
+    """Режем список на части для IN-запросов."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@router.post("/confirm-bulk", response_model=PaymentConfirmReport)
+def confirm_payments_bulk(
+    data: PaymentConfirmBulk,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Подтвердить много платежей одним запросом (сверка с выпиской банка).
+    
+    Платежи задаются по ID (payment_ids) или строками выписки (lines):
+    номер заказа, сумма и дата. Платежи читаются пачкой, строки выписки
+    сопоставляются в памяти (каждая — с одним ожидающим платежом),
+    статусы меняются одним UPDATE, а оплаты заказов и выручка по дням
+    обновляются в той же транзакции. Ошибки по отдельным строкам
+    попадают в отчёт и не мешают остальным.
+    """
+    columns = (
+        Payment.id, Payment.order_id, Payment.status, Payment.amount,
+        Payment.currency, Payment.payment_date
+    )
+    
+    # Платежи по ID
+    by_id = {}
+    for batch in batches(list(set(data.payment_ids))):
+        for row in db.execute(select(*columns).where(Payment.id.in_(batch))):
+            by_id[row.id] = row
+    
+    # Ожидающие платежи заказов из выписки: (заказ, сумма, день) → платежи
+    candidates: dict[tuple[str, Decimal, date], deque] = {}
+    for batch in batches(list({line.order_number for line in data.lines})):
+        rows = db.execute(
+            select(*columns, Order.order_number)
+            .join(Order, Order.id == Payment.order_id)
+            .where(Order.order_number.in_(batch), Payment.status == "pending")
+            .order_by(Payment.id)
+        )
+        for row in rows:
+            if row.payment_date is None:
+                continue
+            key = (row.order_number, Decimal(row.amount).quantize(CENT), row.payment_date.date())
+            candidates.setdefault(key, deque()).append(row)
+    
+    confirmed = {}
+    results = []
+    
+    for index, payment_id in enumerate(data.payment_ids):
+        row = by_id.get(payment_id)
+        if row is None:
+            error = "Платёж не найден"
+        elif payment_id in confirmed:
+            error = "Платёж уже подтверждён в этом запросе"
+        else:
+            error = confirm_error(row.status)
+        
+        if error is None:
+            confirmed[payment_id] = row
+        results.append(PaymentConfirmResult(
+            source="id", index=index, payment_id=payment_id,
+            status="error" if error else "confirmed", error=error
+        ))
+    
+    for index, line in enumerate(data.lines):
+        queue = candidates.get((line.order_number, line.amount.quantize(CENT), line.payment_date))
+        # Платёж, уже подтверждённый по ID, второй раз не берём
+        while queue and queue[0].id in confirmed:
+            queue.popleft()
+        
+        if not queue:
+            results.append(PaymentConfirmResult(
+                source="line", index=index, status="error",
+                error="Ожидающий платёж с таким заказом, суммой и датой не найден"
+            ))
+            continue
+        
+        row = queue.popleft()
+        confirmed[row.id] = row
+        results.append(PaymentConfirmResult(
+            source="line", index=index, payment_id=row.id, status="confirmed"
+        ))
+    
+    if confirmed:
+        # Условие на статус защищает от параллельного подтверждения или отмены,
+        # а проводим значения, которые вернул сам UPDATE
+        postings = []
+        for batch in batches(list(confirmed)):
+            rows = db.execute(
+                update(Payment)
+                .where(Payment.id.in_(batch), Payment.status.notin_(FINAL_STATUSES))
+                .values(status="completed", updated_at=datetime.utcnow())
+                .returning(*POSTING_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+            postings.extend(PaymentPosting.of(row) for row in rows)
+        
+        if len(postings) != len(confirmed):
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Часть платежей изменилась во время обработки, повторите запрос"
+            )
+        
+        post_payments(db, postings)
+        db.commit()
+        report_cache.invalidate("payments")
+    
+    return PaymentConfirmReport(
+        confirmed=len(confirmed),
+        failed=len(results) - len(confirmed),
+        results=results
+    )
+
+
 @router.delete("/{payment_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_payment(
     payment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Удалить платёж (только ожидающие)."""
     payment = db.query(Payment).filter(Payment.id == payment_id).first()
@@ -205,5 +428,17 @@ def delete_payment(
             detail="Можно удалять только ожидающие платежи"
         )
     
-    db.delete(payment)
+    # Платёж могли провести параллельно — удаляем, только если он ещё ожидает
+    deleted = db.execute(
+        delete(Payment)
+        .where(Payment.id == payment_id, Payment.status == "pending")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not deleted:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Можно удалять только ожидающие платежи"
+        )
     db.commit()
+    report_cache.invalidate("payments")
@@ -8,9 +8,14 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 
 from db.database import get_db
-from core.dependencies import get_current_user
-from models import User, Product
-from schemas import ProductCreate, ProductUpdate, ProductRead, ProductList
+from core.cache import report_cache
+from core.catalog import product_catalog
+from core.dependencies import CurrentUser, get_current_user, get_read_db
+from core.pagination import paginate
+from core.search import PRODUCT_SEARCH, search_condition, search_ranked
+from core.suggest import product_suggest
+from models import Product
+from schemas import ProductCreate, ProductUpdate, ProductRead, ProductList, ProductSuggestion
 
 router = APIRouter(prefix="/products", tags=["Товары"])
 
@@ -22,19 +27,21 @@ def get_products(
     search: Optional[str] = Query(None, description="Поиск по названию или артикулу"),
     category: Optional[str] = Query(None, description="Фильтр по категории"),
     is_active: Optional[int] = Query(None, description="Фильтр по статусу (1/0)"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor)"),
+    include_total: bool = Query(True, description="Считать общее количество записей"),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    """Получить список товаров с пагинацией."""
+    """
+    Получить список товаров с пагинацией.
+    
+    С параметром cursor страница выбирается по ключу (name, id).
+    """
     query = db.query(Product)
     
-    # Поиск по названию или артикулу
+    # Поиск по названию или артикулу (по поисковому индексу)
     if search:
-        pattern = f"%{search}%"
-        query = query.filter(
-            (Product.name.ilike(pattern)) | 
-            (Product.sku.ilike(pattern))
-        )
+        query = query.filter(search_condition(db.get_bind(), Product, PRODUCT_SEARCH, search))
     
     # Фильтр по категории
     if category:
@@ -44,24 +51,55 @@ def get_products(
     if is_active is not None:
         query = query.filter(Product.is_active == is_active)
     
-    total = query.count()
+    total = query.count() if include_total else None
     
-    offset = (page - 1) * per_page
-    products = query.order_by(Product.name).offset(offset).limit(per_page).all()
+    products, next_cursor = paginate(
+        query,
+        [Product.name, Product.id],
+        per_page=per_page,
+        page=page,
+        cursor=cursor
+    )
     
     return ProductList(
         items=products,
         total=total,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        next_cursor=next_cursor
     )
 
 
+@router.get("/search", response_model=list[ProductRead])
+def search_products(
+    q: str = Query(..., min_length=1, description="Строка поиска по названию или артикулу"),
+    limit: int = Query(20, ge=1, le=100, description="Сколько результатов вернуть"),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Поиск товаров по релевантности (слова запроса — начала слов)."""
+    return search_ranked(db, Product, PRODUCT_SEARCH, q, limit)
+
+
+@router.get("/suggest", response_model=list[ProductSuggestion])
+def suggest_products(
+    q: str = Query(..., min_length=1, description="Начало названия или артикула"),
+    limit: int = Query(10, ge=1, le=50, description="Сколько подсказок вернуть"),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Подсказки при выборе товара (только активные), из индекса в памяти."""
+    suggestions = product_suggest.suggest(q, limit)
+    if suggestions is None:
+        return product_suggest.query_db(db, q, limit)
+    return suggestions
+
+
 @router.get("/{product_id}", response_model=ProductRead)
 def get_product(
     product_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Получить товар по ID."""
     product = db.query(Product).filter(Product.id == product_id).first()
@@ -79,7 +117,7 @@ def get_product(
 def create_product(
     product_data: ProductCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Создать новый товар."""
     # Проверяем уникальность артикула, если указан
@@ -95,7 +133,11 @@ def create_product(
     
     db.add(product)
     db.commit()
+    report_cache.invalidate("products")
     db.refresh(product)
+    product_catalog.upsert(product)
+    if product.is_active:
+        product_suggest.upsert(product)
     
     return product
 
@@ -105,7 +147,7 @@ def update_product(
     product_id: int,
     product_data: ProductUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Обновить товар."""
     product = db.query(Product).filter(Product.id == product_id).first()
@@ -133,7 +175,13 @@ def update_product(
         setattr(product, field, value)
     
     db.commit()
+    report_cache.invalidate("products")
     db.refresh(product)
+    product_catalog.upsert(product)
+    if product.is_active:
+        product_suggest.upsert(product)
+    else:
+        product_suggest.remove(product.id)
     
     return product
 
@@ -142,7 +190,7 @@ def update_product(
 def delete_product(
     product_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Удалить товар (или перевести в архив)."""
     product = db.query(Product).filter(Product.id == product_id).first()
@@ -156,3 +204,6 @@ def delete_product(
     # Вместо удаления переводим в архив
     product.is_active = 0
     db.commit()
+    report_cache.invalidate("products")
+    product_catalog.upsert(product)
+    product_suggest.remove(product_id)
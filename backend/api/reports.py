@@ -3,16 +3,16 @@ API маршруты для аналитических отчётов.
 Сводные данные по финансам, клиентам и заказам.
 """
 
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Optional
 from decimal import Decimal
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func, case
 
-from db.database import get_db
-from core.dependencies import get_current_user
-from models import User, Order, Payment, Client, Product
+from core.cache import report_cache
+from core.dependencies import CurrentUser, get_current_user, get_read_db
+from models import Order, Client, Product, DailyRevenue
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/reports", tags=["Отчёты"])
@@ -52,108 +52,95 @@ class DebtReport(BaseModel):
     orders_count: int
 
 
-# --- Эндпоинты ---
+# --- Построение отчётов ---
 
-@router.get("/summary", response_model=SummaryReport)
-def get_summary(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """
-    Общая сводка по системе.
-    Количество заказов, выручка, задолженность, клиенты и товары.
-    """
-    # Считаем заказы
-    total_orders = db.query(func.count(Order.id)).scalar() or 0
-    
-    # Считаем выручку (сумма проведённых платежей)
-    total_revenue = (
-        db.query(func.sum(Payment.amount))
-        .filter(Payment.status == "completed")
-        .scalar()
-    ) or 0
+def build_summary(db: Session) -> SummaryReport:
+    """Сводка одним запросом: заказы, выручка, задолженность, клиенты, товары."""
+    # Заказы, выручка и задолженность — по сохранённым в заказах суммам оплат
+    orders_stats = db.query(
+        func.count(Order.id).label("orders"),
+        func.coalesce(func.sum(Order.paid_amount), 0).label("revenue"),
+        func.coalesce(func.sum(Order.debt_amount), 0).label("debt")
+    ).subquery()
     
-    # Считаем общую задолженность
-    # Сумма заказов минус сумма проведённых платежей
-    orders_total = db.query(func.sum(Order.total_amount)).scalar() or 0
-    total_debt = float(orders_total) - float(total_revenue)
-    
-    # Количество клиентов и товаров
-    total_clients = db.query(func.count(Client.id)).scalar() or 0
-    total_products = (
+    # Количество клиентов и активных товаров — скалярными подзапросами
+    clients_count = db.query(func.count(Client.id)).scalar_subquery()
+    products_count = (
         db.query(func.count(Product.id))
         .filter(Product.is_active == 1)
-        .scalar()
-    ) or 0
+        .scalar_subquery()
+    )
+    
+    row = db.query(
+        orders_stats.c.orders,
+        orders_stats.c.revenue,
+        orders_stats.c.debt,
+        clients_count.label("clients"),
+        products_count.label("products")
+    ).one()
     
     return SummaryReport(
-        total_orders=total_orders,
-        total_revenue=float(total_revenue),
-        total_debt=max(0, total_debt),  # Не показываем отрицательную задолженность
-        total_clients=total_clients,
-        total_products=total_products
+        total_orders=row.orders or 0,
+        total_revenue=float(row.revenue),
+        total_debt=max(0, float(row.debt)),  # Не показываем отрицательную задолженность
+        total_clients=row.clients or 0,
+        total_products=row.products or 0
     )
 
 
-@router.get("/revenue-by-period", response_model=list[RevenueByPeriod])
-def get_revenue_by_period(
-    days: int = Query(30, ge=1, le=365, description="Количество дней"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """
-    Выручка по дням за последние N дней.
-    """
-    start_date = datetime.utcnow() - timedelta(days=days)
+def period_key(day: date, granularity: str) -> str:
+    """Подпись периода: день, понедельник недели или месяц."""
+    if granularity == "week":
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if granularity == "month":
+        return day.strftime("%Y-%m")
+    return day.isoformat()
+
+
+def build_revenue_by_period(db: Session, days: int, granularity: str) -> list[RevenueByPeriod]:
+    """Выручка по периодам из таблицы daily_revenue."""
+    start_date = (datetime.utcnow() - timedelta(days=days)).date()
     
-    # Группируем платежи по дням
+    # Выручка по дням, все валюты вместе
     results = (
         db.query(
-            func.date(Payment.payment_date).label("period"),
-            func.sum(Payment.amount).label("revenue"),
-            func.count(Payment.id).label("count")
+            DailyRevenue.day,
+            func.sum(DailyRevenue.revenue).label("revenue"),
+            func.sum(DailyRevenue.payments_count).label("count")
         )
         .filter(
-            Payment.status == "completed",
-            Payment.payment_date >= start_date
+            DailyRevenue.day >= start_date,
+            DailyRevenue.payments_count > 0
         )
-        .group_by(func.date(Payment.payment_date))
-        .order_by(func.date(Payment.payment_date))
+        .group_by(DailyRevenue.day)
+        .order_by(DailyRevenue.day)
         .all()
     )
     
-    return [
-        RevenueByPeriod(
-            period=str(r.period),
-            revenue=float(r.revenue),
-            orders_count=r.count
-        )
-        for r in results
-    ]
+    # Собираем дни в недели или месяцы
+    periods: dict[str, RevenueByPeriod] = {}
+    for r in results:
+        key = period_key(r.day, granularity)
+        period = periods.setdefault(key, RevenueByPeriod(period=key, revenue=0, orders_count=0))
+        period.revenue += float(r.revenue or 0)
+        period.orders_count += int(r.count or 0)
+    
+    return list(periods.values())
 
 
-@router.get("/top-clients", response_model=list[TopClient])
-def get_top_clients(
-    limit: int = Query(10, ge=1, le=50, description="Количество клиентов"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """
-    Топ клиентов по выручке.
-    """
-    # Суммируем платежи по клиентам через связь с заказами
+def build_top_clients(db: Session, limit: int) -> list[TopClient]:
+    """Топ клиентов по сумме оплат их заказов."""
     results = (
         db.query(
             Client.id,
             Client.name,
-            func.sum(Payment.amount).label("revenue"),
-            func.count(func.distinct(Order.id)).label("orders")
+            func.sum(Order.paid_amount).label("revenue"),
+            func.count(Order.id).label("orders")
         )
         .join(Order, Order.client_id == Client.id)
-        .join(Payment, Payment.order_id == Order.id)
-        .filter(Payment.status == "completed")
+        .filter(Order.paid_amount > 0)
         .group_by(Client.id, Client.name)
-        .order_by(func.sum(Payment.amount).desc())
+        .order_by(func.sum(Order.paid_amount).desc())
         .limit(limit)
         .all()
     )
@@ -169,40 +156,19 @@ def get_top_clients(
     ]
 
 
-@router.get("/debts", response_model=list[DebtReport])
-def get_debts(
-    min_debt: float = Query(0, ge=0, description="Минимальная сумма задолженности"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """
-    Клиенты с задолженностью.
-    Показываем только тех, у кого задолженность больше указанного порога.
-    """
-    # Подзапрос для суммы платежей по заказу
-    paid_subq = (
-        db.query(
-            Payment.order_id,
-            func.sum(Payment.amount).label("paid")
-        )
-        .filter(Payment.status == "completed")
-        .group_by(Payment.order_id)
-        .subquery()
-    )
-    
-    # Считаем задолженность по клиентам
+def build_debts(db: Session, min_debt: float) -> list[DebtReport]:
+    """Задолженность по клиентам из сохранённых сумм заказов."""
     results = (
         db.query(
             Client.id,
             Client.name,
-            func.sum(Order.total_amount - func.coalesce(paid_subq.c.paid, 0)).label("debt"),
+            func.sum(Order.debt_amount).label("debt"),
             func.count(Order.id).label("orders")
         )
         .join(Order, Order.client_id == Client.id)
-        .outerjoin(paid_subq, paid_subq.c.order_id == Order.id)
         .group_by(Client.id, Client.name)
-        .having(func.sum(Order.total_amount - func.coalesce(paid_subq.c.paid, 0)) > min_debt)
-        .order_by(func.sum(Order.total_amount - func.coalesce(paid_subq.c.paid, 0)).desc())
+        .having(func.sum(Order.debt_amount) > min_debt)
+        .order_by(func.sum(Order.debt_amount).desc())
         .all()
     )
     
@@ -215,3 +181,103 @@ def get_debts(
         )
         for r in results
     ]
+
+
+def cached_report(
+    response: Response,
+    name: str,
+    params: dict,
+    depends_on: tuple[str, ...],
+    build: Callable[[], Any]
+):
+    """Отдаём отчёт из кеша или строим; заголовок X-Cache показывает, откуда он."""
+    value, hit = report_cache.get_or_build(name, params, depends_on, build)
+    response.headers["X-Cache"] = "HIT" if hit else "MISS"
+    return value
+
+
+# --- Эндпоинты ---
+
+@router.get("/summary", response_model=SummaryReport)
+def get_summary(
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Общая сводка по системе.
+    Количество заказов, выручка, задолженность, клиенты и товары.
+    """
+    return cached_report(
+        response, "summary", {},
+        ("orders", "payments", "clients", "products"),
+        lambda: build_summary(db)
+    )
+
+
+@router.get("/revenue-by-period", response_model=list[RevenueByPeriod])
+def get_revenue_by_period(
+    response: Response,
+    days: int = Query(30, ge=1, le=365, description="Количество дней"),
+    granularity: str = Query("day", pattern="^(day|week|month)$", description="day, week или month"),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Выручка за последние N дней по дням, неделям или месяцам.
+    
+    Читаем готовую таблицу daily_revenue (не больше 365 строк на валюту)
+    вместо группировки всех платежей.
+    """
+    return cached_report(
+        response, "revenue-by-period",
+        # День входит в ключ: окно «последние N дней» сдвигается в полночь
+        {"days": days, "granularity": granularity, "today": datetime.utcnow().date()},
+        ("payments",),
+        lambda: build_revenue_by_period(db, days, granularity)
+    )
+
+
+@router.get("/top-clients", response_model=list[TopClient])
+def get_top_clients(
+    response: Response,
+    limit: int = Query(10, ge=1, le=50, description="Количество клиентов"),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Топ клиентов по выручке.
+    """
+    return cached_report(
+        response, "top-clients", {"limit": limit},
+        ("orders", "payments", "clients"),
+        lambda: build_top_clients(db, limit)
+    )
+
+
+@router.get("/debts", response_model=list[DebtReport])
+def get_debts(
+    response: Response,
+    min_debt: float = Query(0, ge=0, description="Минимальная сумма задолженности"),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Клиенты с задолженностью.
+    Показываем только тех, у кого задолженность больше указанного порога.
+    """
+    return cached_report(
+        response, "debts", {"min_debt": min_debt},
+        ("orders", "payments", "clients"),
+        lambda: build_debts(db, min_debt)
+    )
+
+
+@router.get("/cache-stats")
+def get_cache_stats(current_user: CurrentUser = Depends(get_current_user)):
+    """Попадания и промахи кеша отчётов в этом воркере."""
+    return {
+        "backend": type(report_cache.backend).__name__,
+        "enabled": report_cache.enabled,
+        "reports": report_cache.stats()
+    }
@@ -0,0 +1,8 @@
+"""
+Нагрузочные замеры.
+
+Скрипты поднимают приложение (uvicorn) на временной SQLite-базе или
+работают с ней напрямую и печатают результат в консоль. Запуск из
+каталога backend:
+    python -m bench.<скрипт> --help
+"""
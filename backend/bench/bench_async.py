@@ -0,0 +1,49 @@
+"""
+Синхронные и асинхронные маршруты (ASYNC_DB) под 500 одновременных клиентов.
+
+Смешанная нагрузка: список заказов, сводный отчёт и создание заказа
+по очереди. Для каждого сочетания ASYNC_DB и хранилища кеша отчётов
+сервер поднимается заново на пустой базе.
+
+    python -m bench.bench_async
+    python -m bench.bench_async --requests 3000 --cache memory
+"""
+
+import argparse
+import asyncio
+
+from .common import create_order_fixture, format_result, measure, running_server
+
+
+async def mixed_workload(async_db: bool, cache: str, requests: int, concurrency: int) -> dict:
+    env = {"ASYNC_DB": str(async_db).lower(), "REPORTS_CACHE_BACKEND": cache}
+    async with running_server(**env) as client:
+        order = await create_order_fixture(client)
+        for _ in range(50):
+            await client.post("/api/orders", json=order)
+        
+        def call(i: int):
+            if i % 3 == 0:
+                return client.get("/api/orders", params={"include_total": "false"})
+            if i % 3 == 1:
+                return client.get("/api/reports/summary")
+            return client.post("/api/orders", json=order)
+        
+        return await measure(requests, concurrency, call)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1500)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--cache", choices=["memory", "database"], action="append")
+    args = parser.parse_args()
+    
+    for cache in args.cache or ["memory", "database"]:
+        for async_db in (False, True):
+            result = asyncio.run(mixed_workload(async_db, cache, args.requests, args.concurrency))
+            print(format_result(f"ASYNC_DB={str(async_db).lower()} кеш={cache}", result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Каталог товаров в памяти против ORM-объектов Product.
+
+Временная SQLite-база заполняется rows товарами. Замеряется:
+    - память снимка каталога и тех же товаров ORM-объектами (tracemalloc);
+    - проверка позиций заказа (lines товаров): lookup по снимку
+      и запрос ORM-объектов по IN.
+    
+    python -m bench.bench_catalog
+    python -m bench.bench_catalog --rows 200000 --lines 50
+"""
+
+import os
+import tempfile
+
+# Настройки читаются при импорте приложения — базу задаём до него
+_data_dir = tempfile.mkdtemp(prefix="erp-lite-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_data_dir}/catalog.db"
+os.environ["DEBUG"] = "false"
+
+import argparse
+import gc
+import random
+import shutil
+import time
+import tracemalloc
+
+from sqlalchemy import insert
+
+from core.catalog import ProductCatalog
+from db.database import Base, SessionLocal, engine
+from db.migrations import seed_catalog_version
+from models import Product
+
+
+def fill(rows: int) -> None:
+    with engine.begin() as conn:
+        seed_catalog_version(conn)
+        for start in range(0, rows, 10_000):
+            conn.execute(insert(Product), [
+                {
+                    "name": f"Товар {i}", "sku": f"SKU-{i}", "price": 100 + i % 1000,
+                    "currency": "KZT", "stock_quantity": i % 500, "is_active": True,
+                }
+                for i in range(start, min(start + 10_000, rows))
+            ])
+
+
+def allocated_mb(load) -> tuple[object, float]:
+    """Результат load() и сколько памяти он удерживает, МиБ."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = load()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size / 2**20
+
+
+def per_call_us(call, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+    
+    try:
+        Base.metadata.create_all(engine)
+        fill(args.rows)
+        
+        catalog = ProductCatalog(enabled=True, version_check_interval=3600, max_age=3600)
+        _, catalog_mb = allocated_mb(catalog.reload)
+        
+        with SessionLocal() as db:
+            products, orm_mb = allocated_mb(lambda: db.query(Product).all())
+            del products
+        
+        rng = random.Random(42)
+        ids = [rng.randint(1, args.rows) for _ in range(args.lines)]
+        with SessionLocal() as db:
+            catalog_us = per_call_us(lambda: catalog.lookup(db, ids), args.repeat)
+            
+            def orm_lookup():
+                db.query(Product).filter(Product.id.in_(ids)).all()
+                db.expunge_all()
+            
+            orm_us = per_call_us(orm_lookup, args.repeat)
+        
+        print(f"товаров: {args.rows}")
+        print(f"память: каталог {catalog_mb:.1f} МиБ, ORM-объекты {orm_mb:.1f} МиБ "
+              f"({orm_mb / catalog_mb:.0f}x)")
+        print(f"проверка {args.lines} позиций: каталог {catalog_us:.0f} мкс, "
+              f"ORM по IN {orm_us:.0f} мкс ({orm_us / catalog_us:.0f}x)")
+    finally:
+        engine.dispose()
+        shutil.rmtree(_data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Список заказов при 10 / 100 / 1000 позициях в заказе.
+
+Временная SQLite-база заполняется напрямую (по orders заказов на
+каждый размер), затем GET /api/orders?client_id=... выполняется
+repeat раз через TestClient. Печатаются медиана задержки и число
+SQL-запросов на страницу: COUNT по orders, страница id и один
+selectin-запрос позиций.
+
+    python -m bench.bench_order_list
+    python -m bench.bench_order_list --orders 200 --per-page 50
+"""
+
+import os
+import tempfile
+
+# Настройки читаются при импорте приложения — базу задаём до него
+_data_dir = tempfile.mkdtemp(prefix="erp-lite-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_data_dir}/orders.db"
+os.environ["DEBUG"] = "false"
+
+import argparse
+import shutil
+import statistics
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+from db.database import engine
+from main import app
+from models import Client, Order, OrderItem, Product
+
+ITEM_COUNTS = (10, 100, 1000)
+
+
+def fill(orders: int, items: int) -> int:
+    """Клиент с orders заказами по items позиций; возвращает id клиента."""
+    with engine.begin() as conn:
+        client_id = conn.execute(
+            insert(Client).values(name=f"Клиент {items}").returning(Client.id)
+        ).scalar()
+        product_id = conn.execute(
+            insert(Product).values(name="Товар", price=10).returning(Product.id)
+        ).scalar()
+        order_ids = conn.execute(
+            insert(Order).returning(Order.id),
+            [
+                {
+                    "order_number": f"B{items}-{i:06d}", "client_id": client_id,
+                    "total_amount": 10 * items, "debt_amount": 10 * items,
+                }
+                for i in range(orders)
+            ]
+        ).scalars().all()
+        conn.execute(insert(OrderItem), [
+            {
+                "order_id": order_id, "product_id": product_id,
+                "quantity": 1, "unit_price": 10, "line_total": 10,
+            }
+            for order_id in order_ids
+            for _ in range(items)
+        ])
+    return client_id
+
+
+def login(client: TestClient) -> dict:
+    credentials = {"email": "bench@example.kz", "password": "secret1"}
+    client.post("/api/auth/register", json=credentials)
+    response = client.post(
+        "/api/auth/login",
+        data={"username": credentials["email"], "password": credentials["password"]}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    statements = []
+    event.listen(
+        engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *rest: statements.append(statement)
+    )
+    
+    try:
+        with TestClient(app) as client:
+            headers = login(client)
+            for items in ITEM_COUNTS:
+                client_id = fill(args.orders, items)
+                params = {"client_id": client_id, "per_page": args.per_page}
+                client.get("/api/orders", params=params, headers=headers).raise_for_status()
+                
+                timings = []
+                for _ in range(args.repeat):
+                    statements.clear()
+                    started = time.perf_counter()
+                    client.get("/api/orders", params=params, headers=headers).raise_for_status()
+                    timings.append((time.perf_counter() - started) * 1000)
+                
+                print(
+                    f"{items:5d} позиций в заказе: {statistics.median(timings):8.1f} мс "
+                    f"на страницу из {args.per_page}, SQL-запросов {len(statements)}"
+                )
+    finally:
+        engine.dispose()
+        shutil.rmtree(_data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
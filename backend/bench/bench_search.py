@@ -0,0 +1,85 @@
+"""
+Поиск клиентов: ILIKE без индекса против FTS5 (миграция 0002) на SQLite.
+
+База заполняется rows клиентами, затем одни и те же запросы
+search_ranked выполняются до и после построения поискового индекса.
+
+    python -m bench.bench_search
+    python -m bench.bench_search --rows 200000 --repeat 50
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from core.search import CLIENT_SEARCH, forget_index_checks, has_fts, search_ranked
+from db.database import Base
+from db.migrations import search_indexes
+from models import Client, Product
+
+WORDS = [
+    "Алматы", "Астана", "Строй", "Торг", "Сервис", "Логистик", "Агро", "Мед",
+    "Тех", "Снаб", "Трейд", "Инвест", "Групп", "Маркет", "Экспорт", "Нефть",
+]
+QUERIES = ["строй", "агро мед", "трейд", "нефть групп", "ооо"]
+
+
+def fill(engine, rows: int) -> None:
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        for start in range(0, rows, 10_000):
+            conn.execute(insert(Client), [
+                {
+                    "name": f"{rng.choice(WORDS)}{rng.choice(WORDS).lower()} {i}",
+                    "company": f"ТОО {rng.choice(WORDS)} {rng.choice(WORDS)}",
+                }
+                for i in range(start, min(start + 10_000, rows))
+            ])
+
+
+def run_queries(engine, repeat: int) -> float:
+    """Среднее время одного поиска, мс."""
+    started = time.perf_counter()
+    with Session(engine) as db:
+        for _ in range(repeat):
+            for query in QUERIES:
+                search_ranked(db, Client, CLIENT_SEARCH, query, 20)
+    return (time.perf_counter() - started) / (repeat * len(QUERIES)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    data_dir = tempfile.mkdtemp(prefix="erp-lite-bench-")
+    engine = create_engine(f"sqlite:///{data_dir}/search.db")
+    try:
+        Base.metadata.create_all(engine, tables=[Client.__table__, Product.__table__])
+        fill(engine, args.rows)
+        
+        assert not has_fts(engine, CLIENT_SEARCH)
+        ilike_ms = run_queries(engine, args.repeat)
+        
+        with engine.begin() as conn:
+            search_indexes(conn)
+        forget_index_checks()
+        assert has_fts(engine, CLIENT_SEARCH)
+        fts_ms = run_queries(engine, args.repeat)
+        
+        print(f"клиентов: {args.rows}, запросов: {args.repeat * len(QUERIES)}")
+        print(f"ILIKE без индекса: {ilike_ms:8.2f} мс на запрос")
+        print(f"FTS5:              {fts_ms:8.2f} мс на запрос ({ilike_ms / fts_ms:.1f}x)")
+    finally:
+        engine.dispose()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+SQLite под параллельной записью из нескольких процессов: с профилем
+(WAL, busy_timeout, один писатель) и без него.
+
+Как несколько воркеров uvicorn на одном файле БД: processes процессов,
+в каждом writers потоков пишут заказы с позициями через SessionLocal
+приложения, а readers потоков считают сумму позиций. Печатается число
+записанных заказов и ошибок «database is locked»; с профилем ошибок
+быть не должно.
+
+    python -m bench.bench_sqlite
+    python -m bench.bench_sqlite --processes 4 --writes 100
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+PROFILES = {
+    "без профиля (rollback journal)": {"SQLITE_WAL": "false"},
+    "профиль SQLite": {"SQLITE_WAL": "true", "SQLITE_SINGLE_WRITER": "true"},
+}
+
+
+def configure(url: str, env: dict) -> None:
+    """Настройки читаются при импорте приложения — задаём их до него."""
+    os.environ.update(env, DATABASE_URL=url, DEBUG="false")
+
+
+def prepare(url: str, env: dict) -> None:
+    """Схема, клиент и товар для заказов."""
+    configure(url, env)
+    from db.database import SessionLocal, init_db
+    from models import Client, Product
+    
+    init_db()
+    with SessionLocal() as db:
+        db.add_all([Client(name="Нагрузочный клиент"), Product(name="Нагрузочный товар", price=1)])
+        db.commit()
+
+
+def worker(url: str, env: dict, args, results) -> None:
+    """Один процесс: потоки-писатели и потоки-читатели."""
+    configure(url, env)
+    from sqlalchemy import func, insert, select
+    from sqlalchemy.exc import OperationalError
+    from db.database import SessionLocal
+    from models import Client, Order, OrderItem, Product
+    
+    counts = {"orders": 0, "locked": 0}
+    lock = threading.Lock()
+    
+    def count(key: str) -> None:
+        with lock:
+            counts[key] += 1
+    
+    def write(thread: int) -> None:
+        for i in range(args.writes):
+            with SessionLocal() as db:
+                try:
+                    client_id = db.scalar(select(Client.id))
+                    product_id = db.scalar(select(Product.id))
+                    order = Order(
+                        order_number=f"B-{os.getpid()}-{thread}-{i}",
+                        client_id=client_id, total_amount=args.items, debt_amount=args.items,
+                    )
+                    db.add(order)
+                    db.flush()
+                    db.execute(insert(OrderItem), [{
+                        "order_id": order.id, "product_id": product_id,
+                        "quantity": 1, "unit_price": 1, "line_total": 1,
+                    }] * args.items)
+                    db.commit()
+                    count("orders")
+                except OperationalError:
+                    db.rollback()
+                    count("locked")
+    
+    def read() -> None:
+        for _ in range(args.writes):
+            with SessionLocal() as db:
+                try:
+                    db.execute(select(func.count(OrderItem.id), func.sum(OrderItem.line_total))).one()
+                except OperationalError:
+                    count("locked")
+    
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(args.writers)]
+    threads += [threading.Thread(target=read) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(counts)
+
+
+def run(label: str, env: dict, args) -> int:
+    """Прогон одного профиля; возвращает число ошибок блокировки."""
+    data_dir = tempfile.mkdtemp(prefix="erp-lite-bench-")
+    url = f"sqlite:///{data_dir}/bench.db"
+    # spawn: каждый процесс заново импортирует приложение со своими настройками
+    context = multiprocessing.get_context("spawn")
+    try:
+        process = context.Process(target=prepare, args=(url, env))
+        process.start()
+        process.join()
+        
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(url, env, args, results))
+            for _ in range(args.processes)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        counts = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    
+    orders = sum(c["orders"] for c in counts)
+    locked = sum(c["locked"] for c in counts)
+    print(
+        f"{label:<32} записано {orders:5d} из {args.processes * args.writers * args.writes}"
+        f"  «database is locked» {locked:4d}  {elapsed:5.1f} с"
+    )
+    return locked
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=12, help="потоков-писателей в процессе")
+    parser.add_argument("--readers", type=int, default=4, help="потоков-читателей в процессе")
+    parser.add_argument("--writes", type=int, default=40, help="заказов на поток")
+    parser.add_argument("--items", type=int, default=20, help="позиций в заказе")
+    args = parser.parse_args()
+    
+    locked = {label: run(label, env, args) for label, env in PROFILES.items()}
+    if locked["профиль SQLite"]:
+        raise SystemExit("С профилем SQLite остались ошибки блокировки")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Резерв товара под конкуренцией: 50 параллельных подтверждений одного SKU.
+
+Создаётся товар с остатком stock и orders заказов по одной штуке;
+все заказы подтверждаются (PATCH status=confirmed) не больше чем
+concurrency запросами одновременно. Подтвердиться должно ровно stock
+заказов, остальные — получить 409 «Недостаточно товара», остаток — 0.
+
+    python -m bench.bench_stock
+    python -m bench.bench_stock --orders 1000 --stock 500 --async-db
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+
+from .common import create_order_fixture, format_result, measure, running_server
+
+
+async def contention(args) -> None:
+    async with running_server(ASYNC_DB=str(args.async_db).lower()) as client:
+        order = await create_order_fixture(client, stock=str(args.stock))
+        product_id = order["items"][0]["product_id"]
+        order_ids = []
+        for _ in range(args.orders):
+            response = await client.post("/api/orders", json=order)
+            response.raise_for_status()
+            order_ids.append(response.json()["id"])
+        
+        codes = Counter()
+        
+        async def confirm(i: int):
+            response = await client.patch(f"/api/orders/{order_ids[i]}", json={"status": "confirmed"})
+            codes[response.status_code] += 1
+            return response
+        
+        result = await measure(len(order_ids), args.concurrency, confirm)
+        stock = (await client.get(f"/api/products/{product_id}")).json()["stock_quantity"]
+    
+    print(format_result(f"{args.concurrency} писателей, {args.orders} заказов", result))
+    print(f"подтверждено {codes[200]}, отказов 409: {codes[409]}, прочее: "
+          f"{sum(count for code, count in codes.items() if code not in (200, 409))}; "
+          f"остаток {float(stock):g} из {args.stock}")
+    if codes[200] != min(args.stock, args.orders) or float(stock) != max(args.stock - args.orders, 0):
+        raise SystemExit("Остаток разошёлся с подтверждёнными заказами")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=150)
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--async-db", action="store_true")
+    asyncio.run(contention(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
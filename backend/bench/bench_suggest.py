@@ -0,0 +1,89 @@
+"""
+Подсказки товаров: префиксный индекс в памяти против поиска через БД.
+
+Временная SQLite-база заполняется rows товарами; для одних и тех же
+префиксов замеряется PrefixIndex.suggest и запасной путь query_db
+(FTS5 после миграции 0002), а также память индекса.
+
+    python -m bench.bench_suggest
+    python -m bench.bench_suggest --rows 200000
+"""
+
+import os
+import tempfile
+
+# Настройки читаются при импорте приложения — базу задаём до него
+_data_dir = tempfile.mkdtemp(prefix="erp-lite-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_data_dir}/suggest.db"
+os.environ["DEBUG"] = "false"
+
+import argparse
+import random
+import shutil
+import time
+
+from sqlalchemy import insert
+
+from core.suggest import create_suggest_indexes
+from db.database import Base, SessionLocal, engine
+from db.migrations import search_indexes
+from models import Product
+
+WORDS = ["Цемент", "Кирпич", "Арматура", "Плитка", "Краска", "Труба", "Кабель", "Гипс"]
+PREFIXES = ["ц", "цем", "кир", "арм", "пли", "кра", "тру", "каб", "гип", "sku-1"]
+
+
+def fill(rows: int) -> None:
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        for start in range(0, rows, 10_000):
+            conn.execute(insert(Product), [
+                {
+                    "name": f"{rng.choice(WORDS)} {rng.choice(WORDS).lower()} М{i % 500}",
+                    "sku": f"SKU-{i}", "price": 100, "unit": "шт", "is_active": True,
+                }
+                for i in range(start, min(start + 10_000, rows))
+            ])
+
+
+def per_call_ms(call, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for prefix in PREFIXES:
+            call(prefix)
+    return (time.perf_counter() - started) / (repeat * len(PREFIXES)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    
+    try:
+        Base.metadata.create_all(engine)
+        fill(args.rows)
+        with engine.begin() as conn:
+            search_indexes(conn)
+        
+        _, index = create_suggest_indexes()
+        started = time.perf_counter()
+        index.load()
+        load_s = time.perf_counter() - started
+        
+        memory_ms = per_call_ms(lambda prefix: index.suggest(prefix, 10), args.repeat)
+        with SessionLocal() as db:
+            db_ms = per_call_ms(lambda prefix: index.query_db(db, prefix, 10), args.repeat)
+        
+        stats = index.stats()
+        print(f"товаров: {args.rows}, ключей: {stats['keys']}, память индекса: {stats['memory_mb']} МиБ")
+        print(f"загрузка индекса: {load_s:.2f} с")
+        print(f"индекс в памяти: {memory_ms:8.3f} мс на подсказку")
+        print(f"поиск через БД:  {db_ms:8.3f} мс на подсказку ({db_ms / memory_ms:.0f}x)")
+    finally:
+        engine.dispose()
+        shutil.rmtree(_data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Общие части замеров: сервер на временной базе, вход и тестовые данные.
+"""
+
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@asynccontextmanager
+async def running_server(port: int = 8765, **env: str) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Запускаем uvicorn с настройками env на временной SQLite-базе.
+    
+    Отдаёт клиент httpx, уже вошедший в систему (заголовок авторизации
+    выставлен).
+    """
+    data_dir = tempfile.mkdtemp(prefix="erp-lite-bench-")
+    server_env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{data_dir}/bench.db",
+        "DEBUG": "false",
+        **env,
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=server_env
+    )
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", timeout=120,
+            limits=httpx.Limits(max_connections=1000)
+        ) as client:
+            await wait_ready(client)
+            await login(client)
+            yield client
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+        await asyncio.sleep(0.2)
+
+
+async def login(client: httpx.AsyncClient, email: str = "bench@example.kz", password: str = "secret1") -> None:
+    await client.post("/api/auth/register", json={"email": email, "password": password})
+    response = await client.post("/api/auth/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+
+async def create_order_fixture(client: httpx.AsyncClient, stock: str = "1000000") -> dict:
+    """Клиент и товар; возвращает тело запроса создания заказа."""
+    customer = (await client.post("/api/clients", json={"name": "Нагрузочный клиент"})).json()
+    product = (await client.post("/api/products", json={
+        "name": "Нагрузочный товар", "sku": f"BENCH-{time.monotonic_ns()}",
+        "price": "1", "stock_quantity": stock
+    })).json()
+    return {
+        "client_id": customer["id"],
+        "items": [{"product_id": product["id"], "quantity": "1", "unit_price": "1"}],
+    }
+
+
+async def measure(
+    requests: int,
+    concurrency: int,
+    call: Callable[[int], Awaitable[httpx.Response]]
+) -> dict:
+    """
+    Выполняем call(i) requests раз, не больше concurrency одновременно.
+    
+    Returns:
+        Пропускная способность, p50 / p99 задержки и ошибки
+    """
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = []
+    
+    async def one(i: int) -> None:
+        async with slots:
+            started = time.perf_counter()
+            try:
+                response = await call(i)
+                if response.status_code >= 400:
+                    errors.append(str(response.status_code))
+            except httpx.HTTPError as exc:
+                errors.append(type(exc).__name__)
+            latencies.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "errors": len(errors),
+        "error_kinds": sorted(set(errors)),
+    }
+
+
+def format_result(label: str, result: dict) -> str:
+    line = (
+        f"{label:<32} {result['rps']:7.0f} req/s  p50 {result['p50_ms']:6.0f} ms  "
+        f"p99 {result['p99_ms']:6.0f} ms  ошибок {result['errors']}"
+    )
+    if result["error_kinds"]:
+        line += f" {result['error_kinds']}"
+    return line
@@ -0,0 +1,297 @@
+"""
+Кеш ответов отчётов.
+
+Отчёты дорогие, а данные меняются редко. Запись кеша живёт не дольше
+reports_cache_ttl секунд, а ключ включает версии данных, от которых
+отчёт зависит (orders, payments, clients, products). Маршруты записи
+увеличивают версию своей области — и старые записи перестают читаться.
+
+Хранилище выбирается настройкой reports_cache_backend:
+    memory   — LRU в памяти процесса (версии тоже локальные);
+    database — таблицы cache_entries / cache_versions, общие для воркеров.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from core.config import get_settings
+from core.order_status import StatusChange, on_status_change
+from db.blocking import blocking
+from db.database import engine, write_engine
+from models import CacheEntry, CacheVersion
+
+logger = logging.getLogger(__name__)
+
+# Области данных, по которым ведутся версии
+CACHE_NAMESPACES = ("orders", "payments", "clients", "products")
+
+
+class TTLCache:
+    """
+    LRU-кеш с временем жизни записей.
+    
+    Потокобезопасен: маршруты FastAPI выполняются в пуле потоков.
+    """
+    
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """
+        Ищем значение в кеше.
+        
+        Returns:
+            (True, значение) при попадании, иначе (False, None)
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return False, None
+            
+            self._data.move_to_end(key)
+            return True, value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Кладём значение; самые старые записи вытесняются.
+        
+        ttl задаёт время жизни этой записи вместо общего.
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def delete(self, key: Hashable) -> None:
+        """Убираем одну запись."""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        """Сбрасываем все записи."""
+        with self._lock:
+            self._data.clear()
+
+
+class MemoryCacheBackend:
+    """Хранилище в памяти процесса: быстрое, но у каждого воркера своё."""
+    
+    def __init__(self, ttl: float, maxsize: int):
+        self._entries = TTLCache(ttl, maxsize)
+        self._versions = dict.fromkeys(CACHE_NAMESPACES, 0)
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> tuple[bool, Any]:
+        return self._entries.get(key)
+    
+    def set(self, key: str, value: Any) -> None:
+        self._entries.set(key, value)
+    
+    def versions(self, namespaces: Iterable[str]) -> tuple[int, ...]:
+        with self._lock:
+            return tuple(self._versions.get(ns, 0) for ns in namespaces)
+    
+    def bump(self, namespaces: Iterable[str]) -> None:
+        with self._lock:
+            for ns in namespaces:
+                self._versions[ns] = self._versions.get(ns, 0) + 1
+
+
+class DatabaseCacheBackend:
+    """
+    Хранилище в БД: один кеш и одни версии на все воркеры.
+    
+    Работает в собственных коротких транзакциях, независимо от сессии
+    запроса, поэтому версии нужно поднимать после коммита данных.
+    Запись и версии меняются одним INSERT ... ON CONFLICT, так что
+    параллельные воркеры не спотыкаются о первичный ключ.
+    Из async-маршрутов запросы уходят в пул потоков (db.blocking).
+    """
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+    
+    @blocking
+    def get(self, key: str) -> tuple[bool, Any]:
+        with engine.connect() as conn:
+            value = conn.execute(
+                select(CacheEntry.value).where(
+                    CacheEntry.key == key,
+                    CacheEntry.expires_at > datetime.utcnow()
+                )
+            ).scalar()
+        if value is None:
+            return False, None
+        return True, json.loads(value)
+    
+    @blocking
+    def set(self, key: str, value: Any) -> None:
+        now = datetime.utcnow()
+        with write_engine.begin() as conn:
+            # Заодно чистим устаревшие записи
+            conn.execute(delete(CacheEntry).where(CacheEntry.expires_at <= now))
+            entry = {
+                "value": json.dumps(value, ensure_ascii=False),
+                "expires_at": now + timedelta(seconds=self.ttl),
+            }
+            upsert(conn, CacheEntry.__table__, {"key": key, **entry}, entry)
+    
+    @blocking
+    def versions(self, namespaces: Iterable[str]) -> tuple[int, ...]:
+        namespaces = tuple(namespaces)
+        with engine.connect() as conn:
+            rows = dict(conn.execute(
+                select(CacheVersion.namespace, CacheVersion.version)
+                .where(CacheVersion.namespace.in_(namespaces))
+            ).all())
+        return tuple(rows.get(ns, 0) for ns in namespaces)
+    
+    @blocking
+    def bump(self, namespaces: Iterable[str]) -> None:
+        with write_engine.begin() as conn:
+            for ns in namespaces:
+                upsert(
+                    conn, CacheVersion.__table__,
+                    {"namespace": ns, "version": 1},
+                    {"version": CacheVersion.version + 1}
+                )
+
+
+def upsert(conn, table, values: dict, on_conflict: dict) -> None:
+    """
+    Вставляем строку values, а если её ключ уже есть — обновляем
+    колонки значениями on_conflict (как в ledger.apply_revenue_delta).
+    """
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (pg_insert if dialect == "postgresql" else sqlite_insert)(table).values(**values)
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns),
+            set_=on_conflict
+        ))
+        return
+    
+    # Прочие СУБД: сначала UPDATE, если строки нет — INSERT
+    key = [column == values[column.name] for column in table.primary_key.columns]
+    result = conn.execute(update(table).where(*key).values(on_conflict))
+    if not result.rowcount:
+        conn.execute(insert(table).values(**values))
+
+
+class ReportCache:
+    """
+    Кеш отчётов с версиями данных и счётчиками попаданий.
+    
+    Ключ записи: имя отчёта + параметры + версии областей, от которых
+    отчёт зависит. Значения хранятся в JSON-совместимом виде.
+    """
+    
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self._stats: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+    
+    def get_or_build(
+        self,
+        name: str,
+        params: dict,
+        depends_on: tuple[str, ...],
+        build: Callable[[], Any]
+    ) -> tuple[Any, bool]:
+        """
+        Берём отчёт из кеша или строим и кладём в кеш.
+        
+        Args:
+            name: Имя отчёта
+            params: Параметры запроса, влияющие на результат
+            depends_on: Области данных, от которых зависит отчёт
+            build: Функция построения отчёта
+        
+        Returns:
+            (значение, True если взято из кеша)
+        """
+        if not self.enabled:
+            self._count(name, hit=False)
+            return jsonable_encoder(build()), False
+        
+        versions = self.backend.versions(depends_on)
+        key = f"{name}:{json.dumps(params, sort_keys=True, default=str)}:{versions}"
+        
+        hit, value = self.backend.get(key)
+        self._count(name, hit=hit)
+        if hit:
+            return value, True
+        
+        value = jsonable_encoder(build())
+        try:
+            self.backend.set(key, value)
+        except Exception:
+            # Отчёт уже построен: без записи в кеш он всё равно верен
+            logger.exception("Не удалось записать отчёт %s в кеш", name)
+        return value, False
+    
+    def invalidate(self, *namespaces: str) -> None:
+        """
+        Поднимаем версии областей после изменения данных.
+        
+        Вызывается после коммита, поэтому ошибка кеша только логируется:
+        данные уже сохранены, а устаревшие записи истекут по TTL.
+        """
+        if not self.enabled:
+            return
+        try:
+            self.backend.bump(namespaces)
+        except Exception:
+            logger.exception("Не удалось поднять версии кеша %s", ", ".join(namespaces))
+    
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Счётчики попаданий и промахов по отчётам (в этом процессе)."""
+        with self._lock:
+            return {name: dict(counters) for name, counters in self._stats.items()}
+    
+    def _count(self, name: str, hit: bool) -> None:
+        with self._lock:
+            counters = self._stats.setdefault(name, {"hits": 0, "misses": 0})
+            counters["hits" if hit else "misses"] += 1
+
+
+def create_report_cache() -> ReportCache:
+    """Собираем кеш отчётов по настройкам."""
+    settings = get_settings()
+    
+    if settings.reports_cache_backend == "database":
+        backend = DatabaseCacheBackend(settings.reports_cache_ttl)
+    else:
+        backend = MemoryCacheBackend(settings.reports_cache_ttl, settings.reports_cache_size)
+    
+    return ReportCache(backend, enabled=settings.reports_cache_ttl > 0)
+
+
+# Кеш отчётов — маршруты записи поднимают версии своих данных
+report_cache = create_report_cache()
+
+
+@on_status_change
+def _invalidate_order_reports(changes: list[StatusChange]) -> None:
+    """Сводки и выручка по заказам зависят от статуса — поднимаем версию orders."""
+    report_cache.invalidate("orders")
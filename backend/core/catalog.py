@@ -0,0 +1,347 @@
+"""
+Каталог товаров в памяти для проверок и цен.
+
+Товары читают гораздо чаще, чем меняют: при создании заказа нужно лишь
+убедиться, что товары существуют и не в архиве, и узнать цену.
+Вместо ORM-объектов каталог держит колонки в массивах array (цена
+в тиынах, остаток в тысячных, валюта — номером в списке) и словарь
+id → номер строки.
+
+Остаток в каталоге — для чтения (подсказать, сколько есть). Резерв
+всегда проверяет и списывает сам UPDATE в БД (core/stock.py), а новые
+остатки из его RETURNING маршруты заказов передают в update_stock.
+
+Актуальность:
+    - маршруты записи товаров обновляют строку товара на месте (upsert),
+      массовые изменения вызывают invalidate() — до перечитывания
+      товары проверяются в БД;
+    - каталог перечитывается только в фоновом потоке, запросы его
+      загрузку не ждут;
+    - запись товара через ORM поднимает версию в таблице
+      product_catalog_version в той же транзакции; изменения из других
+      воркеров видны по ней (проверяем через сессию запроса не чаще
+      catalog_version_check_interval секунд) и в любом случае через
+      catalog_max_age секунд — тогда каталог перечитывается в фоне;
+    - товара нет в каталоге — проверяем его в БД (read-through), так что
+      только что созданный другим воркером товар не теряется.
+"""
+
+import sys
+import threading
+import time
+from array import array
+from decimal import Decimal
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from sqlalchemy import event, select, update
+
+from core.config import get_settings
+from db.database import engine
+from models import Product, ProductCatalogVersion
+
+PRODUCT_COLUMNS = (
+    Product.id, Product.price, Product.currency, Product.stock_quantity, Product.is_active
+)
+
+
+class CatalogProduct(NamedTuple):
+    """Строка каталога."""
+    id: int
+    price: Decimal
+    currency: str
+    stock_quantity: Decimal
+    is_active: bool
+
+
+class CatalogSnapshot:
+    """
+    Снимок каталога: колонки и индекс id → строка.
+    
+    После загрузки меняется только через ProductCatalog
+    (под блокировкой каталога).
+    """
+    
+    def __init__(self):
+        self.rows: dict[int, int] = {}
+        self.ids = array("q")
+        self.prices = array("q")  # В тиынах (сотых)
+        self.stock = array("q")  # В тысячных
+        self.active = array("b")
+        self.currency = array("B")  # Номер в self.currencies
+        self.currencies: list[str] = []
+        self._currency_codes: dict[str, int] = {}
+    
+    def _currency_code(self, currency: Optional[str]) -> int:
+        currency = currency or "KZT"
+        code = self._currency_codes.get(currency)
+        if code is None:
+            code = self._currency_codes[currency] = len(self.currencies)
+            self.currencies.append(currency)
+        return code
+    
+    def append(self, product_id: int, price, currency: Optional[str], stock, is_active) -> None:
+        code = self._currency_code(currency)
+        row = len(self.ids)
+        self.ids.append(product_id)
+        self.prices.append(int(Decimal(price or 0).scaleb(2)))
+        self.stock.append(int(Decimal(stock or 0).scaleb(3)))
+        self.active.append(1 if is_active else 0)
+        self.currency.append(code)
+        # Индекс — последним: читатели без блокировки видят строку целиком
+        self.rows[product_id] = row
+    
+    def set(self, product_id: int, price, currency: Optional[str], stock, is_active) -> None:
+        """Обновляем строку товара на месте или добавляем новую."""
+        row = self.rows.get(product_id)
+        if row is None:
+            self.append(product_id, price, currency, stock, is_active)
+            return
+        
+        code = self._currency_code(currency)
+        self.prices[row] = int(Decimal(price or 0).scaleb(2))
+        self.stock[row] = int(Decimal(stock or 0).scaleb(3))
+        self.active[row] = 1 if is_active else 0
+        self.currency[row] = code
+    
+    def set_stock(self, product_id: int, stock) -> None:
+        """Новый остаток товара, если он есть в снимке."""
+        row = self.rows.get(product_id)
+        if row is not None:
+            self.stock[row] = int(Decimal(stock or 0).scaleb(3))
+    
+    def product(self, product_id: int) -> Optional[CatalogProduct]:
+        row = self.rows.get(product_id)
+        if row is None:
+            return None
+        return CatalogProduct(
+            id=product_id,
+            price=Decimal(self.prices[row]).scaleb(-2),
+            currency=self.currencies[self.currency[row]],
+            stock_quantity=Decimal(self.stock[row]).scaleb(-3),
+            is_active=bool(self.active[row]),
+        )
+    
+    def memory_bytes(self) -> int:
+        """Память колонок и индекса (без общих небольших объектов)."""
+        columns = (self.ids, self.prices, self.stock, self.active, self.currency)
+        return sys.getsizeof(self.rows) + sum(
+            sys.getsizeof(column) for column in columns
+        ) + sum(sys.getsizeof(product_id) for product_id in self.ids)
+
+
+class ProductCatalog:
+    """Каталог, который перечитывается из БД в фоне при смене версии."""
+    
+    def __init__(self, enabled: bool, version_check_interval: float, max_age: float):
+        self.enabled = enabled
+        self.version_check_interval = version_check_interval
+        self.max_age = max_age
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        # Локальная версия: поднимается при записи товаров в этом процессе
+        self._version = 0
+        self._loaded_version = -1
+        self._shared_version: Optional[int] = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._refreshing = False
+        # Пока идёт загрузка, изменения копятся здесь и применяются к новому снимку
+        self._pending: Optional[list[Callable[[CatalogSnapshot], None]]] = None
+        self.loads = 0
+    
+    def invalidate(self) -> None:
+        """Товары изменились массово — снимок не используем до перечитывания."""
+        with self._lock:
+            self._version += 1
+    
+    def _change(self, apply: Callable[[CatalogSnapshot], None]) -> None:
+        """Меняем текущий снимок и тот, что сейчас загружается."""
+        with self._lock:
+            if self._snapshot is not None:
+                apply(self._snapshot)
+            if self._pending is not None:
+                self._pending.append(apply)
+    
+    def upsert(self, product) -> None:
+        """Товар создан или изменён в этом процессе (вызывать после commit)."""
+        row = (product.id, product.price, product.currency, product.stock_quantity, product.is_active)
+        self._change(lambda snapshot: snapshot.set(*row))
+    
+    def update_stock(self, stock: dict[int, Decimal]) -> None:
+        """
+        Новые остатки после резерва или возврата (вызывать после commit).
+        
+        stock — RETURNING условных UPDATE из core/stock.py.
+        """
+        if not stock:
+            return
+        
+        def apply(snapshot: CatalogSnapshot) -> None:
+            for product_id, quantity in stock.items():
+                snapshot.set_stock(product_id, quantity)
+        
+        self._change(apply)
+    
+    def snapshot(self, db) -> Optional[CatalogSnapshot]:
+        """
+        Снимок каталога или None, если его ещё нет или он устарел.
+        
+        Каталог перечитывается только в фоновом потоке: запрос, заставший
+        его устаревшим, проверяет товары в БД через свою сессию и не ждёт
+        загрузки (в async-режиме она блокировала бы event loop).
+        Если товары поменял другой воркер или снимок старше max_age —
+        до перечитывания отдаём текущий: товары не удаляются, а новые
+        дочитывает lookup. Версию читаем через сессию запроса db.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or self._loaded_version != self._version:
+            self._reload_in_background()
+            return None
+        
+        now = time.monotonic()
+        if now - self._checked_at > self.version_check_interval:
+            self._checked_at = now
+            if (
+                now - self._loaded_at > self.max_age
+                or products_version(db) != self._shared_version
+            ):
+                self._reload_in_background()
+        return snapshot
+    
+    def reload(self) -> None:
+        """
+        Перечитываем каталог (в фоновом потоке).
+        
+        Таблица читается без блокировки каталога, а изменения, сделанные
+        за время загрузки, применяются к новому снимку перед заменой.
+        """
+        with self._lock:
+            version = self._version
+            self._pending = []
+        
+        try:
+            shared_version, snapshot = self._load()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        
+        with self._lock:
+            for apply in self._pending:
+                apply(snapshot)
+            self._pending = None
+            self._snapshot = snapshot
+            self._loaded_version = version
+            self._shared_version = shared_version
+            self._loaded_at = self._checked_at = time.monotonic()
+            self.loads += 1
+    
+    def _reload_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        
+        def run():
+            try:
+                self.reload()
+            finally:
+                self._refreshing = False
+        
+        threading.Thread(target=run, name="product-catalog", daemon=True).start()
+    
+    def _load(self) -> tuple[int, CatalogSnapshot]:
+        """Версия и снимок; версию читаем первой — запись во время загрузки её поднимет."""
+        snapshot = CatalogSnapshot()
+        with engine.connect() as conn:
+            version = products_version(conn)
+            rows = conn.execution_options(yield_per=10000).execute(
+                select(*PRODUCT_COLUMNS).order_by(Product.id)
+            )
+            for row in rows:
+                snapshot.append(*row)
+        return version, snapshot
+    
+    def lookup(self, db, product_ids: Iterable[int]) -> dict[int, CatalogProduct]:
+        """
+        Строки каталога по ID.
+        
+        Товары, которых нет в снимке, дочитываются из БД одним запросом IN.
+        Ненайденных ID в ответе нет.
+        """
+        product_ids = set(product_ids)
+        if not product_ids:
+            return {}
+        
+        found: dict[int, CatalogProduct] = {}
+        snapshot = self.snapshot(db) if self.enabled else None
+        if snapshot is not None:
+            for product_id in product_ids:
+                product = snapshot.product(product_id)
+                if product is not None:
+                    found[product_id] = product
+        
+        missing = product_ids - found.keys()
+        if missing:
+            rows = db.execute(
+                select(*PRODUCT_COLUMNS).where(Product.id.in_(missing))
+            ).all()
+            for product_id, price, currency, stock, is_active in rows:
+                found[product_id] = CatalogProduct(
+                    id=product_id,
+                    price=Decimal(price or 0),
+                    currency=currency or "KZT",
+                    stock_quantity=Decimal(stock or 0),
+                    is_active=bool(is_active),
+                )
+            if rows and snapshot is not None:
+                # Товар появился в другом воркере — добавляем его в снимок
+                
+                def add_rows(current: CatalogSnapshot) -> None:
+                    for row in rows:
+                        current.set(*row)
+                
+                self._change(add_rows)
+        
+        return found
+    
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "enabled": self.enabled,
+            "products": len(snapshot.ids) if snapshot else 0,
+            "memory_kb": round(snapshot.memory_bytes() / 1024, 1) if snapshot else 0,
+            "loads": self.loads,
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if snapshot else None,
+        }
+
+
+def create_product_catalog() -> ProductCatalog:
+    settings = get_settings()
+    return ProductCatalog(
+        enabled=settings.catalog_enabled,
+        version_check_interval=settings.catalog_version_check_interval,
+        max_age=settings.catalog_max_age,
+    )
+
+
+def products_version(conn) -> int:
+    """Текущая версия товаров (соединение или сессия)."""
+    return conn.execute(
+        select(ProductCatalogVersion.version).where(ProductCatalogVersion.id == 1)
+    ).scalar() or 0
+
+
+@event.listens_for(Product, "after_insert")
+@event.listens_for(Product, "after_update")
+def _bump_products_version(mapper, connection, target: Product) -> None:
+    """Товар записан через ORM — поднимаем версию в той же транзакции."""
+    connection.execute(
+        update(ProductCatalogVersion)
+        .where(ProductCatalogVersion.id == 1)
+        .values(version=ProductCatalogVersion.version + 1)
+    )
+
+
+# Каталог товаров — маршруты записи товаров вызывают upsert()
+product_catalog = create_product_catalog()
@@ -21,17 +21,105 @@ class Settings(BaseSettings):
     # В продакшене Railway автоматически устанавливает DATABASE_URL
     database_url: str = "sqlite:///./database.db"
     
+    # Реплики PostgreSQL для чтения отчётов и списков (через запятую).
+    # После записи пользователь replica_sticky_seconds читает с основной БД;
+    # реплики с отставанием больше replica_max_lag_seconds пропускаются
+    database_replica_urls: str = ""
+    replica_sticky_seconds: float = 5
+    replica_max_lag_seconds: float = 10
+    replica_lag_check_interval: float = 5
+    
+    # Пул соединений: internal — пул SQLAlchemy, external — NullPool
+    # (serverless или внешний пулер вроде PgBouncer)
+    db_pooler: str = "internal"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30  # Сколько ждать свободное соединение, сек
+    db_pool_recycle: int = 1800  # Переоткрывать соединения старше N сек
+    db_pool_pre_ping: bool = True  # Проверять соединение перед выдачей
+    
+    # Кеш скомпилированных запросов SQLAlchemy, кеш prepared statements
+    # соединения asyncpg (с db_pooler=external всегда выключен),
+    # таймаут одного запроса в PostgreSQL (0 — без таймаута)
+    # и имя приложения в pg_stat_activity
+    db_statement_cache_size: int = 500
+    db_prepared_statement_cache_size: int = 100
+    db_statement_timeout_ms: int = 0
+    db_application_name: str = "erp-lite"
+    
+    # Профиль SQLite (только для файла БД): WAL, PRAGMA на соединениях
+    # и один писатель — записи идут через одно соединение по очереди,
+    # чтение параллельно. sqlite_writer_timeout — сколько ждать очередь, сек
+    sqlite_wal: bool = True
+    sqlite_single_writer: bool = True
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 268435456  # 256 МиБ
+    sqlite_cache_size_kb: int = 20000
+    sqlite_writer_timeout: float = 30
+    
+    # Асинхронный движок (aiosqlite / asyncpg) и async-маршруты
+    # заказов, платежей и отчётов
+    async_db: bool = False
+    
     # JWT-настройки
     secret_key: str = "change-me-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
     
+    # Сколько проверенных токенов держать в кеше (0 — без кеша)
+    token_cache_size: int = 4096
+    
+    # Сколько номеров заказов воркер резервирует за одно обращение к БД
+    order_number_block_size: int = 20
+    
+    # Сколько заказов пакетный импорт пишет в БД за одну транзакцию
+    bulk_import_chunk_size: int = 1000
+    
+    # Сколько строк выгрузка читает из БД и отправляет за раз
+    export_batch_size: int = 1000
+    
+    # Кеш отчётов: время жизни в секундах (0 — без кеша), размер
+    # и где хранить — memory (в процессе) или database (общий для воркеров)
+    reports_cache_ttl: float = 10
+    reports_cache_size: int = 256
+    reports_cache_backend: str = "memory"
+    
+    # Кеш пользователей в get_current_user: время жизни в секундах
+    # (0 — без кеша) и сколько пользователей держать
+    user_cache_ttl: float = 30
+    user_cache_size: int = 1024
+    
+    # Пул для bcrypt: число потоков, сколько вызовов может ждать в очереди
+    # (сверх этого — 503) и значение Retry-After в секундах
+    password_pool_workers: int = 2
+    password_pool_max_pending: int = 32
+    password_pool_retry_after: int = 1
+    
+    # Подсказки при вводе (/clients/suggest, /products/suggest): индекс
+    # в памяти, его бюджет в МБ на оба индекса и период полной перестройки
+    # в секундах (подхватывает изменения из других воркеров)
+    suggest_enabled: bool = True
+    suggest_memory_mb: int = 128
+    suggest_rebuild_interval: float = 300
+    
+    # Каталог товаров в памяти (проверка товаров заказа): как часто
+    # сверять версию товаров с другими воркерами и предельный возраст
+    # снимка, в секундах
+    catalog_enabled: bool = True
+    catalog_version_check_interval: float = 1
+    catalog_max_age: float = 300
+    
     # Режим отладки
     debug: bool = False
     
     # CORS — разрешённые источники
     cors_origins: str = "http://localhost:3000"
     
+    @property
+    def database_replica_urls_list(self) -> list[str]:
+        """Адреса реплик списком."""
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+    
     @property
     def cors_origins_list(self) -> list[str]:
         """Преобразуем строку с хостами в список."""
@@ -3,12 +3,18 @@ FastAPI зависимости.
 Функции для получения текущего пользователя и проверки прав доступа.
 """
 
+from dataclasses import dataclass
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 
-from db.database import get_db
+from db.database import (
+    AsyncSessionLocal, SessionLocal, async_read_engines, get_db, open_async_session, replica_router
+)
+from core.cache import TTLCache
+from core.config import get_settings
 from core.security import decode_token
 from models import User
 
@@ -16,13 +22,86 @@ from models import User
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
+@dataclass(frozen=True)
+class CurrentUser:
+    """Данные пользователя, нужные для проверки доступа."""
+    id: int
+    role: str
+    is_active: bool
+
+
+# Кеш пользователей по id: без него каждый запрос делает лишний SELECT из users
+_settings = get_settings()
+user_cache = TTLCache(_settings.user_cache_ttl, _settings.user_cache_size)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Убираем пользователя из кеша (после изменения или удаления)."""
+    user_cache.delete(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _remember_changed_user(mapper, connection, target: User) -> None:
+    """
+    Запоминаем изменённого через ORM пользователя до commit.
+    
+    Сбрасывать кеш при flush рано: до commit параллельный запрос
+    прочитает старую строку и положит её в кеш на весь TTL.
+    """
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_users", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    """
+    После commit сбрасываем изменённых пользователей из кеша.
+    
+    Массовые UPDATE мимо ORM и другие воркеры кеш не трогают —
+    их изменения видны не позже чем через user_cache_ttl секунд.
+    """
+    for user_id in session.info.pop("changed_users", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    """Откат: изменений не было, кеш трогать не нужно."""
+    session.info.pop("changed_users", None)
+
+
+def load_current_user(db: Session, user_id: int) -> Optional[CurrentUser]:
+    """Берём пользователя из кеша или читаем из БД нужные поля."""
+    hit, user = user_cache.get(user_id)
+    if hit:
+        return user
+    
+    row = (
+        db.query(User.id, User.role, User.is_active)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if row is None:
+        return None
+    
+    user = CurrentUser(id=row.id, role=row.role, is_active=bool(row.is_active))
+    if _settings.user_cache_ttl > 0:
+        user_cache.set(user_id, user)
+    return user
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> User:
+) -> CurrentUser:
     """
     Получаем текущего авторизованного пользователя из JWT-токена.
     
+    Пользователь берётся из кеша (user_cache_ttl секунд), поэтому
+    отдаём только id, роль и статус, а не ORM-объект.
+    
     Raises:
         HTTPException: Если токен невалидный или пользователь не найден
     """
@@ -47,8 +126,8 @@ def get_current_user(
     except (ValueError, TypeError):
         raise credentials_exception
     
-    # Ищем пользователя в БД
-    user = db.query(User).filter(User.id == user_id).first()
+    # Ищем пользователя в кеше или в БД
+    user = load_current_user(db, user_id)
     if user is None:
         raise credentials_exception
     
@@ -61,9 +140,44 @@ def get_current_user(
     return user
 
 
+async def get_current_user_async(token: str = Depends(oauth2_scheme)) -> CurrentUser:
+    """
+    Тот же get_current_user для async-маршрутов — поверх AsyncSession.
+    
+    Сессия своя, короткая и без очереди open_async_session: маршрут
+    обычно уже занял место своей сессией, а пользователь чаще всего
+    берётся из кеша без обращения к БД.
+    """
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(lambda session: get_current_user(token, session))
+
+
+def get_read_db(token: str = Depends(oauth2_scheme)):
+    """
+    Сессия только для чтения: реплика или основная БД.
+    
+    Пользователь, который недавно записывал данные, читает с основной БД,
+    чтобы видеть свои изменения (см. db.replicas).
+    """
+    payload = decode_token(token) or {}
+    db = SessionLocal(bind=replica_router.choose(payload.get("sub")))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(token: str = Depends(oauth2_scheme)):
+    """get_read_db для async-маршрутов: AsyncSession на реплике или основной БД."""
+    payload = decode_token(token) or {}
+    bind = async_read_engines[replica_router.choose(payload.get("sub"))]
+    async with open_async_session(bind) as db:
+        yield db
+
+
 def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: CurrentUser = Depends(get_current_user)
+) -> CurrentUser:
     """Проверяем, что пользователь активен."""
     if not current_user.is_active:
         raise HTTPException(
@@ -74,8 +188,8 @@ def get_current_active_user(
 
 
 def get_admin_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: CurrentUser = Depends(get_current_user)
+) -> CurrentUser:
     """
     Проверяем, что пользователь — администратор.
     
@@ -93,7 +207,7 @@ def get_admin_user(
 def get_optional_user(
     token: Optional[str] = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> Optional[User]:
+) -> Optional[CurrentUser]:
     """
     Опциональная авторизация — можно и без токена.
     Используется для публичных эндпоинтов с расширенными правами для авторизованных.
@@ -0,0 +1,314 @@
+"""
+Учёт оплат по заказам.
+
+Сумма оплат (paid_amount) и задолженность (debt_amount) хранятся прямо
+в таблице orders, а выручка по дням — в таблице daily_revenue.
+И то и другое меняется в той же транзакции, что и платёж, поэтому
+отчёты и списки читают готовые значения вместо агрегатов по платежам.
+
+Сверка с платежами запускается командой:
+    python -m core.ledger                    # только проверить
+    python -m core.ledger --fix              # проверить и исправить
+    python -m core.ledger --rebuild-revenue  # пересобрать daily_revenue
+"""
+
+import argparse
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import bindparam, delete, func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models import Order, Payment, DailyRevenue
+
+# Расхождение меньше копейки считаем погрешностью округления
+RECONCILE_TOLERANCE = Decimal("0.005")
+
+# Колонки платежа для PaymentPosting.of (например, в RETURNING)
+POSTING_COLUMNS = (
+    Payment.order_id, Payment.status, Payment.amount,
+    Payment.currency, Payment.payment_date, Payment.created_at
+)
+
+
+@dataclass(frozen=True)
+class PaymentPosting:
+    """Поля платежа, от которых зависят оплата заказа и выручка."""
+    order_id: int
+    status: str
+    amount: Decimal
+    currency: str
+    payment_date: Optional[datetime]
+    created_at: Optional[datetime]
+    
+    @property
+    def day(self) -> date:
+        """День выручки: дата платежа, без неё — дата создания (как в rebuild_daily_revenue)."""
+        return (self.payment_date or self.created_at).date()
+    
+    @classmethod
+    def of(cls, payment) -> "PaymentPosting":
+        """Снимок платежа (объекта или строки с POSTING_COLUMNS) для проводки."""
+        return cls(
+            order_id=payment.order_id,
+            status=payment.status,
+            amount=Decimal(payment.amount or 0),
+            currency=payment.currency or "KZT",
+            payment_date=payment.payment_date,
+            created_at=payment.created_at,
+        )
+
+
+@dataclass
+class BalanceDrift:
+    """Расхождение сохранённой суммы оплат с платежами."""
+    order_id: int
+    stored_paid: Decimal
+    actual_paid: Decimal
+
+
+def post_payment(db: Session, posting: PaymentPosting, sign: int = 1) -> None:
+    """
+    Проводим (sign=1) или сторнируем (sign=-1) платёж.
+    
+    Учитываются только проведённые платежи: меняем оплату заказа
+    и выручку за день платежа. Коммит — за вызывающим.
+    """
+    if posting.status != "completed":
+        return
+    
+    amount = posting.amount * sign
+    apply_paid_delta(db, posting.order_id, amount)
+    
+    apply_revenue_delta(db, posting.day, posting.currency, amount, sign)
+
+
+def post_payments(db: Session, postings: list[PaymentPosting]) -> None:
+    """
+    Проводим сразу много платежей (например, по банковской выписке).
+    
+    Оплаты суммируются по заказам и по дням: один executemany UPDATE
+    на заказы и по одной записи выручки на день и валюту.
+    Коммит — за вызывающим.
+    """
+    paid: dict[int, Decimal] = {}
+    revenue: dict[tuple[date, str], tuple[Decimal, int]] = {}
+    
+    for posting in postings:
+        if posting.status != "completed":
+            continue
+        paid[posting.order_id] = paid.get(posting.order_id, Decimal(0)) + posting.amount
+        key = (posting.day, posting.currency)
+        amount, count = revenue.get(key, (Decimal(0), 0))
+        revenue[key] = (amount + posting.amount, count + 1)
+    
+    if paid:
+        table = Order.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_order_id"))
+            .values(
+                paid_amount=table.c.paid_amount + bindparam("b_delta"),
+                debt_amount=table.c.debt_amount - bindparam("b_delta")
+            ),
+            [{"b_order_id": order_id, "b_delta": delta} for order_id, delta in paid.items()]
+        )
+    
+    for (day, currency), (amount, count) in revenue.items():
+        apply_revenue_delta(db, day, currency, amount, count)
+
+
+def repost_payment(db: Session, before: PaymentPosting, after: PaymentPosting) -> None:
+    """Переносим проводку после изменения платежа (например, отмены)."""
+    if before == after:
+        return
+    
+    post_payment(db, before, sign=-1)
+    post_payment(db, after, sign=1)
+
+
+def apply_paid_delta(db: Session, order_id: int, delta: Decimal) -> None:
+    """
+    Сдвигаем оплату и задолженность заказа на delta.
+    
+    Атомарный UPDATE без чтения: параллельные платежи по одному
+    заказу не теряют изменения друг друга.
+    """
+    if not delta:
+        return
+    
+    db.execute(
+        update(Order)
+        .where(Order.id == order_id)
+        .values(
+            paid_amount=Order.paid_amount + delta,
+            debt_amount=Order.debt_amount - delta
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def apply_revenue_delta(db: Session, day: date, currency: str, amount: Decimal, count: int) -> None:
+    """
+    Добавляем сумму и количество платежей к выручке дня.
+    
+    Строка дня создаётся или обновляется одним INSERT ... ON CONFLICT,
+    так что параллельные проводки не мешают друг другу.
+    """
+    table = DailyRevenue.__table__
+    dialect = db.get_bind().dialect.name
+    
+    if dialect in ("postgresql", "sqlite"):
+        upsert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = upsert(table).values(
+            day=day, currency=currency, revenue=amount, payments_count=count
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.day, table.c.currency],
+            set_={
+                "revenue": table.c.revenue + stmt.excluded.revenue,
+                "payments_count": table.c.payments_count + stmt.excluded.payments_count,
+            }
+        )
+        db.execute(stmt)
+        return
+    
+    # Прочие СУБД: сначала UPDATE, если строки нет — INSERT
+    result = db.execute(
+        update(table)
+        .where(table.c.day == day, table.c.currency == currency)
+        .values(
+            revenue=table.c.revenue + amount,
+            payments_count=table.c.payments_count + count
+        )
+    )
+    if not result.rowcount:
+        db.execute(insert(table).values(
+            day=day, currency=currency, revenue=amount, payments_count=count
+        ))
+
+
+def rebuild_daily_revenue(db: Session) -> int:
+    """
+    Пересобираем daily_revenue из проведённых платежей (с коммитом).
+    
+    День платежа — по тому же правилу, что и PaymentPosting.day.
+    
+    Returns:
+        Количество строк в таблице после пересборки
+    """
+    day = func.date(func.coalesce(Payment.payment_date, Payment.created_at))
+    rows = (
+        db.query(
+            day.label("day"),
+            Payment.currency,
+            func.sum(Payment.amount).label("revenue"),
+            func.count(Payment.id).label("payments_count")
+        )
+        .filter(Payment.status == "completed")
+        .group_by(day, Payment.currency)
+        .all()
+    )
+    
+    db.execute(delete(DailyRevenue))
+    if rows:
+        # В SQLite date() возвращает строку, в PostgreSQL — дату
+        db.execute(insert(DailyRevenue), [
+            {
+                "day": r.day if isinstance(r.day, date) else date.fromisoformat(str(r.day)),
+                "currency": r.currency or "KZT",
+                "revenue": r.revenue,
+                "payments_count": r.payments_count,
+            }
+            for r in rows
+        ])
+    db.commit()
+    
+    return len(rows)
+
+
+def reconcile_order_balances(db: Session, fix: bool = False) -> list[BalanceDrift]:
+    """
+    Сверяем paid_amount / debt_amount заказов с проведёнными платежами.
+    
+    Args:
+        db: Сессия БД
+        fix: Исправить найденные расхождения (с коммитом)
+    
+    Returns:
+        Список расхождений
+    """
+    paid_subq = (
+        db.query(
+            Payment.order_id,
+            func.sum(Payment.amount).label("paid")
+        )
+        .filter(Payment.status == "completed")
+        .group_by(Payment.order_id)
+        .subquery()
+    )
+    actual_paid = func.coalesce(paid_subq.c.paid, 0)
+    actual_debt = func.coalesce(Order.total_amount, 0) - actual_paid
+    
+    # Сравниваем с допуском: SQLite хранит Numeric как число с плавающей точкой
+    rows = (
+        db.query(Order.id, Order.paid_amount, Order.total_amount, actual_paid)
+        .outerjoin(paid_subq, paid_subq.c.order_id == Order.id)
+        .filter(
+            Order.paid_amount.is_(None) |
+            Order.debt_amount.is_(None) |
+            (func.abs(Order.paid_amount - actual_paid) > RECONCILE_TOLERANCE) |
+            (func.abs(Order.debt_amount - actual_debt) > RECONCILE_TOLERANCE)
+        )
+        .all()
+    )
+    
+    drifts = [
+        BalanceDrift(order_id=order_id, stored_paid=stored, actual_paid=Decimal(actual or 0))
+        for order_id, stored, _, actual in rows
+    ]
+    
+    if fix and rows:
+        db.execute(
+            update(Order),
+            [
+                {
+                    "id": order_id,
+                    "paid_amount": Decimal(actual or 0),
+                    "debt_amount": Decimal(total or 0) - Decimal(actual or 0),
+                }
+                for order_id, _, total, actual in rows
+            ]
+        )
+        db.commit()
+    
+    return drifts
+
+
+if __name__ == "__main__":
+    from db.database import SessionLocal
+    
+    parser = argparse.ArgumentParser(description="Сверка оплат заказов с платежами")
+    parser.add_argument("--fix", action="store_true", help="Исправить расхождения")
+    parser.add_argument(
+        "--rebuild-revenue", action="store_true",
+        help="Пересобрать таблицу выручки по дням"
+    )
+    args = parser.parse_args()
+    
+    session = SessionLocal()
+    try:
+        found = reconcile_order_balances(session, fix=args.fix)
+        if args.rebuild_revenue:
+            days = rebuild_daily_revenue(session)
+            print(f"Выручка по дням пересобрана: {days} строк")
+    finally:
+        session.close()
+    
+    for drift in found:
+        print(f"Заказ {drift.order_id}: сохранено {drift.stored_paid}, по платежам {drift.actual_paid}")
+    print(f"Расхождений: {len(found)}" + (" (исправлены)" if args.fix and found else ""))
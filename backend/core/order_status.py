@@ -0,0 +1,97 @@
+"""
+Статусы заказа: граф переходов и события смены статуса.
+
+    new → confirmed → in_progress → shipped → completed
+    new / confirmed / in_progress → cancelled
+
+Любой маршрут, меняющий статус, проверяет переход через
+check_transition, а после commit сообщает о смене через
+emit_status_changes — подписчики (on_status_change) обновляют
+производные данные: кеши, сводки и т.п.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Допустимые переходы: статус → куда из него можно перейти
+ORDER_TRANSITIONS: dict[str, frozenset[str]] = {
+    "new": frozenset({"confirmed", "cancelled"}),
+    "confirmed": frozenset({"in_progress", "cancelled"}),
+    "in_progress": frozenset({"shipped", "cancelled"}),
+    "shipped": frozenset({"completed"}),
+    "completed": frozenset(),
+    "cancelled": frozenset(),
+}
+
+ORDER_STATUSES = tuple(ORDER_TRANSITIONS)
+
+
+class InvalidTransition(ValueError):
+    """Переход между статусами не разрешён графом."""
+    
+    def __init__(self, current: str, target: str):
+        if target not in ORDER_TRANSITIONS:
+            message = f"Неизвестный статус заказа: {target}"
+        else:
+            message = f"Недопустимый переход статуса: {current} → {target}"
+        super().__init__(message)
+        self.current = current
+        self.target = target
+
+
+def check_transition(current: str, target: str) -> None:
+    """
+    Проверяем переход current → target (тот же статус — не переход).
+    
+    Raises:
+        InvalidTransition: Статус неизвестен или переход не разрешён
+    """
+    if target == current and target in ORDER_TRANSITIONS:
+        return
+    if target not in ORDER_TRANSITIONS.get(current, ()):
+        raise InvalidTransition(current, target)
+
+
+def source_statuses(target: str) -> frozenset[str]:
+    """Статусы, из которых можно перейти в target."""
+    return frozenset(
+        status for status, targets in ORDER_TRANSITIONS.items() if target in targets
+    )
+
+
+@dataclass(frozen=True)
+class StatusChange:
+    """Событие: заказ перешёл из одного статуса в другой."""
+    order_id: int
+    old_status: str
+    new_status: str
+
+
+StatusListener = Callable[[list[StatusChange]], None]
+
+_listeners: list[StatusListener] = []
+
+
+def on_status_change(listener: StatusListener) -> StatusListener:
+    """Подписываемся на смены статусов (можно использовать как декоратор)."""
+    _listeners.append(listener)
+    return listener
+
+
+def emit_status_changes(changes: list[StatusChange]) -> None:
+    """
+    Сообщаем подписчикам о сменах статусов (вызывать после commit).
+    
+    Ошибка подписчика не отменяет уже записанную смену статуса —
+    пишем её в лог и продолжаем.
+    """
+    if not changes:
+        return
+    for listener in _listeners:
+        try:
+            listener(changes)
+        except Exception:
+            logger.exception("Ошибка подписчика смены статуса %r", listener)
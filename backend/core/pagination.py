@@ -0,0 +1,120 @@
+"""
+Keyset-пагинация (по курсору).
+
+Вместо OFFSET следующая страница начинается сразу после последней
+записи предыдущей: WHERE (created_at, id) < (:created_at, :id).
+Поэтому страница N стоит столько же, сколько первая.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(values: list[Any]) -> str:
+    """
+    Упаковываем значения ключа сортировки в непрозрачную строку.
+    
+    Args:
+        values: Значения колонок сортировки последней записи страницы
+    
+    Returns:
+        Курсор в base64 (url-safe)
+    """
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, columns: list) -> list[Any]:
+    """
+    Распаковываем курсор и приводим значения к типам колонок.
+    
+    Raises:
+        HTTPException: Если курсор повреждён или не подходит к сортировке
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor length mismatch")
+        
+        result = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif not isinstance(value, python_type):
+                raise ValueError("cursor type mismatch")
+            result.append(value)
+        return result
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор"
+        )
+
+
+def paginate(
+    query: Query,
+    columns: list,
+    per_page: int,
+    page: int = 1,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> tuple[list, Optional[str]]:
+    """
+    Выбираем одну страницу и считаем курсор следующей.
+    
+    Без курсора работает обычный OFFSET по номеру страницы, с курсором
+    номер страницы игнорируется. Последняя колонка должна быть уникальной
+    (обычно id), иначе записи на границе страниц могут потеряться.
+    
+    Args:
+        query: Запрос с уже применёнными фильтрами
+        columns: Колонки сортировки, например [Order.created_at, Order.id]
+        per_page: Размер страницы
+        page: Номер страницы для режима OFFSET
+        cursor: Курсор из предыдущего ответа (next_cursor)
+        descending: Сортировка по убыванию
+    
+    Returns:
+        Записи страницы и курсор следующей (None, если страница последняя)
+    """
+    order_by = [c.desc() for c in columns] if descending else list(columns)
+    
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        query = query.filter(_after(columns, values, descending)).order_by(*order_by)
+    else:
+        query = query.order_by(*order_by).offset((page - 1) * per_page)
+    
+    rows = query.limit(per_page).all()
+    
+    next_cursor = None
+    if len(rows) == per_page:
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    
+    return rows, next_cursor
+
+
+def _after(columns: list, values: list, descending: bool):
+    """
+    Условие «строго после курсора» для составного ключа.
+    
+    Раскрываем (a, b) > (x, y) в a > x OR (a = x AND b > y):
+    так работает и в SQLite, и в PostgreSQL, и индекс используется.
+    """
+    conditions = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        beyond = column < values[i] if descending else column > values[i]
+        conditions.append(and_(*equal, beyond))
+    return or_(*conditions)
@@ -0,0 +1,121 @@
+"""
+Отдельный пул для хеширования паролей.
+
+bcrypt тратит около 250 мс процессора на вызов. В общем пуле потоков
+FastAPI волна логинов в начале смены занимает потоки, нужные остальным
+эндпоинтам. Поэтому хеширование идёт в своём небольшом пуле потоков
+(bcrypt отпускает GIL), а очередь к нему ограничена: при переполнении
+отвечаем 503 с Retry-After вместо бесконечного ожидания.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+
+from core.config import get_settings
+from core.security import get_password_hash, verify_password
+
+
+class PasswordPool:
+    """
+    Пул потоков для bcrypt с ограничением очереди и метриками.
+    
+    max_pending — сколько вызовов может ждать и выполняться одновременно;
+    всё сверх этого сразу получает 503.
+    """
+    
+    def __init__(self, workers: int = 2, max_pending: int = 32, retry_after: int = 1):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._calls = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._hash_total = 0.0
+        self._hash_max = 0.0
+    
+    async def hash(self, password: str) -> str:
+        """Хешируем пароль в пуле."""
+        return await self.run(get_password_hash, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Проверяем пароль в пуле."""
+        return await self.run(verify_password, plain_password, hashed_password)
+    
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Выполняем функцию в пуле, не занимая event loop.
+        
+        Raises:
+            HTTPException: 503, если очередь к пулу переполнена
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Сервер перегружен, повторите попытку позже",
+                    headers={"Retry-After": str(self.retry_after)}
+                )
+            self._pending += 1
+        
+        try:
+            future = self._executor.submit(self._timed, time.monotonic(), func, *args)
+            return await asyncio.wrap_future(future)
+        finally:
+            with self._lock:
+                self._pending -= 1
+    
+    def _timed(self, submitted_at: float, func: Callable[..., Any], *args) -> Any:
+        """Выполняем вызов и записываем время ожидания в очереди и работы."""
+        started_at = time.monotonic()
+        try:
+            return func(*args)
+        finally:
+            finished_at = time.monotonic()
+            wait = started_at - submitted_at
+            spent = finished_at - started_at
+            with self._lock:
+                self._calls += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+                self._hash_total += spent
+                self._hash_max = max(self._hash_max, spent)
+    
+    def stats(self) -> dict:
+        """Метрики пула: очередь, отказы, время ожидания и хеширования (мс)."""
+        with self._lock:
+            calls = self._calls or 1
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "calls": self._calls,
+                "rejected": self._rejected,
+                "queue_wait_avg_ms": round(self._wait_total / calls * 1000, 2),
+                "queue_wait_max_ms": round(self._wait_max * 1000, 2),
+                "hash_avg_ms": round(self._hash_total / calls * 1000, 2),
+                "hash_max_ms": round(self._hash_max * 1000, 2),
+            }
+
+
+def create_password_pool() -> PasswordPool:
+    """Собираем пул по настройкам."""
+    settings = get_settings()
+    return PasswordPool(
+        workers=settings.password_pool_workers,
+        max_pending=settings.password_pool_max_pending,
+        retry_after=settings.password_pool_retry_after
+    )
+
+
+# Общий пул хеширования паролей на процесс
+password_pool = create_password_pool()
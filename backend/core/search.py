@@ -0,0 +1,283 @@
+"""
+Поиск клиентов и товаров по индексу.
+
+ILIKE '%текст%' не использует b-tree индекс, поэтому каждый запрос
+из строки поиска читал всю таблицу. Здесь поиск идёт по индексу:
+    PostgreSQL — GIN-индекс pg_trgm (gin_trgm_ops): его использует тот же
+                 ILIKE, а релевантность считает word_similarity;
+    SQLite     — FTS5 (токенизатор unicode61 приводит к нижнему регистру
+                 и кириллицу); каждое слово запроса ищется как префикс,
+                 релевантность — bm25.
+Если индекса нет (другая СУБД, SQLite без FTS5 или PostgreSQL без прав
+на CREATE EXTENSION), работает прежний ILIKE.
+
+Индексы создаёт миграция 0002 (db/migrations.py). В PostgreSQL она
+строит их CONCURRENTLY, не блокируя запись. Если pg_trgm недоступно,
+миграция откладывается: после того как администратор выполнит
+CREATE EXTENSION pg_trgm, индексы построит следующий запуск приложения
+или python -m db.migrations upgrade.
+"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Hashable
+
+from sqlalchemy import Float, Integer, and_, func, inspect, or_, select, text, true
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.sql.elements import ColumnElement
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    """Таблица и колонки, по которым ищем (первая колонка важнее)."""
+    table: str
+    columns: tuple[str, ...]
+    
+    @property
+    def fts_table(self) -> str:
+        return f"{self.table}_fts"
+
+
+CLIENT_SEARCH = SearchIndex("clients", ("name", "company"))
+PRODUCT_SEARCH = SearchIndex("products", ("name", "sku"))
+SEARCH_INDEXES = [CLIENT_SEARCH, PRODUCT_SEARCH]
+
+# Вес колонок в bm25: совпадение в названии важнее совпадения в компании/артикуле
+FTS_WEIGHTS = (10.0, 5.0)
+
+# Найденный индекс (FTS-таблица, pg_trgm) запоминаем на движок навсегда,
+# отсутствие — на INDEX_RECHECK_INTERVAL секунд: индексы может построить
+# миграция, запущенная в другом процессе
+INDEX_RECHECK_INTERVAL = 60.0
+_index_checks: dict[Hashable, tuple[bool, float]] = {}
+
+TRGM_INSTALLED_SQL = text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+
+# Индекс, который остался невалидным после прерванного CREATE INDEX CONCURRENTLY
+INVALID_INDEX_SQL = text("""
+    SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = :name AND NOT i.indisvalid
+""")
+
+
+def search_terms(query: str) -> list[str]:
+    """Слова запроса в нижнем регистре (разделители — как у unicode61)."""
+    return re.findall(r"[^\W_]+", query.casefold())
+
+
+def _checked(key: Hashable, check: Callable[[], bool]) -> bool:
+    """Результат check() из кеша проверок индексов или свежий."""
+    now = time.monotonic()
+    cached = _index_checks.get(key)
+    if cached is not None:
+        found, checked_at = cached
+        if found or now - checked_at < INDEX_RECHECK_INTERVAL:
+            return found
+    
+    found = check()
+    _index_checks[key] = (found, now)
+    return found
+
+
+def forget_index_checks() -> None:
+    """Забываем результаты проверок — после миграции поисковых индексов."""
+    _index_checks.clear()
+
+
+def has_fts(engine: Engine, index: SearchIndex) -> bool:
+    """Есть ли FTS5-таблица индекса в этой SQLite."""
+    if engine.dialect.name != "sqlite":
+        return False
+    
+    return _checked((engine, index.fts_table), lambda: inspect(engine).has_table(index.fts_table))
+
+
+def _trgm_installed(engine: Engine) -> bool:
+    with engine.connect() as conn:
+        return conn.execute(TRGM_INSTALLED_SQL).first() is not None
+
+
+def has_trgm(engine: Engine) -> bool:
+    """Установлено ли в этой PostgreSQL расширение pg_trgm (word_similarity)."""
+    if engine.dialect.name != "postgresql":
+        return False
+    
+    return _checked((engine, "pg_trgm"), lambda: _trgm_installed(engine))
+
+
+def _fts_matches(index: SearchIndex, terms: list[str]):
+    """Подзапрос (id, rank) по FTS5: все слова как префиксы, rank — bm25."""
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS[:len(index.columns)])
+    return (
+        text(
+            f"SELECT rowid AS id, bm25({index.fts_table}, {weights}) AS rank "
+            f"FROM {index.fts_table} WHERE {index.fts_table} MATCH :match"
+        )
+        .bindparams(match=" ".join(f'"{term}"*' for term in terms))
+        .columns(id=Integer, rank=Float)
+        .subquery()
+    )
+
+
+def _ilike_condition(model, index: SearchIndex, terms: list[str]) -> ColumnElement:
+    """Каждое слово должно найтись хотя бы в одной из колонок."""
+    columns = [getattr(model, name) for name in index.columns]
+    return and_(*(
+        or_(*(column.ilike(f"%{term}%") for column in columns))
+        for term in terms
+    ))
+
+
+def search_condition(
+    engine: Engine,
+    model,
+    index: SearchIndex,
+    query: str
+) -> ColumnElement:
+    """
+    Условие WHERE для фильтра списка по строке поиска.
+    
+    Args:
+        engine: Движок, на котором выполнится запрос (db.get_bind())
+        model: Модель таблицы индекса
+        index: Описание индекса
+        query: Строка поиска
+    """
+    terms = search_terms(query)
+    if not terms:
+        return true()
+    
+    if has_fts(engine, index):
+        matches = _fts_matches(index, terms)
+        return model.id.in_(select(matches.c.id))
+    
+    return _ilike_condition(model, index, terms)
+
+
+def search_ranked(db, model, index: SearchIndex, query: str, limit: int, *conditions) -> list:
+    """
+    Лучшие совпадения по релевантности.
+    
+    conditions — дополнительные фильтры (например, только активные товары).
+    
+    Returns:
+        Не больше limit записей модели, самые релевантные первыми
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    
+    engine = db.get_bind()
+    
+    if has_fts(engine, index):
+        matches = _fts_matches(index, terms)
+        return db.scalars(
+            select(model)
+            .join(matches, matches.c.id == model.id)
+            .where(*conditions)
+            .order_by(matches.c.rank, model.id)
+            .limit(limit)
+        ).all()
+    
+    stmt = select(model).where(_ilike_condition(model, index, terms), *conditions)
+    
+    if has_trgm(engine):
+        # Близость запроса к слову в названии / второй колонке
+        phrase = " ".join(terms)
+        rank = func.greatest(*(
+            func.word_similarity(phrase, getattr(model, name))
+            for name in index.columns
+        ))
+        stmt = stmt.order_by(rank.desc(), model.id)
+    else:
+        stmt = stmt.order_by(getattr(model, index.columns[0]), model.id)
+    
+    return db.scalars(stmt.limit(limit)).all()
+
+
+def create_search_indexes(conn: Connection) -> bool:
+    """
+    Создаём поисковые индексы (миграция 0002).
+    
+    PostgreSQL: расширение pg_trgm и GIN-индексы по колонкам.
+    SQLite: FTS5-таблицы с внешним содержимым и триггеры, которые
+    держат их в актуальном состоянии при INSERT/UPDATE/DELETE.
+    
+    Соединение должно быть в режиме AUTOCOMMIT: CREATE INDEX CONCURRENTLY
+    не работает внутри транзакции. Все шаги идемпотентны.
+    
+    Returns:
+        False, если pg_trgm недоступно и индексы надо построить позже
+    """
+    if conn.dialect.name == "postgresql":
+        return _create_trigram_indexes(conn)
+    
+    if conn.dialect.name != "sqlite":
+        return True
+    
+    # Сборка SQLite без FTS5 — остаёмся на ILIKE
+    has_fts5 = conn.execute(
+        text("SELECT 1 FROM pragma_module_list WHERE name = 'fts5'")
+    ).first()
+    if not has_fts5:
+        return True
+    
+    for index in SEARCH_INDEXES:
+        fts, table = index.fts_table, index.table
+        columns = ", ".join(index.columns)
+        new_values = ", ".join(f"new.{c}" for c in index.columns)
+        old_values = ", ".join(f"old.{c}" for c in index.columns)
+        
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{columns}, content='{table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        ))
+        # Индексируем уже существующие строки
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+    
+    return True
+
+
+def _create_trigram_indexes(conn: Connection) -> bool:
+    """pg_trgm и GIN-индексы; False, если расширение недоступно."""
+    if not conn.execute(TRGM_INSTALLED_SQL).first():
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except DBAPIError as exc:
+            # Нет прав на CREATE EXTENSION или не установлен пакет contrib
+            logger.warning(
+                "Расширение pg_trgm недоступно, поиск работает через ILIKE без индекса: %s",
+                exc.orig
+            )
+            return False
+    
+    for index in SEARCH_INDEXES:
+        for column in index.columns:
+            name = f"ix_{index.table}_{column}_trgm"
+            if conn.execute(INVALID_INDEX_SQL, {"name": name}).first():
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {index.table} USING gin ({column} gin_trgm_ops)"
+            ))
+    
+    return True
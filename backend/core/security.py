@@ -4,14 +4,24 @@
 Используем bcrypt напрямую для совместимости с Python 3.14.
 """
 
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
 import bcrypt
 from jose import JWTError, jwt
 
+from .cache import TTLCache
 from .config import get_settings
 
+# Кеш проверенных токенов: один браузер присылает один и тот же токен
+# тысячи раз, а подпись и claims достаточно проверить однажды.
+# Ключ — SHA-256 токена: поиск идёт по хешу фиксированной длины, а не
+# посимвольным сравнением самого токена, так что время ответа ничего
+# не говорит о содержимом токенов в кеше.
+_token_cache = TTLCache(ttl=0, maxsize=max(1, get_settings().token_cache_size))
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -87,13 +97,29 @@ def decode_token(token: str) -> Optional[dict]:
         Расшифрованные данные или None если токен невалидный
     """
     settings = get_settings()
+    use_cache = settings.token_cache_size > 0
+    
+    if use_cache:
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        hit, payload = _token_cache.get(key)
+        if hit:
+            return dict(payload)
+    
     try:
         payload = jwt.decode(
             token, 
             settings.secret_key, 
             algorithms=[settings.algorithm]
         )
-        return payload
     except JWTError:
         # Токен невалидный или истёк
         return None
+    
+    # Запись живёт не дольше самого токена; токены без exp не кешируем
+    exp = payload.get("exp")
+    if use_cache and isinstance(exp, (int, float)):
+        ttl = exp - time.time()
+        if ttl > 0:
+            _token_cache.set(key, dict(payload), ttl=ttl)
+    
+    return payload
@@ -0,0 +1,219 @@
+"""
+Резерв товара на складе по статусу заказа.
+
+Остаток (Product.stock_quantity) уменьшается при переходе заказа
+в confirmed и возвращается, когда заказ с резервом отменяют
+(см. reserved_after). Все позиции списываются одним условным UPDATE:
+
+    UPDATE products
+    SET stock_quantity = stock_quantity - CASE id WHEN :id THEN :qty ... END
+    WHERE id IN (...) AND stock_quantity >= CASE id ... END
+    RETURNING id, stock_quantity
+
+Проверка и списание — один оператор, поэтому параллельные заказы
+не перезаписывают остаток друг друга (нет чтения-изменения-записи).
+Сам переход статуса вызывающий делает условным UPDATE orders по
+прочитанным status и stock_reserved: из двух параллельных переходов
+резерв двигает только тот, чей UPDATE изменил строку.
+Функции работают в транзакции вызывающего и не коммитят.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from models import OrderItem, Product
+
+# Статусы, переход в которые двигает резерв: confirmed резервирует,
+# cancelled возвращает; остальные переходы флаг резерва не меняют
+STOCK_MOVING_STATUSES = frozenset({"confirmed", "cancelled"})
+
+
+@dataclass(frozen=True)
+class StockShortage:
+    """Позиция, на которую не хватило остатка."""
+    product_id: int
+    requested: Decimal
+    available: Decimal
+
+
+class InsufficientStock(Exception):
+    """Остатка не хватило хотя бы по одной позиции — ничего не списано."""
+    
+    def __init__(self, shortages: list[StockShortage]):
+        super().__init__(f"Недостаточно остатка по {len(shortages)} позициям")
+        self.shortages = shortages
+
+
+def reserved_after(new_status: str, reserved: bool) -> bool:
+    """
+    Держит ли заказ резерв после перехода в new_status.
+    
+    Товар резервируется при переходе в confirmed и возвращается при
+    отмене. Старые заказы, прошедшие confirmed до появления резерва
+    (stock_reserved = 0), считаем рассчитанными: дальнейшие переходы
+    остатки не трогают.
+    
+    Args:
+        new_status: Статус после перехода
+        reserved: Держит ли заказ резерв сейчас
+    """
+    if new_status == "confirmed":
+        return True
+    if new_status == "cancelled":
+        return False
+    return reserved
+
+
+def order_quantities(db: Session, order_id: int) -> dict[int, Decimal]:
+    """Количество по каждому товару заказа (одинаковые позиции суммируем)."""
+    rows = db.execute(
+        select(OrderItem.product_id, func.sum(OrderItem.quantity))
+        .where(OrderItem.order_id == order_id)
+        .group_by(OrderItem.product_id)
+    ).all()
+    return {product_id: Decimal(quantity) for product_id, quantity in rows}
+
+
+def _shift_stock(db: Session, quantities: dict[int, Decimal], take: bool) -> dict[int, Decimal]:
+    """
+    Один UPDATE на все товары: списываем (take) или возвращаем количество.
+    
+    Списание применяется только к товарам, где остатка хватает.
+    
+    Returns:
+        Новые остатки изменённых товаров
+    """
+    if not quantities:
+        return {}
+    
+    delta = case(quantities, value=Product.id)
+    stmt = update(Product).where(Product.id.in_(quantities))
+    if take:
+        stmt = stmt.where(Product.stock_quantity >= delta).values(
+            stock_quantity=Product.stock_quantity - delta
+        )
+    else:
+        stmt = stmt.values(stock_quantity=Product.stock_quantity + delta)
+    stmt = (
+        stmt
+        .returning(Product.id, Product.stock_quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return {product_id: Decimal(stock) for product_id, stock in db.execute(stmt)}
+
+
+def reserve_stock(db: Session, quantities: dict[int, Decimal]) -> dict[int, Decimal]:
+    """
+    Списываем остатки под заказ: либо все позиции, либо ни одной.
+    
+    Raises:
+        InsufficientStock: Каких-то товаров не хватило (списанное возвращено)
+    
+    Returns:
+        Новые остатки товаров
+    """
+    reserved = _shift_stock(db, quantities, take=True)
+    
+    short = quantities.keys() - reserved.keys()
+    if not short:
+        return reserved
+    
+    # Возвращаем уже списанное тем же способом — одним UPDATE
+    _shift_stock(db, {product_id: quantities[product_id] for product_id in reserved}, take=False)
+    
+    available = dict(db.execute(
+        select(Product.id, Product.stock_quantity).where(Product.id.in_(short))
+    ).all())
+    raise InsufficientStock([
+        StockShortage(
+            product_id=product_id,
+            requested=quantities[product_id],
+            available=Decimal(available.get(product_id) or 0),
+        )
+        for product_id in sorted(short)
+    ])
+
+
+def release_stock(db: Session, quantities: dict[int, Decimal]) -> dict[int, Decimal]:
+    """Возвращаем зарезервированное количество на склад."""
+    return _shift_stock(db, quantities, take=False)
+
+
+def orders_quantities(db: Session, order_ids: list[int]) -> dict[int, dict[int, Decimal]]:
+    """Количество по товарам для нескольких заказов одним запросом."""
+    result: dict[int, dict[int, Decimal]] = {order_id: {} for order_id in order_ids}
+    if not order_ids:
+        return result
+    
+    rows = db.execute(
+        select(OrderItem.order_id, OrderItem.product_id, func.sum(OrderItem.quantity))
+        .where(OrderItem.order_id.in_(order_ids))
+        .group_by(OrderItem.order_id, OrderItem.product_id)
+    ).all()
+    for order_id, product_id, quantity in rows:
+        result[order_id][product_id] = Decimal(quantity)
+    return result
+
+
+def _total(quantities_by_order: dict[int, dict[int, Decimal]]) -> dict[int, Decimal]:
+    total: dict[int, Decimal] = {}
+    for quantities in quantities_by_order.values():
+        for product_id, quantity in quantities.items():
+            total[product_id] = total.get(product_id, Decimal(0)) + quantity
+    return total
+
+
+def reserve_orders(
+    db: Session,
+    quantities_by_order: dict[int, dict[int, Decimal]]
+) -> tuple[dict[int, list[StockShortage]], dict[int, Decimal]]:
+    """
+    Резервируем товар под несколько заказов.
+    
+    Сначала пробуем одним UPDATE на сумму всех заказов. Если чего-то
+    не хватает, резервируем по заказам по очереди: каждый заказ целиком
+    или никак.
+    
+    Returns:
+        (нехватки по заказам, которые не зарезервированы; новые остатки)
+    """
+    try:
+        return {}, reserve_stock(db, _total(quantities_by_order))
+    except InsufficientStock:
+        pass
+    
+    shortages: dict[int, list[StockShortage]] = {}
+    stock: dict[int, Decimal] = {}
+    for order_id, quantities in quantities_by_order.items():
+        try:
+            stock.update(reserve_stock(db, quantities))
+        except InsufficientStock as exc:
+            shortages[order_id] = exc.shortages
+    return shortages, stock
+
+
+def release_orders(
+    db: Session,
+    quantities_by_order: dict[int, dict[int, Decimal]]
+) -> dict[int, Decimal]:
+    """Возвращаем на склад товар нескольких заказов одним UPDATE."""
+    return release_stock(db, _total(quantities_by_order))
+
+
+def shift_order_stock(db: Session, order_id: int, reserve: bool) -> dict[int, Decimal]:
+    """
+    Резервируем (reserve=True) или возвращаем на склад товар заказа.
+    
+    Raises:
+        InsufficientStock: Резервируем, а товара не хватает
+    
+    Returns:
+        Новые остатки затронутых товаров
+    """
+    quantities = order_quantities(db, order_id)
+    if reserve:
+        return reserve_stock(db, quantities)
+    return release_stock(db, quantities)
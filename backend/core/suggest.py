@@ -0,0 +1,269 @@
+"""
+Подсказки при вводе (typeahead) для выбора товара и клиента.
+
+Индекс живёт в памяти процесса: отсортированный список ключей
+"слово\\x1fid" по всем словам названия, артикула/компании. Поиск —
+bisect по префиксу, без запроса к БД.
+
+    - строится в фоне при старте; пока не готов, подсказки идут через
+      поисковый индекс БД (core/search.py);
+    - маршруты записи клиентов и товаров обновляют его сразу (upsert/remove);
+      изменения из других воркеров подхватывает перестройка раз в
+      suggest_rebuild_interval секунд;
+    - если индекс не помещается в suggest_memory_mb, он отключается
+      и подсказки тоже идут через БД.
+"""
+
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Any, Optional
+
+from sqlalchemy import select
+
+from core.config import get_settings
+from core.search import CLIENT_SEARCH, PRODUCT_SEARCH, SearchIndex, search_ranked, search_terms
+from db.database import engine
+from models import Client, Product
+
+# Разделитель слова и id в ключе: меньше любого печатного символа,
+# поэтому все ключи одного слова идут подряд сразу за его префиксами
+KEY_SEPARATOR = "\x1f"
+
+# Сколько ключей просматриваем на запрос (короткий префикс может дать
+# сотни тысяч совпадений — ранжируем первые из них)
+SCAN_LIMIT = 2000
+
+
+class PrefixIndex:
+    """
+    Префиксный индекс одной таблицы.
+    
+    Для каждой записи хранит кортеж значений fields (их и отдаём
+    в подсказке), ищет по словам первых колонок — колонок поиска.
+    conditions отбирают записи при загрузке и при поиске через БД.
+    """
+    
+    def __init__(
+        self,
+        model,
+        search: SearchIndex,
+        fields: tuple[str, ...],
+        max_bytes: int,
+        conditions: tuple = ()
+    ):
+        self.model = model
+        self.search = search
+        self.fields = fields
+        self.max_bytes = max_bytes
+        self.conditions = conditions
+        self._keys: list[str] = []
+        self._records: dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        # Пока идёт загрузка, изменения копятся здесь и применяются после
+        self._pending: Optional[list[tuple[int, Optional[tuple]]]] = None
+        self.ready = False
+        self.over_budget = False
+        self.memory_bytes = 0
+        self.loaded_at = 0.0
+    
+    def _words(self, record: tuple) -> set[str]:
+        """Слова колонок поиска записи."""
+        words = set()
+        for value in record[:len(self.search.columns)]:
+            if value:
+                words.update(search_terms(str(value)))
+        return words
+    
+    def _record(self, obj: Any) -> tuple:
+        return tuple(getattr(obj, field) for field in self.fields)
+    
+    # --- Построение ---
+    
+    def load(self) -> None:
+        """Читаем таблицу целиком и строим индекс (в фоновом потоке)."""
+        with self._lock:
+            if self._pending is not None:
+                return  # Уже загружается
+            self._pending = []
+        
+        try:
+            keys, records, size, over_budget = self._read_table()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        
+        keys.sort()
+        
+        with self._lock:
+            self._keys, self._records = keys, records
+            self.memory_bytes = size
+            self.over_budget = over_budget
+            pending, self._pending = self._pending, None
+            for record_id, record in pending:
+                self._apply(record_id, record)
+            self.ready = not over_budget
+            self.loaded_at = time.monotonic()
+    
+    def _read_table(self) -> tuple[list[str], dict[int, tuple], int, bool]:
+        """Ключи и записи всей таблицы, объём в байтах и превышен ли бюджет."""
+        keys: list[str] = []
+        records: dict[int, tuple] = {}
+        size = 0
+        
+        columns = [self.model.id] + [getattr(self.model, field) for field in self.fields]
+        with engine.connect() as conn:
+            rows = conn.execution_options(yield_per=10000).execute(select(*columns).where(*self.conditions))
+            for row in rows:
+                record = tuple(row[1:])
+                records[row.id] = record
+                size += sys.getsizeof(record) + 100  # Кортеж и запись словаря
+                for word in self._words(record):
+                    key = f"{word}{KEY_SEPARATOR}{row.id}"
+                    keys.append(key)
+                    size += sys.getsizeof(key) + 8  # Строка и ссылка в списке
+                if size > self.max_bytes:
+                    return [], {}, 0, True
+        
+        return keys, records, size, False
+    
+    def load_in_background(self) -> None:
+        threading.Thread(target=self.load, name=f"suggest-{self.search.table}", daemon=True).start()
+    
+    # --- Изменения ---
+    
+    def upsert(self, obj: Any) -> None:
+        """Запись создана или изменена (вызывать после commit)."""
+        self._change(obj.id, self._record(obj))
+    
+    def remove(self, record_id: int) -> None:
+        """Запись удалена."""
+        self._change(record_id, None)
+    
+    def _change(self, record_id: int, record: Optional[tuple]) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((record_id, record))
+            if self.ready:
+                self._apply(record_id, record)
+    
+    def _apply(self, record_id: int, record: Optional[tuple]) -> None:
+        """Заменяем ключи записи (под self._lock)."""
+        old = self._records.pop(record_id, None)
+        if old is not None:
+            for word in self._words(old):
+                key = f"{word}{KEY_SEPARATOR}{record_id}"
+                i = bisect_left(self._keys, key)
+                if i < len(self._keys) and self._keys[i] == key:
+                    del self._keys[i]
+        
+        if record is not None:
+            self._records[record_id] = record
+            for word in self._words(record):
+                insort(self._keys, f"{word}{KEY_SEPARATOR}{record_id}")
+    
+    # --- Поиск ---
+    
+    def suggest(self, query: str, limit: int) -> Optional[list[dict]]:
+        """
+        Подсказки по началу слов.
+        
+        Returns:
+            Список записей (dict с id и fields) или None, если индекс
+            не готов и искать нужно через БД
+        """
+        settings = get_settings()
+        if (
+            self.ready
+            and self._pending is None
+            and time.monotonic() - self.loaded_at > settings.suggest_rebuild_interval
+        ):
+            self.load_in_background()
+        
+        if not self.ready:
+            return None
+        
+        terms = search_terms(query)
+        if not terms:
+            return []
+        
+        # Ищем по самому длинному слову, остальные проверяем по тексту записи:
+        # слово запроса должно быть началом какого-то слова
+        lookup = max(terms, key=len)
+        others = [
+            re.compile(r"(?<![^\W_])" + re.escape(term))
+            for term in terms if term != lookup
+        ]
+        columns = len(self.search.columns)
+        
+        with self._lock:
+            start = bisect_left(self._keys, lookup)
+            found: list[tuple[int, tuple]] = []
+            seen = set()
+            for key in self._keys[start:start + SCAN_LIMIT]:
+                if not key.startswith(lookup):
+                    break
+                record_id = int(key.rpartition(KEY_SEPARATOR)[2])
+                if record_id in seen:
+                    continue
+                seen.add(record_id)
+                record = self._records[record_id]
+                if others:
+                    text = " ".join(str(v) for v in record[:columns] if v).casefold()
+                    if not all(pattern.search(text) for pattern in others):
+                        continue
+                found.append((record_id, record))
+        
+        # Сначала записи, чьё название начинается с запроса, затем короткие
+        prefix = " ".join(terms)
+        
+        def rank(item: tuple[int, tuple]) -> tuple:
+            name = str(item[1][0] or "").casefold()
+            return (not name.startswith(prefix), len(name), name, item[0])
+        
+        found.sort(key=rank)
+        return [
+            {"id": record_id, **dict(zip(self.fields, record))}
+            for record_id, record in found[:limit]
+        ]
+    
+    def query_db(self, db, query: str, limit: int) -> list:
+        """Те же подсказки через поисковый индекс БД."""
+        return search_ranked(db, self.model, self.search, query, limit, *self.conditions)
+    
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "over_budget": self.over_budget,
+            "records": len(self._records),
+            "keys": len(self._keys),
+            "memory_mb": round(self.memory_bytes / 2**20, 2),
+            "age_seconds": round(time.monotonic() - self.loaded_at, 1) if self.ready else None,
+        }
+
+
+def create_suggest_indexes() -> tuple[PrefixIndex, PrefixIndex]:
+    """Индексы клиентов и товаров; бюджет памяти делим поровну."""
+    settings = get_settings()
+    budget = settings.suggest_memory_mb * 2**20 // 2
+    return (
+        PrefixIndex(Client, CLIENT_SEARCH, ("name", "company"), budget),
+        # Архивные товары в заказ не добавляют — их не подсказываем
+        PrefixIndex(
+            Product, PRODUCT_SEARCH, ("name", "sku", "price", "unit"), budget,
+            conditions=(Product.is_active == 1,)
+        ),
+    )
+
+
+client_suggest, product_suggest = create_suggest_indexes()
+
+
+def start_suggest_indexes() -> None:
+    """Запускаем фоновую загрузку индексов (при старте приложения)."""
+    if get_settings().suggest_enabled:
+        client_suggest.load_in_background()
+        product_suggest.load_in_background()
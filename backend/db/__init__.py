@@ -2,6 +2,10 @@
 Модуль db — работа с базой данных.
 """
 
-from .database import Base, engine, SessionLocal, get_db, init_db
+from .database import Base, engine, write_engine, SessionLocal, get_db, get_async_db, init_db
+from .pool import pool_stats
 
-__all__ = ["Base", "engine", "SessionLocal", "get_db", "init_db"]
+__all__ = [
+    "Base", "engine", "write_engine", "SessionLocal",
+    "get_db", "get_async_db", "init_db", "pool_stats",
+]
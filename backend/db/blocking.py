@@ -0,0 +1,38 @@
+"""
+Синхронный ввод-вывод из async-маршрутов.
+
+Async-маршруты выполняют общий синхронный код через AsyncSession.run_sync:
+он работает в гринлете прямо в потоке event loop. Запросы через сессию
+при этом отдают управление loop, а обращения к синхронным движкам
+(резерв номеров заказов, кеш отчётов в БД) — нет: весь воркер ждёт БД.
+
+run_blocking выполняет такой вызов в пуле потоков, если код идёт
+внутри run_sync, и напрямую — в синхронных маршрутах (они и так в пуле).
+Под threading.Lock его вызывать нельзя: пока вызов ждёт пул, другая
+корутина того же потока может попытаться взять этот же замок.
+"""
+
+import functools
+from typing import Callable, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+T = TypeVar("T")
+
+
+def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """Вызываем func, не блокируя event loop, если мы внутри run_sync."""
+    if in_greenlet():
+        return await_only(run_in_threadpool(func, *args, **kwargs))
+    return func(*args, **kwargs)
+
+
+def blocking(func: Callable[..., T]) -> Callable[..., T]:
+    """Декоратор: функция с синхронным вводом-выводом, вызываем через run_blocking."""
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs) -> T:
+        return run_blocking(func, *args, **kwargs)
+    
+    return wrapper
@@ -3,29 +3,125 @@
 Настройка подключения SQLAlchemy и управление сессиями.
 """
 
-from sqlalchemy import create_engine
+import asyncio
+from contextlib import asynccontextmanager, nullcontext
+
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from core.config import get_settings
+from .pool import engine_options
+from .replicas import ReplicaRouter
+from .sqlite import (
+    SingleWriterSession,
+    apply_sqlite_pragmas,
+    create_async_writer_engine,
+    create_writer_engine,
+    is_file_sqlite,
+)
 
 settings = get_settings()
 
-# Для SQLite нужны специальные настройки
-# check_same_thread=False разрешает использование в FastAPI
-connect_args = {}
-if settings.database_url.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
-
-# Создаём движок SQLAlchemy
+# Создаём движок SQLAlchemy; пул и параметры соединения — из настроек
 engine = create_engine(
     settings.database_url,
-    connect_args=connect_args,
-    echo=settings.debug  # Логируем SQL-запросы в debug-режиме
+    **engine_options(settings, settings.database_url)
 )
 
+# Движок для записей вне сессии (номера заказов, кеш отчётов).
+# Для SQLite-профиля — отдельный писатель с одним соединением
+write_engine = engine
+sqlite_profile = settings.sqlite_wal and is_file_sqlite(settings.database_url)
+if sqlite_profile:
+    apply_sqlite_pragmas(engine, settings)
+    if settings.sqlite_single_writer:
+        write_engine = create_writer_engine(settings.database_url, settings)
+
 # Фабрика сессий — каждый запрос получает свою сессию
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if write_engine is not engine:
+    SessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, bind=engine,
+        class_=SingleWriterSession, info={"writer_engine": write_engine}
+    )
+else:
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Реплики для чтения отчётов и списков (database_replica_urls);
+# без реплик всё читается с основной БД
+replica_engines = {
+    url: create_engine(url, **engine_options(settings, url))
+    for url in settings.database_replica_urls_list
+}
+replica_router = ReplicaRouter(
+    engine,
+    list(replica_engines.values()),
+    sticky_seconds=settings.replica_sticky_seconds,
+    max_lag_seconds=settings.replica_max_lag_seconds,
+    check_interval=settings.replica_lag_check_interval
+)
+
+
+def make_async_url(url: str) -> str:
+    """
+    URL для асинхронного движка: меняем драйвер на асинхронный.
+    
+    sqlite:// → sqlite+aiosqlite://, postgresql:// → postgresql+asyncpg://
+    """
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+# Асинхронный движок — только при async_db=True: маршруты заказов,
+# платежей и отчётов тогда работают без пула потоков Starlette
+async_engine = None
+AsyncSessionLocal = None
+# Синхронный движок (основной или реплики) → асинхронный к той же БД:
+# выбор реплики общий для синхронных и асинхронных маршрутов
+async_read_engines = {}
+# Асинхронный движок → семафор на размер его пула. Синхронные маршруты
+# ограничены пулом потоков Starlette, а корутин может быть сколько угодно:
+# без семафора сотни запросов ждали бы соединение и падали по pool_timeout
+async_session_slots = {}
+if settings.async_db:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    
+    async_url = make_async_url(settings.database_url)
+    async_engine = create_async_engine(
+        async_url,
+        **engine_options(settings, async_url, is_async=True)
+    )
+    if sqlite_profile and settings.sqlite_single_writer:
+        # Как и в синхронном режиме: записи идут через одно соединение,
+        # а не через весь пул, где каждая ждала бы блокировку busy_timeout
+        async_writer = create_async_writer_engine(async_url, settings)
+        AsyncSessionLocal = async_sessionmaker(
+            async_engine, autoflush=False,
+            sync_session_class=SingleWriterSession,
+            info={"writer_engine": async_writer.sync_engine}
+        )
+    else:
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+    async_read_engines[engine] = async_engine
+    for url, replica in replica_engines.items():
+        replica_async_url = make_async_url(url)
+        async_read_engines[replica] = create_async_engine(
+            replica_async_url,
+            **engine_options(settings, replica_async_url, is_async=True)
+        )
+    if sqlite_profile:
+        apply_sqlite_pragmas(async_engine.sync_engine, settings)
+    for async_read_engine in async_read_engines.values():
+        pool = async_read_engine.pool
+        if isinstance(pool, QueuePool):
+            async_session_slots[async_read_engine] = asyncio.Semaphore(
+                pool.size() + max(pool._max_overflow, 0)
+            )
 
 # Базовый класс для всех моделей
 Base = declarative_base()
@@ -48,14 +144,55 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Асинхронная сессия для FastAPI Depends (при async_db=True).
+    
+    Синхронный код (запросы, проводки) выполняется над ней через
+    await db.run_sync(func) — без отдельного потока на запрос.
+    """
+    async with open_async_session() as db:
+        yield db
+
+
+@asynccontextmanager
+async def open_async_session(bind=None):
+    """
+    AsyncSession на движке bind (по умолчанию основной).
+    
+    Сессия открывается, когда у движка есть свободное место в пуле:
+    лишние запросы ждут своей очереди, а не таймаута пула.
+    """
+    bind = bind or async_engine
+    async with async_session_slots.get(bind) or nullcontext():
+        async with AsyncSessionLocal(bind=bind) as db:
+            yield db
+
+
 def init_db():
     """
     Инициализация базы данных.
-    Создаёт все таблицы, если их ещё нет.
+    Создаёт все таблицы, если их ещё нет, и применяет миграции.
     Вызывается при старте приложения.
     """
     # Импортируем модели, чтобы SQLAlchemy знал о них
     import models  # noqa: F401
     
+    existing_tables = set(inspect(engine).get_table_names())
+    
     # Создаём таблицы
     Base.metadata.create_all(bind=engine)
+    
+    # Новые колонки, индексы и прочие изменения схемы — версионными миграциями
+    from .migrations import run_migrations
+    run_migrations(write_engine)
+    
+    # Новую таблицу выручки заполняем по платежам
+    from core.ledger import rebuild_daily_revenue
+    
+    if existing_tables and "daily_revenue" not in existing_tables:
+        db = SessionLocal()
+        try:
+            rebuild_daily_revenue(db)
+        finally:
+            db.close()
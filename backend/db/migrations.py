@@ -0,0 +1,325 @@
+"""
+Версионные миграции схемы.
+
+create_all создаёт только недостающие таблицы. Всё остальное (новые
+колонки и индексы на существующих таблицах, перенос данных)
+описывается миграцией: версия, описание и функция
+upgrade(conn). Применённые версии хранятся в таблице schema_migrations,
+при старте приложения (init_db) недостающие применяются по порядку.
+
+Миграция с transactional=False выполняется на соединении в режиме
+AUTOCOMMIT (например, CREATE INDEX CONCURRENTLY) и должна быть
+идемпотентной. Миграция может отложить себя (MigrationPostponed):
+версия не записывается, и при следующем запуске она повторится.
+
+Запуск вручную:
+    python -m db.migrations          # список миграций и их статус
+    python -m db.migrations upgrade  # применить недостающие
+"""
+
+import argparse
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import (
+    Column, DateTime, MetaData, String, Table, func, insert, inspect, literal, select, text, update
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from core.search import create_search_indexes, forget_index_checks
+from .database import Base
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory-блокировки PostgreSQL: воркеры применяют миграции по очереди
+MIGRATION_LOCK_KEY = 720_514_001
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", String(50), primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+
+class MigrationPostponed(Exception):
+    """Миграцию сейчас применить нельзя — повторим при следующем запуске."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    """Одна миграция: версия, описание и функция применения."""
+    version: str
+    description: str
+    upgrade: Callable[[Connection], None]
+    # False — upgrade выполняется вне транзакции, в режиме AUTOCOMMIT
+    transactional: bool = True
+
+
+def create_model_indexes(*names: str) -> Callable[[Connection], None]:
+    """
+    Миграция, создающая индексы, описанные в моделях.
+    
+    Индексы берутся из метаданных моделей по имени, поэтому модель
+    остаётся единственным местом, где записаны их колонки.
+    """
+    def upgrade(conn: Connection) -> None:
+        indexes = {
+            index.name: index
+            for table in Base.metadata.tables.values()
+            for index in table.indexes
+        }
+        for name in names:
+            indexes[name].create(conn, checkfirst=True)
+    
+    return upgrade
+
+
+def add_model_columns(
+    table_name: str,
+    *names: str,
+    backfill: Optional[Callable[[Connection], None]] = None
+) -> Callable[[Connection], None]:
+    """
+    Миграция, добавляющая в существующую таблицу колонки из модели.
+    
+    Тип, NOT NULL и значение по умолчанию берутся из модели. Колонки,
+    которые уже есть (таблицу создал create_all), пропускаются;
+    backfill(conn) вызывается, только если что-то добавлено.
+    Индексы по новым колонкам создаются здесь же.
+    """
+    def upgrade(conn: Connection) -> None:
+        table = Base.metadata.tables[table_name]
+        existing = {column["name"] for column in inspect(conn).get_columns(table_name)}
+        added = [name for name in names if name not in existing]
+        
+        for name in added:
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl(conn, table.c[name])}"))
+        for index in table.indexes:
+            if any(column.name in added for column in index.columns):
+                index.create(conn, checkfirst=True)
+        
+        if added and backfill is not None:
+            backfill(conn)
+    
+    return upgrade
+
+
+def column_ddl(conn: Connection, column: Column) -> str:
+    """Определение колонки для ALTER TABLE ADD COLUMN в диалекте соединения."""
+    ddl = f"{column.name} {column.type.compile(dialect=conn.dialect)}"
+    default = column.default
+    if default is not None and default.is_scalar:
+        # Литерал в синтаксисе диалекта, а не repr() Python
+        value = literal(default.arg, column.type).compile(
+            dialect=conn.dialect, compile_kwargs={"literal_binds": True}
+        )
+        ddl += f" DEFAULT {value}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    return ddl
+
+
+def backfill_order_balances(conn: Connection) -> None:
+    """paid_amount / debt_amount по проведённым платежам — одним UPDATE."""
+    from models import Order, Payment
+    
+    paid = (
+        select(func.coalesce(func.sum(Payment.amount), 0))
+        .where(Payment.order_id == Order.id, Payment.status == "completed")
+        .scalar_subquery()
+    )
+    conn.execute(update(Order).values(
+        paid_amount=paid,
+        debt_amount=func.coalesce(Order.total_amount, 0) - paid,
+        # Заполнение колонок — не изменение заказа
+        updated_at=Order.updated_at
+    ))
+
+
+def seed_catalog_version(conn: Connection) -> None:
+    """Строка версии товаров (id = 1), которую поднимает запись товаров."""
+    from models import ProductCatalogVersion
+    
+    table = ProductCatalogVersion.__table__
+    if conn.execute(select(table.c.id).where(table.c.id == 1)).first() is None:
+        conn.execute(insert(table).values(id=1, version=0))
+
+
+def seed_cache_versions(conn: Connection) -> None:
+    """Строки версий кеша отчётов: дальше версии только увеличиваются."""
+    from core.cache import CACHE_NAMESPACES
+    from models import CacheVersion
+    
+    table = CacheVersion.__table__
+    existing = set(conn.execute(select(table.c.namespace)).scalars())
+    missing = [ns for ns in CACHE_NAMESPACES if ns not in existing]
+    if missing:
+        conn.execute(insert(table), [{"namespace": ns, "version": 0} for ns in missing])
+
+
+def search_indexes(conn: Connection) -> None:
+    """Поисковые индексы; без pg_trgm миграция откладывается."""
+    created = create_search_indexes(conn)
+    # Поиск в этом процессе мог запомнить, что индексов нет
+    forget_index_checks()
+    if not created:
+        raise MigrationPostponed("расширение pg_trgm недоступно")
+
+
+MIGRATIONS = [
+    Migration(
+        "0001",
+        "Составные индексы под сортировку списков и фильтры отчётов",
+        create_model_indexes(
+            "ix_orders_created_at_id",
+            "ix_orders_client_id_created_at",
+            "ix_orders_status_created_at",
+            "ix_payments_created_at_id",
+            "ix_payments_status_payment_date",
+            "ix_payments_order_id_status",
+            "ix_clients_created_at_id",
+        ),
+    ),
+    Migration(
+        "0002",
+        "Поисковые индексы клиентов и товаров (pg_trgm / FTS5)",
+        search_indexes,
+        # GIN-индексы строятся CONCURRENTLY, без блокировки записи в таблицы
+        transactional=False,
+    ),
+    Migration(
+        "0003",
+        "Версия товаров для каталога в памяти",
+        seed_catalog_version,
+    ),
+    Migration(
+        "0004",
+        "Оплачено и долг заказа (orders.paid_amount, debt_amount)",
+        add_model_columns(
+            "orders", "paid_amount", "debt_amount", backfill=backfill_order_balances
+        ),
+    ),
+    Migration(
+        "0005",
+        "Флаг резерва товара заказа (orders.stock_reserved)",
+        add_model_columns("orders", "stock_reserved"),
+    ),
+    Migration(
+        "0006",
+        "Версии кеша отчётов (cache_versions)",
+        seed_cache_versions,
+    ),
+]
+
+
+def applied_versions(conn: Connection) -> set[str]:
+    """Версии, уже применённые к этой БД."""
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def run_migrations(engine: Engine) -> list[str]:
+    """
+    Применяем недостающие миграции по порядку, каждую в своей транзакции.
+    
+    Returns:
+        Список применённых версий
+    """
+    # Модели нужны, чтобы миграции видели описанные в них индексы
+    import models  # noqa: F401
+    
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        done = applied_versions(conn)
+    
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version in done:
+            continue
+        
+        apply = _apply_in_transaction if migration.transactional else _apply_autocommit
+        try:
+            if not apply(engine, migration):
+                continue
+        except IntegrityError:
+            # SQLite: запись о версии успел вставить другой воркер
+            continue
+        except MigrationPostponed as exc:
+            logger.warning("Миграция %s отложена: %s", migration.version, exc)
+            continue
+        
+        applied.append(migration.version)
+    
+    return applied
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(insert(schema_migrations).values(
+        version=migration.version,
+        description=migration.description,
+        applied_at=datetime.utcnow()
+    ))
+
+
+def _apply_in_transaction(engine: Engine, migration: Migration) -> bool:
+    """Миграция и запись о ней в одной транзакции; False — уже применена."""
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"),
+                {"key": MIGRATION_LOCK_KEY}
+            )
+            # Пока ждали блокировку, миграцию мог применить другой воркер
+            if migration.version in applied_versions(conn):
+                return False
+        
+        migration.upgrade(conn)
+        _record(conn, migration)
+    return True
+
+
+def _apply_autocommit(engine: Engine, migration: Migration) -> bool:
+    """
+    Миграция вне транзакции; версия записывается только после успеха.
+    
+    Блокировка PostgreSQL здесь сессионная и снимается явно.
+    """
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        postgres = conn.dialect.name == "postgresql"
+        if postgres:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            if migration.version in applied_versions(conn):
+                return False
+            migration.upgrade(conn)
+            _record(conn, migration)
+        finally:
+            if postgres:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    return True
+
+
+if __name__ == "__main__":
+    from .database import engine
+    
+    parser = argparse.ArgumentParser(description="Миграции схемы БД")
+    parser.add_argument("command", nargs="?", choices=["status", "upgrade"], default="status")
+    args = parser.parse_args()
+    
+    if args.command == "upgrade":
+        versions = run_migrations(engine)
+        print(f"Применено миграций: {len(versions)}" + (f" ({', '.join(versions)})" if versions else ""))
+    else:
+        with engine.begin() as conn:
+            schema_migrations.create(conn, checkfirst=True)
+            done = applied_versions(conn)
+        for migration in MIGRATIONS:
+            mark = "x" if migration.version in done else " "
+            print(f"[{mark}] {migration.version}  {migration.description}")
@@ -0,0 +1,160 @@
+"""
+Пул соединений с БД: параметры из Settings и метрики.
+
+Режимы (db_pooler):
+    internal — пул SQLAlchemy (QueuePool) с размером, переполнением,
+               pre-ping и recycle из настроек;
+    external — NullPool: соединение открывается на запрос и сразу
+               закрывается. Для serverless (Vercel, api/index.py) и
+               внешнего пулера вроде PgBouncer; asyncpg в этом режиме
+               не кеширует prepared statements.
+"""
+
+import threading
+import time
+from uuid import uuid4
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from core.config import Settings
+
+
+class PoolMetrics:
+    """Время ожидания соединения из пула и число ожиданий дольше секунды."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+    
+    def record(self, wait: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            if wait >= 1:
+                self.slow_checkouts += 1
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "slow_checkouts": self.slow_checkouts,
+                "wait_avg_ms": round(self.wait_total / (self.checkouts or 1) * 1000, 2),
+                "wait_max_ms": round(self.wait_max * 1000, 2),
+            }
+
+
+class MeteredPoolMixin:
+    """Замеряем, сколько запрос ждал свободное соединение."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+    
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.metrics.record(time.perf_counter() - started_at)
+
+
+class MeteredQueuePool(MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(settings: Settings, url: str, is_async: bool = False) -> dict:
+    """
+    Аргументы create_engine / create_async_engine по настройкам.
+    
+    Args:
+        settings: Настройки приложения
+        url: URL подключения (уже с нужным драйвером)
+        is_async: Для асинхронного движка
+    """
+    options = {
+        "echo": settings.debug,  # Логируем SQL-запросы в debug-режиме
+        "query_cache_size": settings.db_statement_cache_size,
+    }
+    connect_args = {}
+    
+    if url.startswith("sqlite"):
+        # check_same_thread=False разрешает использование в FastAPI
+        connect_args["check_same_thread"] = False
+    elif url.startswith("postgresql"):
+        if is_async:
+            server_settings = {"application_name": settings.db_application_name}
+            if settings.db_statement_timeout_ms:
+                server_settings["statement_timeout"] = str(settings.db_statement_timeout_ms)
+            connect_args["server_settings"] = server_settings
+            if settings.db_pooler == "external":
+                # PgBouncer в режиме transaction отдаёт каждую транзакцию
+                # случайному серверному соединению: prepared statements
+                # не кешируем, а имена делаем уникальными, чтобы не
+                # столкнуться с чужими на том же соединении
+                connect_args["prepared_statement_cache_size"] = 0
+                connect_args["prepared_statement_name_func"] = unique_statement_name
+            else:
+                connect_args["prepared_statement_cache_size"] = settings.db_prepared_statement_cache_size
+        else:
+            connect_args["application_name"] = settings.db_application_name
+            if settings.db_statement_timeout_ms:
+                connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+    
+    options["connect_args"] = connect_args
+    
+    # In-memory SQLite живёт в одном соединении — пул не настраиваем
+    if ":memory:" in url or "mode=memory" in url:
+        return options
+    
+    if settings.db_pooler == "external":
+        options["poolclass"] = NullPool
+        return options
+    
+    options.update(
+        poolclass=MeteredAsyncQueuePool if is_async else MeteredQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    return options
+
+
+def unique_statement_name() -> str:
+    """Имя prepared statement asyncpg, не повторяющееся между соединениями."""
+    return f"__asyncpg_{uuid4()}__"
+
+
+def pool_stats(engine) -> dict:
+    """
+    Состояние пула движка: занятые соединения, насыщение, ожидание.
+    
+    saturation — доля занятых соединений от pool_size + max_overflow;
+    при 1.0 новые запросы ждут до pool_timeout.
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    stats = {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        "saturation": round(checked_out / capacity, 3) if capacity > 0 else None,
+    }
+    if isinstance(pool, MeteredPoolMixin):
+        stats.update(pool.metrics.snapshot())
+    return stats
@@ -0,0 +1,134 @@
+"""
+Чтение с реплик PostgreSQL.
+
+Тяжёлые отчёты и списки можно читать с реплик (database_replica_urls).
+Реплики выбираются по кругу, но:
+    - пользователь, который только что что-то записал, ещё
+      replica_sticky_seconds секунд читает с основной БД — видит свои
+      изменения, даже если реплика не успела их получить;
+    - реплика с отставанием больше replica_max_lag_seconds (или
+      недоступная) пропускается; если подходящих нет — читаем с основной.
+"""
+
+import itertools
+import threading
+import time
+from typing import Hashable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+# Отставание реплики в секундах; 0, если все полученные изменения
+# уже применены (иначе простаивающая основная БД выглядела бы как отставание)
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery()
+             OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class Replica:
+    """Движок реплики и последнее измеренное отставание."""
+    
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        # До первой проверки реплику считаем отставшей — читаем с основной
+        self.lag = float("inf")
+        self.checked_at = float("-inf")
+
+
+class ReplicaRouter:
+    """Выбираем движок для чтения: реплика по кругу или основная БД."""
+    
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: list[Engine],
+        sticky_seconds: float = 5,
+        max_lag_seconds: float = 10,
+        check_interval: float = 5
+    ):
+        self.primary = primary
+        self.replicas = [Replica(engine) for engine in replicas]
+        self.sticky_seconds = sticky_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self._turn = itertools.count()
+        self._recent_writers: dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+    
+    def mark_write(self, key: Hashable) -> None:
+        """Пользователь key только что записал данные — читает с основной БД."""
+        if not self.replicas or key is None:
+            return
+        
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writers[key] = now + self.sticky_seconds
+            # Изредка чистим истёкшие отметки, чтобы словарь не рос
+            if len(self._recent_writers) > 10000:
+                self._recent_writers = {
+                    k: until for k, until in self._recent_writers.items() if until > now
+                }
+    
+    def choose(self, key: Optional[Hashable] = None) -> Engine:
+        """Движок для чтения пользователем key."""
+        if not self.replicas:
+            return self.primary
+        
+        if key is not None:
+            with self._lock:
+                until = self._recent_writers.get(key)
+            if until is not None and until > time.monotonic():
+                return self.primary
+        
+        start = next(self._turn)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if self._is_fresh(replica):
+                return replica.engine
+        
+        return self.primary
+    
+    def _is_fresh(self, replica: Replica) -> bool:
+        """
+        Отставание реплики в пределах порога.
+        
+        Отставание перемеряется не чаще check_interval в фоновом потоке:
+        выбор реплики не ждёт БД (и не блокирует event loop в async-режиме),
+        а до конца проверки действует прошлое значение.
+        """
+        now = time.monotonic()
+        if now - replica.checked_at >= self.check_interval:
+            replica.checked_at = now
+            threading.Thread(
+                target=self._check_lag, args=(replica,), name="replica-lag", daemon=True
+            ).start()
+        
+        return replica.lag <= self.max_lag_seconds
+    
+    @staticmethod
+    def _check_lag(replica: Replica) -> None:
+        try:
+            with replica.engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    replica.lag = float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+                else:
+                    replica.lag = 0.0
+        except SQLAlchemyError:
+            # Недоступная реплика — до следующей проверки считаем отставшей
+            replica.lag = float("inf")
+    
+    def stats(self) -> list[dict]:
+        """Последнее измеренное отставание каждой реплики."""
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "lag_seconds": replica.lag if replica.lag != float("inf") else None,
+                "in_rotation": replica.lag <= self.max_lag_seconds,
+            }
+            for replica in self.replicas
+        ]
@@ -0,0 +1,105 @@
+"""
+Профиль SQLite для продакшена (небольшие филиалы на одном файле БД).
+
+    - WAL: читатели не блокируют писателя и наоборот;
+    - synchronous=NORMAL, busy_timeout, mmap_size и cache_size на
+      каждом соединении;
+    - один писатель: все записи идут через отдельный движок с единственным
+      соединением. Пул этого движка и есть очередь писателей — запрос
+      ждёт соединение до sqlite_writer_timeout секунд, а не получает
+      «database is locked». Чтение остаётся параллельным на основном пуле.
+"""
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from core.config import Settings
+from .pool import MeteredAsyncQueuePool, MeteredQueuePool
+
+
+def is_file_sqlite(url: str) -> bool:
+    """SQLite в файле (in-memory БД профиль не нужен)."""
+    return url.startswith("sqlite") and ":memory:" not in url and "mode=memory" not in url
+
+
+def apply_sqlite_pragmas(engine: Engine, settings: Settings) -> None:
+    """Выставляем PRAGMA на каждом новом соединении движка."""
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        # Отрицательное значение — размер в КиБ, а не в страницах
+        f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}",
+    ]
+    
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def create_writer_engine(url: str, settings: Settings) -> Engine:
+    """Движок писателя: одно соединение, остальные ждут его в очереди пула."""
+    writer = create_engine(url, poolclass=MeteredQueuePool, **writer_options(settings))
+    apply_sqlite_pragmas(writer, settings)
+    return writer
+
+
+def create_async_writer_engine(url: str, settings: Settings):
+    """
+    Асинхронный писатель для async-режима (URL уже с aiosqlite).
+    
+    Корутины ждут его соединение в очереди пула, не занимая event loop.
+    Синхронный писатель остаётся для записей вне сессии, так что
+    соединений-писателей всего два, а не весь асинхронный пул.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+    
+    writer = create_async_engine(url, poolclass=MeteredAsyncQueuePool, **writer_options(settings))
+    apply_sqlite_pragmas(writer.sync_engine, settings)
+    return writer
+
+
+def writer_options(settings: Settings) -> dict:
+    """Параметры движка писателя; метрики ожидания — это длина очереди писателей."""
+    return {
+        "connect_args": {"check_same_thread": False},
+        "pool_size": 1,
+        "max_overflow": 0,
+        "pool_timeout": settings.sqlite_writer_timeout,
+        "echo": settings.debug,
+    }
+
+
+class SingleWriterSession(Session):
+    """
+    Сессия, которая пишет через соединение писателя.
+    
+    Чтение идёт через основной движок. С первого INSERT/UPDATE/DELETE
+    или flush сессия до конца транзакции переключается на писателя —
+    так она видит свои незакоммиченные изменения. Движок писателя
+    передаётся через sessionmaker(info={"writer_engine": ...}); для
+    AsyncSession — sync_engine асинхронного писателя.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        writer_engine = self.info.get("writer_engine")
+        if writer_engine is not None:
+            is_write = self._flushing or getattr(clause, "is_dml", False)
+            if is_write or self.info.get("writer"):
+                self.info["writer"] = True
+                return writer_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(SingleWriterSession, "after_transaction_end")
+def _release_writer(session: Session, transaction) -> None:
+    """После коммита или отката снова читаем через основной движок."""
+    if transaction.parent is None:
+        session.info.pop("writer", None)
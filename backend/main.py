@@ -6,11 +6,16 @@ ERP-Lite — Система автоматизации бизнеса.
 """
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from core.config import get_settings
-from db.database import init_db
+from core.catalog import product_catalog
+from core.dependencies import CurrentUser, get_admin_user
+from core.security import decode_token
+from core.suggest import client_suggest, product_suggest, start_suggest_indexes
+from db.database import async_engine, engine, init_db, replica_router, write_engine
+from db.pool import pool_stats
 from api import (
     auth_router,
     clients_router,
@@ -18,6 +23,9 @@ from api import (
     orders_router,
     payments_router,
     reports_router,
+    async_orders_router,
+    async_payments_router,
+    async_reports_router,
 )
 
 
@@ -29,8 +37,12 @@ async def lifespan(app: FastAPI):
     """
     # Startup: создаём таблицы, если их нет
     init_db()
+    # Индексы подсказок строятся в фоне, старт их не ждёт
+    start_suggest_indexes()
     yield
-    # Shutdown: тут можно закрыть соединения
+    # Shutdown: закрываем соединения асинхронного движка
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 # Получаем настройки
@@ -68,13 +80,34 @@ app.add_middleware(
 )
 
 
+# С репликами запоминаем, кто только что записывал данные:
+# его чтения какое-то время идут на основную БД
+if replica_router.replicas:
+    @app.middleware("http")
+    async def mark_replica_writes(request: Request, call_next):
+        response = await call_next(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            authorization = request.headers.get("authorization", "")
+            if authorization.lower().startswith("bearer "):
+                payload = decode_token(authorization[7:]) or {}
+                replica_router.mark_write(payload.get("sub"))
+        return response
+
+
 # Подключаем роутеры API
 app.include_router(auth_router, prefix="/api")
 app.include_router(clients_router, prefix="/api")
 app.include_router(products_router, prefix="/api")
-app.include_router(orders_router, prefix="/api")
-app.include_router(payments_router, prefix="/api")
-app.include_router(reports_router, prefix="/api")
+
+# Заказы, платежи и отчёты — синхронные или на AsyncSession (async_db)
+if settings.async_db:
+    app.include_router(async_orders_router, prefix="/api")
+    app.include_router(async_payments_router, prefix="/api")
+    app.include_router(async_reports_router, prefix="/api")
+else:
+    app.include_router(orders_router, prefix="/api")
+    app.include_router(payments_router, prefix="/api")
+    app.include_router(reports_router, prefix="/api")
 
 
 @app.get("/", tags=["Система"])
@@ -94,6 +127,34 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/db-pool", tags=["Система"])
+def db_pool_health(current_user: CurrentUser = Depends(get_admin_user)):
+    """Состояние пула соединений: занятость, насыщение, ожидание."""
+    stats = {"sync": pool_stats(engine)}
+    if write_engine is not engine:
+        stats["writer"] = pool_stats(write_engine)
+    if async_engine is not None:
+        stats["async"] = pool_stats(async_engine.sync_engine)
+    if replica_router.replicas:
+        stats["replicas"] = replica_router.stats()
+    return stats
+
+
+@app.get("/health/suggest", tags=["Система"])
+def suggest_health(current_user: CurrentUser = Depends(get_admin_user)):
+    """Индексы подсказок: готовность, размер и занятая память."""
+    return {
+        "clients": client_suggest.stats(),
+        "products": product_suggest.stats(),
+    }
+
+
+@app.get("/health/catalog", tags=["Система"])
+def catalog_health(current_user: CurrentUser = Depends(get_admin_user)):
+    """Каталог товаров в памяти: размер, память, число перечитываний."""
+    return product_catalog.stats()
+
+
 # Для запуска напрямую через python main.py
 if __name__ == "__main__":
     import uvicorn
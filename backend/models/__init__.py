@@ -5,16 +5,23 @@
 
 from .user import User
 from .client import Client
-from .product import Product
-from .order import Order, OrderItem
+from .product import Product, ProductCatalogVersion
+from .order import Order, OrderItem, OrderNumberCounter
 from .payment import Payment
+from .revenue import DailyRevenue
+from .cache import CacheEntry, CacheVersion
 
 # Экспортируем все модели
 __all__ = [
     "User",
     "Client", 
     "Product",
+    "ProductCatalogVersion",
     "Order",
     "OrderItem",
+    "OrderNumberCounter",
     "Payment",
+    "DailyRevenue",
+    "CacheEntry",
+    "CacheVersion",
 ]
@@ -0,0 +1,40 @@
+"""
+Модели общего кеша.
+Используются, когда кеш отчётов хранится в БД и общий для всех воркеров.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Text
+
+from db.database import Base
+
+
+class CacheEntry(Base):
+    """
+    Таблица закешированных ответов.
+    
+    Значение хранится в JSON, устаревшие записи удаляются при записи новых.
+    """
+    __tablename__ = "cache_entries"
+    
+    key = Column(String(255), primary_key=True)
+    value = Column(Text, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<CacheEntry {self.key}>"
+
+
+class CacheVersion(Base):
+    """
+    Таблица версий данных для инвалидации кеша.
+    
+    Маршруты записи увеличивают версию своей области (orders, payments,
+    clients, products), и записи кеша со старой версией больше не читаются.
+    """
+    __tablename__ = "cache_versions"
+    
+    namespace = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<CacheVersion {self.namespace}={self.version}>"
@@ -4,7 +4,7 @@
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 
 from db.database import Base
@@ -18,6 +18,10 @@ class Client(Base):
     Хранятся контактные данные и реквизиты.
     """
     __tablename__ = "clients"
+    __table_args__ = (
+        # Список клиентов сортируется по (created_at, id)
+        Index("ix_clients_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
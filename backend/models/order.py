@@ -4,7 +4,7 @@
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 
 from db.database import Base
@@ -26,6 +26,13 @@ class Order(Base):
         - cancelled: отменён
     """
     __tablename__ = "orders"
+    __table_args__ = (
+        # Список заказов: сортировка по (created_at, id), с фильтром
+        # по клиенту или статусу — без сортировки в памяти
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_client_id_created_at", "client_id", "created_at"),
+        Index("ix_orders_status_created_at", "status", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -43,6 +50,13 @@ class Order(Base):
     total_amount = Column(Numeric(15, 2), default=0)  # Общая сумма
     currency = Column(String(10), default="KZT")
     
+    # Оплата и задолженность — обновляются вместе с платежами (см. core/ledger.py)
+    paid_amount = Column(Numeric(15, 2), nullable=False, default=0)
+    debt_amount = Column(Numeric(15, 2), nullable=False, default=0, index=True)
+    
+    # Товар заказа списан с остатков (см. core/stock.py): 1 — да, 0 — нет
+    stock_reserved = Column(Integer, nullable=False, default=0)
+    
     # Доставка
     delivery_address = Column(Text, nullable=True)
     delivery_date = Column(DateTime, nullable=True)
@@ -61,16 +75,6 @@ class Order(Base):
     
     def __repr__(self):
         return f"<Order {self.order_number}>"
-    
-    @property
-    def paid_amount(self) -> float:
-        """Сумма всех оплат по заказу."""
-        return sum(p.amount for p in self.payments if p.status == "completed")
-    
-    @property
-    def debt_amount(self) -> float:
-        """Задолженность по заказу."""
-        return float(self.total_amount or 0) - self.paid_amount
 
 
 class OrderItem(Base):
@@ -100,3 +104,20 @@ class OrderItem(Base):
     
     def __repr__(self):
         return f"<OrderItem order={self.order_id} product={self.product_id}>"
+
+
+class OrderNumberCounter(Base):
+    """
+    Счётчик номеров заказов по дням.
+    
+    Одна строка на день: last_value — последний выданный номер.
+    Номера резервируются блоками (см. core/order_numbers.py), поэтому
+    параллельные запросы и воркеры не получают одинаковых номеров.
+    """
+    __tablename__ = "order_number_counters"
+    
+    day = Column(String(8), primary_key=True)  # YYYYMMDD
+    last_value = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<OrderNumberCounter {self.day}={self.last_value}>"
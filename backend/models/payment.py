@@ -4,7 +4,7 @@
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 
 from db.database import Base
@@ -27,6 +27,14 @@ class Payment(Base):
         - cancelled: отменён
     """
     __tablename__ = "payments"
+    __table_args__ = (
+        # Список платежей сортируется по (created_at, id)
+        Index("ix_payments_created_at_id", "created_at", "id"),
+        # Проведённые платежи по датам (пересборка daily_revenue)
+        Index("ix_payments_status_payment_date", "status", "payment_date"),
+        # Платежи заказа по статусу (сверка оплат, фильтр списка)
+        Index("ix_payments_order_id_status", "order_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
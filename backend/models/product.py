@@ -45,3 +45,19 @@ class Product(Base):
     
     def __repr__(self):
         return f"<Product {self.name} ({self.sku})>"
+
+
+class ProductCatalogVersion(Base):
+    """
+    Версия товаров для каталога в памяти (core/catalog.py).
+    
+    Одна строка (id = 1). version поднимается в той же транзакции,
+    что и запись товара, — по ней воркеры узнают, что их каталог устарел.
+    """
+    __tablename__ = "product_catalog_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<ProductCatalogVersion {self.version}>"
@@ -0,0 +1,29 @@
+"""
+Модель дневной выручки.
+Предрасчитанная сводка проведённых платежей для отчётов.
+"""
+
+from sqlalchemy import Column, Integer, String, Date, Numeric
+
+from db.database import Base
+
+
+class DailyRevenue(Base):
+    """
+    Таблица выручки по дням и валютам.
+    
+    Обновляется при проведении и отмене платежей (см. core/ledger.py)
+    и может быть пересобрана из платежей командой
+    python -m core.ledger --rebuild-revenue.
+    """
+    __tablename__ = "daily_revenue"
+    
+    day = Column(Date, primary_key=True)
+    currency = Column(String(10), primary_key=True)
+    
+    # Сумма и количество проведённых платежей за день
+    revenue = Column(Numeric(15, 2), nullable=False, default=0)
+    payments_count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<DailyRevenue {self.day} {self.currency}={self.revenue}>"
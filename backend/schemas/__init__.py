@@ -6,25 +6,35 @@ from .user import (
     UserCreate, UserUpdate, UserRead,
     Token, TokenData, LoginRequest
 )
-from .client import ClientCreate, ClientUpdate, ClientRead, ClientList
-from .product import ProductCreate, ProductUpdate, ProductRead, ProductList
+from .client import ClientCreate, ClientUpdate, ClientRead, ClientList, ClientSuggestion
+from .product import ProductCreate, ProductUpdate, ProductRead, ProductList, ProductSuggestion
 from .order import (
     OrderCreate, OrderUpdate, OrderRead, OrderList,
-    OrderItemCreate, OrderItemRead
+    OrderItemCreate, OrderItemRead,
+    OrderImportRow, OrderImportReport,
+    OrderStatusChangeItem, OrderStatusBulk, OrderStatusResult,
+    OrderStatusBulkReport, StockShortageRead
+)
+from .payment import (
+    PaymentCreate, PaymentUpdate, PaymentRead, PaymentList,
+    PaymentStatementLine, PaymentConfirmBulk, PaymentConfirmResult, PaymentConfirmReport
 )
-from .payment import PaymentCreate, PaymentUpdate, PaymentRead, PaymentList
 
 __all__ = [
     # Пользователи
     "UserCreate", "UserUpdate", "UserRead",
     "Token", "TokenData", "LoginRequest",
     # Клиенты
-    "ClientCreate", "ClientUpdate", "ClientRead", "ClientList",
+    "ClientCreate", "ClientUpdate", "ClientRead", "ClientList", "ClientSuggestion",
     # Товары
-    "ProductCreate", "ProductUpdate", "ProductRead", "ProductList",
+    "ProductCreate", "ProductUpdate", "ProductRead", "ProductList", "ProductSuggestion",
     # Заказы
     "OrderCreate", "OrderUpdate", "OrderRead", "OrderList",
     "OrderItemCreate", "OrderItemRead",
+    "OrderImportRow", "OrderImportReport",
+    "OrderStatusChangeItem", "OrderStatusBulk", "OrderStatusResult",
+    "OrderStatusBulkReport", "StockShortageRead",
     # Платежи
     "PaymentCreate", "PaymentUpdate", "PaymentRead", "PaymentList",
+    "PaymentStatementLine", "PaymentConfirmBulk", "PaymentConfirmResult", "PaymentConfirmReport",
 ]
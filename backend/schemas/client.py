@@ -49,6 +49,17 @@ class ClientRead(ClientBase):
 class ClientList(BaseModel):
     """Схема для списка клиентов с пагинацией."""
     items: list[ClientRead]
-    total: int
+    total: Optional[int] = None  # None, если запрошено include_total=false
     page: int
     per_page: int
+    next_cursor: Optional[str] = None  # Курсор следующей страницы
+
+
+class ClientSuggestion(BaseModel):
+    """Подсказка при выборе клиента."""
+    id: int
+    name: str
+    company: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
@@ -18,8 +18,8 @@ class OrderItemBase(BaseModel):
 
 
 class OrderItemCreate(OrderItemBase):
-    """Схема для добавления позиции в заказ."""
-    pass
+    """Схема для добавления позиции в заказ (без unit_price — цена из каталога)."""
+    unit_price: Optional[Decimal] = Field(None, ge=0)
 
 
 class OrderItemRead(OrderItemBase):
@@ -81,6 +81,63 @@ class OrderRead(OrderBase):
 class OrderList(BaseModel):
     """Схема для списка заказов."""
     items: list[OrderRead]
-    total: int
+    total: Optional[int] = None  # None, если запрошено include_total=false
     page: int
     per_page: int
+    next_cursor: Optional[str] = None  # Курсор следующей страницы
+
+
+# --- Пакетный импорт ---
+
+class OrderImportRow(BaseModel):
+    """Результат импорта одной записи."""
+    row: int  # Номер строки во входном файле
+    status: str  # created, error
+    order_id: Optional[int] = None
+    order_number: Optional[str] = None
+    error: Optional[str] = None
+
+
+class OrderImportReport(BaseModel):
+    """Отчёт о пакетном импорте заказов."""
+    created: int
+    failed: int
+    rows: list[OrderImportRow]
+
+
+# --- Массовая смена статуса ---
+
+class OrderStatusChangeItem(BaseModel):
+    """Заказ и статус, в который его перевести."""
+    order_id: int
+    status: str
+
+
+class OrderStatusBulk(BaseModel):
+    """Запрос массовой смены статуса."""
+    items: list[OrderStatusChangeItem] = Field(..., min_length=1, max_length=10000)
+
+
+class StockShortageRead(BaseModel):
+    """Позиция, на которую не хватило остатка."""
+    product_id: int
+    requested: Decimal
+    available: Decimal
+
+
+class OrderStatusResult(BaseModel):
+    """Результат смены статуса одного заказа."""
+    order_id: int
+    status: str  # updated, unchanged, error
+    from_status: Optional[str] = None
+    to_status: Optional[str] = None
+    error: Optional[str] = None
+    shortages: list[StockShortageRead] = []
+
+
+class OrderStatusBulkReport(BaseModel):
+    """Отчёт о массовой смене статуса."""
+    updated: int
+    unchanged: int
+    failed: int
+    results: list[OrderStatusResult]
@@ -2,10 +2,10 @@
 Схемы платежей для валидации.
 """
 
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class PaymentBase(BaseModel):
@@ -49,6 +49,45 @@ class PaymentRead(PaymentBase):
 class PaymentList(BaseModel):
     """Схема для списка платежей."""
     items: list[PaymentRead]
-    total: int
+    total: Optional[int] = None  # None, если запрошено include_total=false
     page: int
     per_page: int
+    next_cursor: Optional[str] = None  # Курсор следующей страницы
+
+
+# --- Массовое подтверждение ---
+
+class PaymentStatementLine(BaseModel):
+    """Строка банковской выписки: платёж ищется по заказу, сумме и дате."""
+    order_number: str
+    amount: Decimal = Field(..., gt=0)
+    payment_date: date
+
+
+class PaymentConfirmBulk(BaseModel):
+    """Запрос массового подтверждения: ID платежей и/или строки выписки."""
+    payment_ids: list[int] = Field(default_factory=list, max_length=50000)
+    lines: list[PaymentStatementLine] = Field(default_factory=list, max_length=50000)
+    
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        """Пустой запрос — скорее всего ошибка клиента."""
+        if not self.payment_ids and not self.lines:
+            raise ValueError("Нужно передать payment_ids или lines")
+        return self
+
+
+class PaymentConfirmResult(BaseModel):
+    """Результат по одному ID или строке выписки."""
+    source: str  # id, line
+    index: int  # Позиция в payment_ids или lines
+    status: str  # confirmed, error
+    payment_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class PaymentConfirmReport(BaseModel):
+    """Отчёт о массовом подтверждении платежей."""
+    confirmed: int
+    failed: int
+    results: list[PaymentConfirmResult]
@@ -52,6 +52,19 @@ class ProductRead(ProductBase):
 class ProductList(BaseModel):
     """Схема для списка товаров."""
     items: list[ProductRead]
-    total: int
+    total: Optional[int] = None  # None, если запрошено include_total=false
     page: int
     per_page: int
+    next_cursor: Optional[str] = None  # Курсор следующей страницы
+
+
+class ProductSuggestion(BaseModel):
+    """Подсказка при выборе товара в заказе."""
+    id: int
+    name: str
+    sku: Optional[str] = None
+    price: Decimal
+    unit: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
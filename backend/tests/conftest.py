@@ -0,0 +1,137 @@
+"""
+Общие фикстуры тестов.
+
+Приложение поднимается один раз на временной SQLite-базе; каждый тест
+создаёт свои данные через API, поэтому порядок тестов не важен.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Настройки читаются при импорте приложения — задаём их до него
+_tmp_dir = tempfile.mkdtemp(prefix="erp-lite-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/test.db"
+os.environ["DEBUG"] = "false"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from main import app
+from core.suggest import client_suggest, product_suggest
+from db.database import async_read_engines, engine, write_engine
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        # Индексы подсказок грузятся в фоне — ждём, чтобы их запросы
+        # не попадали в подсчёт запросов тестов
+        deadline = time.monotonic() + 10
+        while not (client_suggest.ready and product_suggest.ready) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    credentials = {"email": "tests@example.kz", "password": "secret123"}
+    response = client.post("/api/auth/register", json=credentials)
+    assert response.status_code == 201, response.text
+    response = client.post(
+        "/api/auth/login",
+        data={"username": credentials["email"], "password": credentials["password"]}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    """Заголовки администратора: роль выдаём напрямую в БД."""
+    from db.database import SessionLocal
+    from models import User
+    
+    credentials = {"email": "admin@example.kz", "password": "secret123"}
+    assert client.post("/api/auth/register", json=credentials).status_code == 201
+    with SessionLocal() as db:
+        db.query(User).filter(User.email == credentials["email"]).one().role = "admin"
+        db.commit()
+    response = client.post(
+        "/api/auth/login",
+        data={"username": credentials["email"], "password": credentials["password"]}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def api(client, auth_headers):
+    """Запрос с авторизацией; expect — ожидаемый код ответа."""
+    
+    def request(method: str, url: str, expect: int = None, **kwargs):
+        kwargs["headers"] = {**auth_headers, **kwargs.get("headers", {})}
+        response = client.request(method, url, **kwargs)
+        if expect is not None:
+            assert response.status_code == expect, (url, response.status_code, response.text)
+        return response
+    
+    return request
+
+
+@pytest.fixture
+def make_product(api):
+    def create(price="100", stock="1000", **fields):
+        data = {"name": "Товар", "price": price, "stock_quantity": stock, **fields}
+        return api("POST", "/api/products", 201, json=data).json()
+    
+    return create
+
+
+@pytest.fixture
+def make_order(api):
+    def create(client_id: int, product: dict, quantity="1", **fields):
+        data = {
+            "client_id": client_id,
+            "items": [{"product_id": product["id"], "quantity": quantity, "unit_price": product["price"]}],
+            **fields,
+        }
+        return api("POST", "/api/orders", 201, json=data).json()
+    
+    return create
+
+
+@pytest.fixture
+def customer(api):
+    """Новый клиент для теста."""
+    return api("POST", "/api/clients", 201, json={"name": "Тестовый клиент"}).json()
+
+
+@contextmanager
+def _count_queries():
+    """Считаем SQL-запросы ко всем движкам (и async) внутри блока."""
+    statements: list[str] = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    engines = {engine, write_engine}
+    engines.update(async_engine.sync_engine for async_engine in async_read_engines.values())
+    for target in engines:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def count_queries():
+    """with count_queries() as statements: ... — выполненные SQL-запросы."""
+    return _count_queries
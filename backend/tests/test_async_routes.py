@@ -0,0 +1,41 @@
+"""
+Асинхронные маршруты повторяют синхронные: те же пути, методы, схемы
+ответа и параметры, но на асинхронных зависимостях.
+"""
+
+import inspect
+
+import pytest
+from fastapi.routing import APIRoute
+
+from api import (
+    async_orders_router, async_payments_router, async_reports_router,
+    orders_router, payments_router, reports_router
+)
+from core.dependencies import get_current_user
+
+
+def route_table(router) -> dict:
+    return {
+        (route.path, tuple(sorted(route.methods))): route
+        for route in router.routes if isinstance(route, APIRoute)
+    }
+
+
+@pytest.mark.parametrize("sync_router, async_router", [
+    (orders_router, async_orders_router),
+    (payments_router, async_payments_router),
+    (reports_router, async_reports_router),
+])
+def test_async_router_mirrors_sync_router(sync_router, async_router):
+    sync_routes, async_routes = route_table(sync_router), route_table(async_router)
+    
+    assert async_routes.keys() == sync_routes.keys()
+    for key, route in async_routes.items():
+        source = sync_routes[key]
+        assert inspect.iscoroutinefunction(route.endpoint)
+        assert route.response_model == source.response_model
+        assert route.status_code == source.status_code
+        assert inspect.signature(route.endpoint).parameters.keys() == \
+            inspect.signature(source.endpoint).parameters.keys()
+        assert get_current_user not in [dependency.call for dependency in route.dependant.dependencies]
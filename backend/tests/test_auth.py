@@ -0,0 +1,52 @@
+"""
+Авторизация: кеш пользователя сбрасывается после commit его изменения.
+"""
+
+from core.dependencies import user_cache
+from db.database import SessionLocal
+from models import User
+
+
+def login(client, email: str) -> dict:
+    credentials = {"email": email, "password": "secret123"}
+    client.post("/api/auth/register", json=credentials)
+    response = client.post("/api/auth/login", data={"username": email, "password": "secret123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_deactivated_user_is_not_recached_before_commit(client):
+    headers = login(client, "deactivate@example.kz")
+    user_id = client.get("/api/auth/me", headers=headers).json()["id"]
+    
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        user.is_active = False
+        db.flush()
+        
+        # Между flush и commit параллельный запрос ещё видит старую строку
+        assert client.get("/api/auth/me", headers=headers).status_code == 200
+        assert user_cache.get(user_id)[0]
+        
+        db.commit()
+    finally:
+        db.close()
+    
+    assert not user_cache.get(user_id)[0]
+    assert client.get("/api/auth/me", headers=headers).status_code == 403
+
+
+def test_rolled_back_change_keeps_cached_user(client):
+    headers = login(client, "rollback@example.kz")
+    user_id = client.get("/api/auth/me", headers=headers).json()["id"]
+    
+    db = SessionLocal()
+    try:
+        db.get(User, user_id).is_active = False
+        db.flush()
+        db.rollback()
+    finally:
+        db.close()
+    
+    assert user_cache.get(user_id)[0]
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
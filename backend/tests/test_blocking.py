@@ -0,0 +1,24 @@
+"""
+run_blocking: синхронный ввод-вывод внутри run_sync уходит из потока event loop.
+"""
+
+import asyncio
+import threading
+
+from sqlalchemy.util.concurrency import greenlet_spawn
+
+from db.blocking import run_blocking
+
+
+def test_run_blocking_offloads_inside_run_sync():
+    async def main():
+        loop_thread = threading.get_ident()
+        worker_thread = await greenlet_spawn(run_blocking, threading.get_ident)
+        return loop_thread, worker_thread
+    
+    loop_thread, worker_thread = asyncio.run(main())
+    assert worker_thread != loop_thread
+
+
+def test_run_blocking_calls_directly_outside_run_sync():
+    assert run_blocking(threading.get_ident) == threading.get_ident()
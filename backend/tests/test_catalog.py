@@ -0,0 +1,106 @@
+"""
+Каталог товаров: цена и архив при создании заказа, версия товаров
+для других воркеров без кеша отчётов, остаток после резерва.
+"""
+
+import time
+
+from core.cache import report_cache
+from core.catalog import ProductCatalog, product_catalog
+from db.database import SessionLocal
+
+
+def order_with(customer, product, **item):
+    return {"client_id": customer["id"], "items": [{"product_id": product["id"], "quantity": "2", **item}]}
+
+
+def test_order_without_unit_price_takes_catalog_price(api, customer, make_product):
+    product = make_product(price="250")
+    
+    order = api("POST", "/api/orders", 201, json=order_with(customer, product)).json()
+    
+    assert float(order["items"][0]["unit_price"]) == 250
+    assert float(order["total_amount"]) == 500
+
+
+def test_explicit_unit_price_wins(api, customer, make_product):
+    product = make_product(price="250")
+    
+    order = api("POST", "/api/orders", 201, json=order_with(customer, product, unit_price="200")).json()
+    
+    assert float(order["total_amount"]) == 400
+
+
+def test_catalog_price_in_other_currency_needs_unit_price(api, customer, make_product):
+    product = make_product(price="10", currency="USD")
+    
+    response = api("POST", "/api/orders", 400, json=order_with(customer, product))
+    
+    assert "USD" in response.json()["detail"]
+    api("POST", "/api/orders", 201, json=order_with(customer, product, unit_price="5000"))
+
+
+def test_archived_product_is_rejected(api, customer, make_product):
+    product = make_product()
+    api("POST", "/api/orders", 201, json=order_with(customer, product))
+    api("DELETE", f"/api/products/{product['id']}", 204)
+    
+    response = api("POST", "/api/orders", 400, json=order_with(customer, product, unit_price="1"))
+    
+    assert "архив" in response.json()["detail"]
+
+
+def test_bulk_import_checks_catalog(api, customer, make_product):
+    active, archived = make_product(price="30"), make_product()
+    api("DELETE", f"/api/products/{archived['id']}", 204)
+    body = "\n".join([
+        f'{{"client_id": {customer["id"]}, "items": [{{"product_id": {active["id"]}, "quantity": "1"}}]}}',
+        f'{{"client_id": {customer["id"]}, "items": [{{"product_id": {archived["id"]}, "quantity": "1"}}]}}',
+    ])
+    
+    report = api(
+        "POST", "/api/orders/bulk", 200,
+        content=body.encode(), headers={"Content-Type": "application/x-ndjson"}
+    ).json()
+    
+    assert [row["status"] for row in report["rows"]] == ["created", "error"]
+    assert "архив" in report["rows"][1]["error"]
+
+
+def test_other_worker_sees_product_change_without_report_cache(api, make_product, monkeypatch):
+    monkeypatch.setattr(report_cache, "enabled", False)
+    product = make_product(price="100")
+    # Каталог «другого воркера»: его upsert маршруты товаров не вызывают
+    other = ProductCatalog(enabled=True, version_check_interval=0, max_age=3600)
+    other.reload()
+    
+    api("PATCH", f"/api/products/{product['id']}", 200, json={"price": "120"})
+    
+    loads = other.loads
+    deadline = time.monotonic() + 5
+    with SessionLocal() as db:
+        while other.loads == loads and time.monotonic() < deadline:
+            other.snapshot(db)
+            time.sleep(0.01)
+        
+        assert other.loads > loads
+        assert float(other.lookup(db, [product["id"]])[product["id"]].price) == 120
+
+
+def test_catalog_stock_follows_reserve_and_release(api, customer, make_product, make_order):
+    product = make_product(stock="10")
+    order = make_order(customer["id"], product, quantity="3")
+    product_catalog.reload()
+    
+    def catalog_stock():
+        with SessionLocal() as db:
+            return product_catalog.snapshot(db).product(product["id"]).stock_quantity
+    
+    assert catalog_stock() == 10
+    api("PATCH", f"/api/orders/{order['id']}", 200, json={"status": "confirmed"})
+    assert catalog_stock() == 7
+    
+    api("POST", "/api/orders/status-bulk", 200, json={"items": [
+        {"order_id": order["id"], "status": "cancelled"},
+    ]})
+    assert catalog_stock() == 10
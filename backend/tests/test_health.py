@@ -0,0 +1,17 @@
+"""
+Служебные эндпоинты состояния: открыт только /health, остальные —
+для администратора.
+"""
+
+import pytest
+
+
+@pytest.mark.parametrize("url", ["/health/suggest", "/health/catalog"])
+def test_health_details_require_admin(client, auth_headers, admin_headers, url):
+    assert client.get(url).status_code == 401
+    assert client.get(url, headers=auth_headers).status_code == 403
+    assert client.get(url, headers=admin_headers).status_code == 200
+
+
+def test_health_is_public(client):
+    assert client.get("/health").json() == {"status": "healthy"}
@@ -0,0 +1,92 @@
+"""
+Раннер миграций: отложенная миграция не записывается и повторяется
+при следующем запуске, нетранзакционная работает вне транзакции;
+новые колонки заказов добавляются и заполняются по платежам.
+"""
+
+import pytest
+from sqlalchemy import create_engine, inspect as sa_inspect, text
+
+from db import migrations
+from db.migrations import Migration, MigrationPostponed, applied_versions, run_migrations
+
+
+@pytest.fixture
+def migration_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/migrations.db")
+    yield engine
+    engine.dispose()
+
+
+def test_postponed_migration_is_retried(monkeypatch, migration_engine):
+    available = False
+    
+    def upgrade(conn):
+        if not available:
+            raise MigrationPostponed("расширение недоступно")
+        conn.execute(text("CREATE TABLE IF NOT EXISTS search_ready (id INTEGER)"))
+    
+    monkeypatch.setattr(migrations, "MIGRATIONS", [
+        Migration("0001", "Отложенная", upgrade, transactional=False),
+        Migration("0002", "Следующая", lambda conn: conn.execute(text("CREATE TABLE later (id INTEGER)"))),
+    ])
+    
+    assert run_migrations(migration_engine) == ["0002"]
+    with migration_engine.connect() as conn:
+        assert applied_versions(conn) == {"0002"}
+    
+    available = True
+    assert run_migrations(migration_engine) == ["0001"]
+    assert run_migrations(migration_engine) == []
+
+
+def test_autocommit_migration_runs_outside_transaction(monkeypatch, migration_engine):
+    seen = {}
+    
+    def upgrade(conn):
+        conn.execute(text("CREATE TABLE probe (id INTEGER)"))
+        conn.execute(text("INSERT INTO probe VALUES (1)"))
+        # В AUTOCOMMIT драйвер не открывает транзакцию даже после INSERT
+        seen["in_transaction"] = conn.connection.dbapi_connection.in_transaction
+    
+    monkeypatch.setattr(migrations, "MIGRATIONS", [
+        Migration("0001", "Без транзакции", upgrade, transactional=False),
+    ])
+    
+    assert run_migrations(migration_engine) == ["0001"]
+    assert seen == {"in_transaction": False}
+
+
+def test_order_balance_columns_are_added_and_backfilled(monkeypatch, migration_engine):
+    with migration_engine.begin() as conn:
+        # Таблицы в том виде, в каком они были до колонок оплат
+        conn.execute(text("CREATE TABLE orders (id INTEGER PRIMARY KEY, total_amount NUMERIC(15, 2),"
+            " updated_at DATETIME)"))
+        conn.execute(text(
+            "CREATE TABLE payments (id INTEGER PRIMARY KEY, order_id INTEGER,"
+            " amount NUMERIC(15, 2), status VARCHAR(20))"
+        ))
+        conn.execute(text("INSERT INTO orders VALUES (1, 100, NULL), (2, 50, NULL), (3, NULL, NULL)"))
+        conn.execute(text(
+            "INSERT INTO payments VALUES (1, 1, 30, 'completed'), (2, 1, 20, 'completed'),"
+            " (3, 1, 40, 'pending'), (4, 2, 50, 'completed')"
+        ))
+    
+    monkeypatch.setattr(migrations, "MIGRATIONS", [
+        migration for migration in migrations.MIGRATIONS if migration.version in ("0004", "0005")
+    ])
+    
+    assert run_migrations(migration_engine) == ["0004", "0005"]
+    with migration_engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT id, paid_amount, debt_amount, stock_reserved, updated_at FROM orders ORDER BY id"
+        )).all()
+        conn.execute(text("INSERT INTO orders (id, total_amount) VALUES (4, 10)"))
+        fresh = conn.execute(text("SELECT paid_amount, debt_amount FROM orders WHERE id = 4")).one()
+        indexes = {index["name"] for index in sa_inspect(conn).get_indexes("orders")}
+    
+    assert [(row[0], float(row[1]), float(row[2]), row[3], row[4]) for row in rows] == [
+        (1, 50, 50, 0, None), (2, 50, 0, 0, None), (3, 0, 0, 0, None)
+    ]
+    assert [float(value) for value in fresh] == [0, 0]
+    assert "ix_orders_debt_amount" in indexes
@@ -0,0 +1,63 @@
+"""
+Пакетный импорт заказов: POST /orders/bulk (NDJSON и CSV).
+"""
+
+import json
+
+CSV_HEADER = "order_ref,client_id,product_id,quantity,unit_price,notes\n"
+
+
+def import_orders(api, body: str, content_type: str) -> dict:
+    return api(
+        "POST", "/api/orders/bulk", 200,
+        content=body.encode(), headers={"Content-Type": content_type}
+    ).json()
+
+
+def test_ndjson_import_reports_invalid_rows(api, customer, make_product):
+    product = make_product()
+    good = {"client_id": customer["id"], "items": [{"product_id": product["id"], "quantity": "1", "unit_price": "100"}]}
+    body = "\n".join([json.dumps(good), "", json.dumps({"items": []}), json.dumps(good)])
+    
+    report = import_orders(api, body, "application/x-ndjson")
+    
+    assert report["created"] == 2
+    assert [(row["row"], row["status"]) for row in report["rows"]] == [
+        (1, "created"), (3, "error"), (4, "created")
+    ]
+
+
+def test_csv_import_groups_items_by_order_ref(api, customer, make_product):
+    first, second = make_product(price="10"), make_product(price="20")
+    body = CSV_HEADER + (
+        f"A,{customer['id']},{first['id']},2,10,\n"
+        f"A,{customer['id']},{second['id']},1,20,\n"
+        f"B,{customer['id']},{first['id']},1,10,\n"
+    )
+    
+    report = import_orders(api, body, "text/csv")
+    
+    assert report["created"] == 2 and report["failed"] == 0
+    assert [row["row"] for row in report["rows"]] == [2, 4]
+    order = api("GET", f"/api/orders/{report['rows'][0]['order_id']}", 200).json()
+    assert len(order["items"]) == 2
+    assert float(order["total_amount"]) == 40
+
+
+def test_csv_import_keeps_newlines_in_quoted_fields(api, customer, make_product):
+    product = make_product(price="10")
+    body = CSV_HEADER + (
+        f'A,{customer["id"]},{product["id"]},2,10,"line one\r\nline two"\r\n'
+        f'B,{customer["id"]},{product["id"]},1,10,"say ""hi""\nand\n\nbye"\n'
+        f"C,{customer['id']},{product['id']},1,10,plain\n"
+    )
+    
+    report = import_orders(api, body, "text/csv")
+    
+    assert report["failed"] == 0, report
+    assert [row["row"] for row in report["rows"]] == [2, 4, 8]
+    notes = [
+        api("GET", f"/api/orders/{row['order_id']}", 200).json()["notes"]
+        for row in report["rows"]
+    ]
+    assert notes == ["line one\r\nline two", 'say "hi"\nand\n\nbye', "plain"]
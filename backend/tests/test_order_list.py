@@ -0,0 +1,39 @@
+"""
+Список заказов: число SQL-запросов не зависит от размера страницы.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def orders_with_payments(api, customer, make_product, make_order):
+    product = make_product()
+    for _ in range(12):
+        order = make_order(customer["id"], product, quantity="2")
+        payment = api("POST", "/api/payments", 201, json={"order_id": order["id"], "amount": "50"}).json()
+        api("POST", f"/api/payments/{payment['id']}/confirm", 200)
+    return customer
+
+
+def test_order_list_query_count_is_constant(api, orders_with_payments, count_queries):
+    url = f"/api/orders?client_id={orders_with_payments['id']}"
+    # Прогрев: пользователь и кеши читаются при первом запросе
+    api("GET", url, 200)
+    
+    counts = {}
+    for per_page in (1, 5, 12):
+        with count_queries() as statements:
+            response = api("GET", f"{url}&per_page={per_page}", 200)
+        assert len(response.json()["items"]) == per_page
+        counts[per_page] = len(statements)
+    
+    # COUNT, страница заказов и позиции одним selectin-запросом
+    assert set(counts.values()) == {3}, counts
+
+
+def test_order_list_returns_stored_paid_amounts(api, orders_with_payments):
+    items = api("GET", f"/api/orders?client_id={orders_with_payments['id']}&per_page=50", 200).json()["items"]
+    assert len(items) == 12
+    for order in items:
+        assert float(order["paid_amount"]) == 50
+        assert float(order["debt_amount"]) == 150
@@ -0,0 +1,107 @@
+"""
+Платежи: проводка в оплату заказа и выручку дня, защита от двойного
+проведения.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from sqlalchemy import update
+
+from core.ledger import rebuild_daily_revenue
+from db.database import SessionLocal
+from models import DailyRevenue, Payment
+
+
+def parallel(count: int, call) -> list:
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(lambda _: call(), range(count)))
+
+
+def test_parallel_confirm_posts_payment_once(api, customer, make_product, make_order):
+    order = make_order(customer["id"], make_product(price="500"))
+    payment = api("POST", "/api/payments", 201, json={"order_id": order["id"], "amount": "100"}).json()
+    
+    codes = parallel(8, lambda: api("POST", f"/api/payments/{payment['id']}/confirm").status_code)
+    
+    assert sorted(codes) == [200] + [400] * 7
+    order = api("GET", f"/api/orders/{order['id']}", 200).json()
+    assert float(order["paid_amount"]) == 100
+    assert float(order["debt_amount"]) == 400
+
+
+def test_parallel_cancel_reverses_payment_once(api, customer, make_product, make_order):
+    order = make_order(customer["id"], make_product(price="500"))
+    payment = api("POST", "/api/payments", 201, json={"order_id": order["id"], "amount": "100"}).json()
+    api("POST", f"/api/payments/{payment['id']}/confirm", 200)
+    
+    codes = parallel(8, lambda: api(
+        "PATCH", f"/api/payments/{payment['id']}", json={"status": "cancelled"}
+    ).status_code)
+    
+    # Проигравшие запросы либо видят уже отменённый платёж, либо получают 409
+    assert codes.count(200) >= 1
+    assert set(codes) <= {200, 409}
+    order = api("GET", f"/api/orders/{order['id']}", 200).json()
+    assert float(order["paid_amount"]) == 0
+    assert float(order["debt_amount"]) == 500
+
+
+def test_payment_notes_can_change_after_confirm(api, customer, make_product, make_order):
+    order = make_order(customer["id"], make_product(price="500"))
+    payment = api("POST", "/api/payments", 201, json={"order_id": order["id"], "amount": "100"}).json()
+    api("POST", f"/api/payments/{payment['id']}/confirm", 200)
+    
+    updated = api("PATCH", f"/api/payments/{payment['id']}", 200, json={"notes": "по счёту 12"}).json()
+    api("PATCH", f"/api/payments/{payment['id']}", 400, json={"amount": "50"})
+    
+    assert updated["notes"] == "по счёту 12" and updated["status"] == "completed"
+    assert float(api("GET", f"/api/orders/{order['id']}", 200).json()["paid_amount"]) == 100
+
+
+def test_bulk_confirm_by_ids_and_statement_lines(api, customer, make_product, make_order):
+    order = make_order(customer["id"], make_product(price="500"))
+    payments = [
+        api("POST", "/api/payments", 201, json={
+            "order_id": order["id"], "amount": amount, "payment_date": "2026-03-0%sT10:00:00" % day
+        }).json()
+        for amount, day in (("100", 1), ("150", 2), ("150", 2))
+    ]
+    
+    report = api("POST", "/api/payments/confirm-bulk", 200, json={
+        "payment_ids": [payments[0]["id"], payments[0]["id"]],
+        "lines": [
+            {"order_number": order["order_number"], "amount": "150", "payment_date": "2026-03-02"},
+            {"order_number": order["order_number"], "amount": "150", "payment_date": "2026-03-02"},
+            {"order_number": order["order_number"], "amount": "150", "payment_date": "2026-03-02"},
+        ],
+    }).json()
+    
+    assert report["confirmed"] == 3 and report["failed"] == 2
+    assert [result["status"] for result in report["results"]] == [
+        "confirmed", "error", "confirmed", "confirmed", "error"
+    ]
+    order = api("GET", f"/api/orders/{order['id']}", 200).json()
+    assert float(order["paid_amount"]) == 400
+    assert float(order["debt_amount"]) == 100
+
+
+def test_payment_without_date_posts_to_same_day_as_rebuild(api, customer, make_product, make_order):
+    order = make_order(customer["id"], make_product(price="500"))
+    payment = api("POST", "/api/payments", 201, json={"order_id": order["id"], "amount": "100"}).json()
+    with SessionLocal() as db:
+        # Старый платёж без даты, созданный несколько дней назад
+        db.execute(update(Payment).where(Payment.id == payment["id"]).values(
+            payment_date=None, created_at=datetime(2026, 2, 1, 12, 0)
+        ))
+        db.commit()
+    
+    api("POST", f"/api/payments/{payment['id']}/confirm", 200)
+    
+    with SessionLocal() as db:
+        posted = db.query(DailyRevenue.day, DailyRevenue.revenue).order_by(DailyRevenue.day).all()
+        rebuild_daily_revenue(db)
+        rebuilt = db.query(DailyRevenue.day, DailyRevenue.revenue).order_by(DailyRevenue.day).all()
+    
+    assert (date(2026, 2, 1), 100) in [(day, float(revenue)) for day, revenue in posted]
+    assert rebuilt == posted
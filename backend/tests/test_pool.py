@@ -0,0 +1,36 @@
+"""
+Параметры пула: asyncpg за внешним пулером без кеша prepared statements,
+служебный эндпоинт пула только для администратора.
+"""
+
+from core.config import Settings
+from db.pool import engine_options
+
+PG_ASYNC_URL = "postgresql+asyncpg://erp:secret@db/erp"
+
+
+def test_external_pooler_disables_asyncpg_statement_cache():
+    settings = Settings(db_pooler="external", db_prepared_statement_cache_size=100)
+    
+    connect_args = engine_options(settings, PG_ASYNC_URL, is_async=True)["connect_args"]
+    
+    assert connect_args["prepared_statement_cache_size"] == 0
+    name_func = connect_args["prepared_statement_name_func"]
+    assert name_func() != name_func()
+
+
+def test_internal_pool_uses_separate_asyncpg_cache_setting():
+    settings = Settings(db_statement_cache_size=500, db_prepared_statement_cache_size=50)
+    
+    options = engine_options(settings, PG_ASYNC_URL, is_async=True)
+    
+    assert options["query_cache_size"] == 500
+    assert options["connect_args"]["prepared_statement_cache_size"] == 50
+    assert "prepared_statement_name_func" not in options["connect_args"]
+
+
+def test_db_pool_health_requires_admin(client, auth_headers, admin_headers):
+    assert client.get("/health/db-pool").status_code == 401
+    assert client.get("/health/db-pool", headers=auth_headers).status_code == 403
+    assert "sync" in client.get("/health/db-pool", headers=admin_headers).json()
+    assert client.get("/health").status_code == 200
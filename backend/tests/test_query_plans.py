@@ -0,0 +1,95 @@
+"""
+Списки заказов и платежей с фильтрами и сортировкой идут по составным
+индексам (миграция 0001), а не полным просмотром таблицы.
+
+Запросы берутся из настоящих ответов API и прогоняются через
+EXPLAIN QUERY PLAN на той же SQLite-базе.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from db.database import async_read_engines, engine
+
+
+def list_page_query(api, url: str, table: str) -> tuple[str, tuple]:
+    """SELECT страницы списка (с LIMIT), выполненный при запросе url."""
+    executed = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+    
+    targets = {engine, *(async_engine.sync_engine for async_engine in async_read_engines.values())}
+    for target in targets:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        api("GET", url, 200)
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+    
+    pages = [
+        (statement, parameters) for statement, parameters in executed
+        if statement.lstrip().startswith("SELECT")
+        and f"FROM {table}" in statement
+        and "LIMIT" in statement
+    ]
+    assert len(pages) == 1, [statement for statement, _ in executed]
+    return pages[0]
+
+
+def query_plan(statement: str, parameters) -> str:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", tuple(parameters)).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.fixture
+def paid_order(api, customer, make_product, make_order):
+    order = make_order(customer["id"], make_product())
+    api("POST", "/api/payments", 201, json={"order_id": order["id"], "amount": "10"})
+    return order
+
+
+@pytest.mark.parametrize("query, index", [
+    ("", "ix_orders_created_at_id"),
+    ("client_id={client_id}", "ix_orders_client_id_created_at"),
+    ("status=new", "ix_orders_status_created_at"),
+])
+def test_order_list_uses_index(api, paid_order, query, index):
+    url = "/api/orders?per_page=5&include_total=false&" + query.format(client_id=paid_order["client_id"])
+    
+    plan = query_plan(*list_page_query(api, url, "orders"))
+    
+    assert index in plan, plan
+    assert "SCAN orders\n" not in plan + "\n", plan
+
+
+def test_order_list_cursor_page_uses_index(api, paid_order):
+    url = f"/api/orders?per_page=1&include_total=false&client_id={paid_order['client_id']}"
+    api("POST", "/api/orders", 201, json={
+        "client_id": paid_order["client_id"],
+        "items": [{"product_id": item["product_id"], "quantity": "1", "unit_price": item["unit_price"]}
+                  for item in paid_order["items"]],
+    })
+    cursor = api("GET", url, 200).json()["next_cursor"]
+    assert cursor
+    
+    plan = query_plan(*list_page_query(api, f"{url}&cursor={cursor}", "orders"))
+    
+    assert "ix_orders_client_id_created_at" in plan, plan
+
+
+@pytest.mark.parametrize("query, index", [
+    ("", "ix_payments_created_at_id"),
+    # Платежей у заказа единицы: хватает одноколоночного индекса и сортировки в памяти
+    ("order_id={order_id}", "ix_payments_order_id (order_id=?)"),
+    ("order_id={order_id}&status=pending", "ix_payments_order_id_status"),
+])
+def test_payment_list_uses_index(api, paid_order, query, index):
+    url = "/api/payments?per_page=5&include_total=false&" + query.format(order_id=paid_order["id"])
+    
+    plan = query_plan(*list_page_query(api, url, "payments"))
+    
+    assert index in plan, plan
+    assert "SCAN payments\n" not in plan + "\n", plan
@@ -0,0 +1,59 @@
+"""
+Кеш отчётов: параллельная запись и версии в БД без конфликтов ключа,
+ошибка кеша не валит запрос, смена статуса заказа сбрасывает отчёты.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from core.cache import CACHE_NAMESPACES, DatabaseCacheBackend, report_cache
+
+
+def parallel(count: int, call) -> list:
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(lambda _: call(), range(count)))
+
+
+def test_versions_are_seeded_by_migration(client):
+    backend = DatabaseCacheBackend(ttl=60)
+    
+    assert all(version >= 0 for version in backend.versions(CACHE_NAMESPACES))
+    assert len(backend.versions(CACHE_NAMESPACES)) == len(CACHE_NAMESPACES)
+
+
+def test_parallel_bumps_and_sets_do_not_conflict(client):
+    backend = DatabaseCacheBackend(ttl=60)
+    (before,) = backend.versions(["orders"])
+    
+    parallel(8, lambda: backend.bump(["orders"]))
+    parallel(8, lambda: backend.set("report:parallel", {"total": 1}))
+    
+    assert backend.versions(["orders"]) == (before + 8,)
+    assert backend.get("report:parallel") == (True, {"total": 1})
+
+
+def test_cache_failure_does_not_fail_request(api, customer, make_product, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("кеш недоступен")
+    
+    monkeypatch.setattr(report_cache, "enabled", True)
+    monkeypatch.setattr(report_cache.backend, "bump", broken)
+    monkeypatch.setattr(report_cache.backend, "set", broken)
+    product = make_product()
+    
+    api("POST", "/api/orders", 201, json={
+        "client_id": customer["id"], "items": [{"product_id": product["id"], "quantity": "1"}]
+    })
+    api("GET", "/api/reports/summary", 200)
+
+
+def test_status_change_invalidates_order_reports(api, customer, make_order, make_product, monkeypatch):
+    monkeypatch.setattr(report_cache, "enabled", True)
+    order = make_order(customer["id"], make_product())
+    (before,) = report_cache.backend.versions(["orders"])
+    
+    api("POST", "/api/orders/status-bulk", 200, json={"items": [
+        {"order_id": order["id"], "status": "confirmed"},
+    ]})
+    
+    # Версию поднимает подписчик смены статуса, а не сам маршрут
+    assert report_cache.backend.versions(["orders"]) == (before + 1,)
@@ -0,0 +1,51 @@
+"""
+Проверка поисковых индексов: отсутствие индекса запоминается,
+миграция 0002 сбрасывает запомненное.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+
+from core import search
+from core.search import CLIENT_SEARCH, has_fts
+from db.database import Base
+from db.migrations import search_indexes
+from models import Client, Product
+
+
+@pytest.fixture
+def search_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/search.db")
+    Base.metadata.create_all(engine, tables=[Client.__table__, Product.__table__])
+    yield engine
+    engine.dispose()
+
+
+def test_missing_index_is_cached_until_migration(search_engine):
+    statements = []
+    event.listen(
+        search_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement)
+    )
+    
+    assert not has_fts(search_engine, CLIENT_SEARCH)
+    checks = len(statements)
+    assert not has_fts(search_engine, CLIENT_SEARCH)
+    assert len(statements) == checks
+    
+    with search_engine.begin() as conn:
+        search_indexes(conn)
+    
+    assert has_fts(search_engine, CLIENT_SEARCH)
+
+
+def test_missing_index_is_rechecked_after_interval(search_engine, monkeypatch):
+    assert not has_fts(search_engine, CLIENT_SEARCH)
+    with search_engine.begin() as conn:
+        # Индекс построил другой процесс — в этом процессе кеш не сброшен
+        search.create_search_indexes(conn)
+    assert not has_fts(search_engine, CLIENT_SEARCH)
+    
+    monkeypatch.setattr(search, "INDEX_RECHECK_INTERVAL", 0)
+    
+    assert has_fts(search_engine, CLIENT_SEARCH)
@@ -0,0 +1,90 @@
+"""
+Резерв товара при смене статуса заказа: параллельные переходы
+и старые заказы без резерва.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import update
+
+from db.database import SessionLocal
+from models import Order
+
+
+def parallel(*calls) -> list:
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        return list(pool.map(lambda call: call(), calls))
+
+
+def stock_of(api, product) -> float:
+    return float(api("GET", f"/api/products/{product['id']}", 200).json()["stock_quantity"])
+
+
+def set_order(order_id: int, **values) -> None:
+    """Меняем заказ мимо API — как у заказов, созданных до появления резерва."""
+    with SessionLocal() as db:
+        db.execute(update(Order).where(Order.id == order_id).values(**values))
+        db.commit()
+
+
+def patch_status(api, order, new_status):
+    return lambda: api("PATCH", f"/api/orders/{order['id']}", json={"status": new_status}).status_code
+
+
+def test_parallel_confirm_reserves_once(api, customer, make_product, make_order):
+    product = make_product(stock="100")
+    order = make_order(customer["id"], product, quantity="3")
+    
+    codes = parallel(*[patch_status(api, order, "confirmed")] * 8)
+    
+    # Опоздавшие либо видят уже подтверждённый заказ, либо получают 409
+    assert codes.count(200) >= 1
+    assert set(codes) <= {200, 409}
+    assert stock_of(api, product) == 97
+
+
+def test_parallel_confirm_and_cancel_keep_stock_consistent(api, customer, make_product, make_order):
+    product = make_product(stock="100")
+    for _ in range(5):
+        order = make_order(customer["id"], product, quantity="1")
+        parallel(patch_status(api, order, "confirmed"), patch_status(api, order, "cancelled"))
+        api("PATCH", f"/api/orders/{order['id']}", json={"status": "cancelled"})
+    
+    # Все заказы в итоге отменены — весь резерв вернулся
+    assert stock_of(api, product) == 100
+
+
+def test_legacy_order_past_confirmed_is_settled(api, customer, make_product, make_order):
+    product = make_product(stock="0")
+    order = make_order(customer["id"], product, quantity="5")
+    set_order(order["id"], status="shipped", stock_reserved=0)
+    
+    api("PATCH", f"/api/orders/{order['id']}", 200, json={"status": "completed"})
+    
+    assert stock_of(api, product) == 0
+
+
+def test_legacy_confirmed_order_cancel_returns_nothing(api, customer, make_product, make_order):
+    product = make_product(stock="10")
+    order = make_order(customer["id"], product, quantity="5")
+    set_order(order["id"], status="confirmed", stock_reserved=0)
+    
+    api("PATCH", f"/api/orders/{order['id']}", 200, json={"status": "in_progress"})
+    api("PATCH", f"/api/orders/{order['id']}", 200, json={"status": "cancelled"})
+    
+    assert stock_of(api, product) == 10
+
+
+def test_bulk_status_uses_same_reserve_rule(api, customer, make_product, make_order):
+    product = make_product(stock="10")
+    legacy = make_order(customer["id"], product, quantity="4")
+    fresh = make_order(customer["id"], product, quantity="3")
+    set_order(legacy["id"], status="confirmed", stock_reserved=0)
+    
+    report = api("POST", "/api/orders/status-bulk", 200, json={"items": [
+        {"order_id": legacy["id"], "status": "in_progress"},
+        {"order_id": fresh["id"], "status": "confirmed"},
+    ]}).json()
+    
+    assert report["updated"] == 2
+    assert stock_of(api, product) == 7